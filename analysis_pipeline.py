@@ -0,0 +1,342 @@
+"""
+SSIRN 이미지 분석 파이프라인 (다운로드 → 디코딩 → 추론 → 저장)
+
+이미지 한 장씩 FTP 다운로드, 디코딩, YOLO, DB 저장을 순서대로 하면
+네트워크 대기 중에는 CPU가, 추론 중에는 네트워크가 논다.
+단계마다 스레드와 크기 제한 큐를 두어 동시에 돌리면 처리량이
+단계 시간의 합이 아니라 가장 느린 단계에 맞춰진다.
+
+사용법:
+    pipeline = AnalysisPipeline(fetch, decode, infer, persist, download_workers=4)
+    stats = pipeline.run(filenames)
+
+    fetch(name) -> bytes | None              다운로드 (None이면 건너뜀)
+    decode(name, data) -> frame | None       디코딩 (None이면 건너뜀)
+    infer([name, ...], [frame, ...]) -> [result, ...]   배치 추론
+    persist([(name, result), ...])           배치 저장 (한 트랜잭션)
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_STOP = object()  # 단계 종료 신호
+
+
+class _Stage:
+    """파이프라인 한 단계 (작업 스레드 + 입력 큐 + 통계)"""
+    def __init__(self, name: str, workers: int, in_queue: queue.Queue):
+        self.name = name
+        self.workers = workers
+        self.in_queue = in_queue
+        self.lock = threading.Lock()
+        self.alive = workers
+        self.processed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.busy = 0.0      # 실제 작업 시간 (스레드 합계)
+        self.starved = 0.0   # 입력 큐가 비어 기다린 시간
+        self.blocked = 0.0   # 다음 큐가 가득 차 기다린 시간 (backpressure)
+        self.max_depth = 0
+
+    def add(self, **kwargs):
+        with self.lock:
+            for key, value in kwargs.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def stats(self, elapsed: float) -> dict:
+        with self.lock:
+            depth = self.in_queue.qsize()
+            self.max_depth = max(self.max_depth, depth)
+            capacity = elapsed * self.workers
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "per_sec": round(self.processed / elapsed, 2) if elapsed > 0 else 0,
+                "avg_ms": round(self.busy / self.processed * 1000, 1) if self.processed else 0,
+                "utilization": round(self.busy / capacity, 3) if capacity > 0 else 0,
+                "queue_depth": depth,
+                "queue_max": self.max_depth,
+                "queue_size": self.in_queue.maxsize,
+                "starved_sec": round(self.starved, 2),
+                "blocked_sec": round(self.blocked, 2),
+            }
+
+
+class AnalysisPipeline:
+    """단계별 스레드 + 크기 제한 큐 분석 파이프라인
+
+    - download_workers: FTP 다운로드 스레드 수 (FTP 풀 크기 이하로)
+    - decode_workers: 디코딩 스레드 수 (cv2.imdecode는 GIL을 놓음)
+    - 추론은 모델 하나를 쓰므로 단일 스레드, 큐에 이미 와 있는 항목을 infer_batch장까지 바로 묶어 호출
+      (배치를 채우려고 기다리는 것은 BatchInferenceService가 한 번만 한다)
+    - 저장은 batch_size개 또는 flush_interval초마다 한 번에 커밋
+    - queue_size: 단계 사이 큐 크기 (다 차면 앞 단계가 대기 = backpressure)
+    - on_done(name, result, error): 항목 하나가 끝날 때마다 호출 (저장/건너뜀/오류)
+    """
+    def __init__(self, fetch: Callable, decode: Callable, infer: Callable, persist: Callable,
+                 download_workers: int = 4, decode_workers: int = 2, queue_size: int = 16,
+                 batch_size: int = 32, flush_interval: float = 2.0,
+                 infer_batch: int = 8,
+                 on_done: Optional[Callable] = None):
+        self.fetch = fetch
+        self.decode = decode
+        self.infer = infer
+        self.persist = persist
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.infer_batch = max(1, infer_batch)
+        self.on_done = on_done
+
+        self._queues = {
+            "download": queue.Queue(maxsize=queue_size * 4),  # 파일명만 들어가므로 넉넉하게
+            "decode": queue.Queue(maxsize=queue_size),
+            "infer": queue.Queue(maxsize=queue_size),
+            "persist": queue.Queue(maxsize=queue_size * 2),
+        }
+        self._stages = {
+            "download": _Stage("download", max(1, download_workers), self._queues["download"]),
+            "decode": _Stage("decode", max(1, decode_workers), self._queues["decode"]),
+            "infer": _Stage("infer", 1, self._queues["infer"]),
+            "persist": _Stage("persist", 1, self._queues["persist"]),
+        }
+        self._abort = threading.Event()
+        self._done_lock = threading.Lock()
+        self._started = None
+        self._finished = None
+        self.total = 0
+
+    # ---------- 큐 입출력 ----------
+    def _put(self, stage: _Stage, target: str, item: Any) -> bool:
+        """다음 단계 큐에 넣기 (가득 차면 대기 시간을 backpressure로 기록)"""
+        q = self._queues[target]
+        try:
+            q.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        start = time.monotonic()
+        try:
+            while not self._abort.is_set():
+                try:
+                    q.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stage.add(blocked=time.monotonic() - start)
+
+    def _get(self, stage: _Stage, timeout: Optional[float] = None) -> Any:
+        """입력 큐에서 꺼내기 (비어서 기다린 시간 기록, timeout 시 queue.Empty)"""
+        start = time.monotonic()
+        try:
+            item = stage.in_queue.get(timeout=timeout)
+        finally:
+            stage.add(starved=time.monotonic() - start)
+        with stage.lock:
+            stage.max_depth = max(stage.max_depth, stage.in_queue.qsize() + 1)
+        return item
+
+    def _finish_stage(self, stage: _Stage, target: Optional[str]):
+        """마지막 작업 스레드가 끝나면 다음 단계 스레드 수만큼 종료 신호 전달"""
+        with stage.lock:
+            stage.alive -= 1
+            last = stage.alive == 0
+        if last and target:
+            for _ in range(self._stages[target].workers):
+                self._queues[target].put(_STOP)
+
+    def _done(self, name: str, result: Any = None, error: Optional[Exception] = None):
+        if self.on_done:
+            with self._done_lock:
+                try:
+                    self.on_done(name, result, error)
+                except Exception:
+                    pass
+
+    # ---------- 단계 작업 ----------
+    def _worker(self, stage: _Stage, func: Callable, target: str):
+        """다운로드/디코딩 공통 작업 루프"""
+        try:
+            while True:
+                item = self._get(stage)
+                if item is _STOP:
+                    return
+                if self._abort.is_set():
+                    continue  # 중단 시 남은 항목은 버리고 종료 신호까지 비움
+                name, payload = item
+                start = time.monotonic()
+                try:
+                    result = func(name) if payload is None else func(name, payload)
+                except Exception as e:
+                    stage.add(busy=time.monotonic() - start, errors=1)
+                    self._done(name, error=e)
+                    continue
+                stage.add(busy=time.monotonic() - start)
+                if result is None:
+                    stage.add(skipped=1)
+                    self._done(name)
+                    continue
+                stage.add(processed=1)
+                self._put(stage, target, (name, result))
+        finally:
+            self._finish_stage(stage, target)
+
+    def _infer_worker(self, stage: _Stage):
+        """배치 추론 루프 (첫 항목과 그때 큐에 있는 항목까지 묶음, 더 기다리지 않음)"""
+        try:
+            stop = False
+            while not stop:
+                item = self._get(stage)
+                if item is _STOP:
+                    return
+                batch = [item]
+                while len(batch) < self.infer_batch:
+                    try:
+                        item = stage.in_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                if self._abort.is_set():
+                    continue
+
+                names = [name for name, _ in batch]
+                start = time.monotonic()
+                try:
+                    results = self.infer(names, [frame for _, frame in batch])
+                except Exception as e:
+                    stage.add(busy=time.monotonic() - start, errors=len(batch))
+                    for name in names:
+                        self._done(name, error=e)
+                    continue
+                stage.add(busy=time.monotonic() - start, processed=len(batch))
+                for name, result in zip(names, results):
+                    self._put(stage, "persist", (name, result))
+        finally:
+            self._finish_stage(stage, "persist")
+
+    def _writer(self, stage: _Stage):
+        """배치 저장 루프 (batch_size개 또는 flush_interval초마다 커밋)"""
+        batch: List[tuple] = []
+        batch_started = 0.0
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, batch_started + self.flush_interval - time.monotonic())
+            try:
+                item = self._get(stage, timeout)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            if item is not None and not stop:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(item)
+            if batch and (stop or item is None or len(batch) >= self.batch_size):
+                self._flush(stage, batch)
+                batch = []
+            if stop:
+                return
+
+    def _flush(self, stage: _Stage, batch: List[tuple]):
+        start = time.monotonic()
+        try:
+            self.persist(batch)
+        except Exception as e:
+            stage.add(busy=time.monotonic() - start, errors=len(batch))
+            for name, _ in batch:
+                self._done(name, error=e)
+            return
+        stage.add(busy=time.monotonic() - start, processed=len(batch))
+        for name, result in batch:
+            self._done(name, result)
+
+    # ---------- 실행 ----------
+    def run(self, names: Iterable[str]) -> dict:
+        """모든 항목 처리 후 단계별 통계 반환 (블로킹)"""
+        names = list(names)
+        self.total = len(names)
+        self._started = time.monotonic()
+        _register(self)
+
+        threads = []
+        for stage_name, func, target in (("download", self.fetch, "decode"),
+                                         ("decode", self.decode, "infer")):
+            stage = self._stages[stage_name]
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(stage, func, target),
+                                     name=f"pipeline-{stage_name}-{i}", daemon=True)
+                threads.append(t)
+        threads.append(threading.Thread(target=self._infer_worker, args=(self._stages["infer"],),
+                                        name="pipeline-infer", daemon=True))
+        threads.append(threading.Thread(target=self._writer, args=(self._stages["persist"],),
+                                        name="pipeline-persist", daemon=True))
+        for t in threads:
+            t.start()
+
+        try:
+            # 입력 공급은 별도 집계 (다운로드 단계 backpressure와 섞이지 않게)
+            feeder = _Stage("feed", 1, self._queues["download"])
+            for name in names:
+                if not self._put(feeder, "download", (name, None)):
+                    break
+            for _ in range(self._stages["download"].workers):
+                self._queues["download"].put(_STOP)
+            for t in threads:
+                t.join()
+        finally:
+            self._finished = time.monotonic()
+            _unregister(self)
+        return self.get_stats()
+
+    def stop(self):
+        """처리 중단 (진행 중인 항목까지만 끝내고 남은 항목은 버림)"""
+        self._abort.set()
+
+    def get_stats(self) -> dict:
+        """단계별 처리량/큐 깊이/대기 시간 + 병목 단계"""
+        if self._started is None:
+            return {"total": self.total, "stages": {}}
+        elapsed = (self._finished or time.monotonic()) - self._started
+        stages = {name: stage.stats(elapsed) for name, stage in self._stages.items()}
+        # 스레드당 사용률이 가장 높은 단계가 전체 처리량을 결정
+        bottleneck = max(stages, key=lambda n: stages[n]["utilization"])
+        persisted = stages["persist"]["processed"]
+        return {
+            "total": self.total,
+            "persisted": persisted,
+            "elapsed_sec": round(elapsed, 2),
+            "images_per_sec": round(persisted / elapsed, 2) if elapsed > 0 else 0,
+            "bottleneck": bottleneck,
+            "running": self._finished is None,
+            "stages": stages,
+        }
+
+
+# 실행 중인 파이프라인 (상태 조회용)
+_active: List[AnalysisPipeline] = []
+_active_lock = threading.Lock()
+
+
+def _register(pipeline: AnalysisPipeline):
+    with _active_lock:
+        _active.append(pipeline)
+
+
+def _unregister(pipeline: AnalysisPipeline):
+    with _active_lock:
+        if pipeline in _active:
+            _active.remove(pipeline)
+
+
+def get_active_pipeline_stats() -> List[Dict[str, Any]]:
+    """실행 중인 파이프라인 통계"""
+    with _active_lock:
+        pipelines = list(_active)
+    return [p.get_stats() for p in pipelines]
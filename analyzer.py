@@ -6,12 +6,16 @@ import os
 import sys
 import io
 import re
-import mysql.connector
-from ftplib import FTP
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+from ftp_pool import get_ftp_pool
+from db_pool import get_db_pool
+from catalog import ArchiveCatalog
+from inference import ModelRegistry
+from detection_writer import DetectionWriter
+
 # 환경변수 로드
 load_dotenv('/usr/ssirn/.env')
 
@@ -22,6 +26,9 @@ FTP_USER = os.getenv('FTP_USER')
 FTP_PASSWORD = os.getenv('FTP_PASSWORD')
 FTP_BASE_PATH = "/homes/ha/camFTP/feed"
 
+# 아카이브 카탈로그 (main.py와 같은 SQLite 파일 공유)
+CATALOG_DB = Path(os.getenv('CATALOG_DB', Path(__file__).resolve().parent / 'catalog.db'))
+
 # DB 설정
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
@@ -31,31 +38,42 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'ssirn')
 }
 
-# YOLO 모델 (나중에 로드)
-model = None
+# YOLO 모델 (처음 사용할 때 로드 + 워밍업, 경로는 스크립트 위치 기준)
+MODEL_NAME = os.getenv('YOLO_MODEL', 'yolov8n.pt')  # nano 모델 (빠름)
+model_registry = ModelRegistry(Path(__file__).resolve().parent,
+                               threads=int(os.getenv('INFERENCE_THREADS', 0)))
+BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', 8))  # 한 번에 추론할 이미지 수
+DETECTION_CLASSES = ('cat', 'dog', 'person', 'car')  # 관심 객체
+FLUSH_IMAGES = int(os.getenv('DETECTION_FLUSH_IMAGES', 50))  # 이 이미지 수마다 한 번에 커밋
 cat_embeddings = {}  # 고양이 개체별 특징 벡터 저장
 
 
-def get_ftp():
-    """FTP 연결"""
-    ftp = FTP()
-    ftp.connect(FTP_HOST, FTP_PORT)
-    ftp.login(FTP_USER, FTP_PASSWORD)
-    return ftp
+def ftp_session():
+    """FTP 풀에서 세션 체크아웃 (with 문으로 사용)"""
+    return get_ftp_pool(FTP_HOST, FTP_PORT, FTP_USER, FTP_PASSWORD).connection()
+
+
+def get_catalog():
+    """feed 카메라 카탈로그"""
+    return ArchiveCatalog(CATALOG_DB, ftp_session, {
+        'feed': {'path': FTP_BASE_PATH, 'video': f"{FTP_BASE_PATH}/videos"}
+    })
 
 
 def get_db():
-    """DB 연결"""
-    return mysql.connector.connect(**DB_CONFIG)
+    """DB 연결 (풀에서 체크아웃, close()하면 반납)"""
+    return get_db_pool(DB_CONFIG, max_size=2).acquire()
 
 
 def load_model():
     """YOLO 모델 로드"""
-    global model
-    if model is None:
-        from ultralytics import YOLO
-        model = YOLO('yolov8n.pt')  # nano 모델 (빠름)
-    return model
+    return model_registry.get(MODEL_NAME)
+
+
+def get_inference_service():
+    """배치 추론 서비스 (관심 객체만 반환)"""
+    return model_registry.service(MODEL_NAME, batch_size=BATCH_SIZE,
+                                  conf=0.15, classes=DETECTION_CLASSES)
 
 
 def parse_filename(filename):
@@ -74,52 +92,43 @@ def parse_filename(filename):
     return None
 
 
-def analyze_image(image_data, filename, max_size=416):
-    """이미지 분석 - 객체 탐지"""
-    import numpy as np
+def load_image(image_data, max_size=416):
+    """이미지 로드 + 리사이즈 (메모리 절약)"""
     from PIL import Image
 
-    # 이미지 로드
     img = Image.open(io.BytesIO(image_data))
-
-    # 이미지 리사이즈 (메모리 절약)
     if max(img.size) > max_size:
         ratio = max_size / max(img.size)
         new_size = (int(img.width * ratio), int(img.height * ratio))
         img = img.resize(new_size, Image.LANCZOS)
+    return img
+
+
+def to_detection(cls_name, conf, bbox):
+    """탐지 튜플 -> 저장용 dict"""
+    return {
+        'class': cls_name,
+        'confidence': conf,
+        'bbox': bbox,
+        'is_cat': cls_name == 'cat',
+        'is_dog': cls_name == 'dog',
+        'is_person': cls_name == 'person',
+        'is_car': cls_name == 'car',
+        'cat_id': None  # 나중에 개체 구별로 채움
+    }
+
 
-    # YOLO 탐지 (신뢰도 임계값 낮춤 - 작은 객체도 감지)
-    model = load_model()
-    results = model(img, verbose=False, conf=0.15)
-
-    detections = []
-    for r in results:
-        for box in r.boxes:
-            cls_id = int(box.cls[0])
-            cls_name = model.names[cls_id]
-            conf = float(box.conf[0])
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-            # 관심 객체: 고양이, 개, 사람, 자동차 (COCO: cat=15, dog=16, person=0, car=2)
-            is_cat = cls_name == 'cat'
-            is_dog = cls_name == 'dog'
-            is_person = cls_name == 'person'
-            is_car = cls_name == 'car'
-
-            # 관심 객체만 저장
-            if is_cat or is_dog or is_person or is_car:
-                detections.append({
-                    'class': cls_name,
-                    'confidence': conf,
-                    'bbox': (x1, y1, x2-x1, y2-y1),
-                    'is_cat': is_cat,
-                    'is_dog': is_dog,
-                    'is_person': is_person,
-                    'is_car': is_car,
-                    'cat_id': None  # 나중에 개체 구별로 채움
-                })
-
-    return detections
+def analyze_images(images, max_size=416):
+    """여러 이미지 배치 분석 - 객체 탐지 (이미지별 탐지 목록 반환)"""
+    frames = [load_image(data, max_size) for data in images]
+    # 관심 객체(고양이, 개, 사람, 자동차)만 반환 (신뢰도 임계값 낮춤 - 작은 객체도 감지)
+    results = get_inference_service().predict_many(frames)
+    return [[to_detection(*det) for det in dets] for dets in results]
+
+
+def analyze_image(image_data, filename, max_size=416):
+    """이미지 분석 - 객체 탐지"""
+    return analyze_images([image_data], max_size)[0]
 
 
 def identify_cat(image_data, bbox, existing_cats):
@@ -132,80 +141,18 @@ def identify_cat(image_data, bbox, existing_cats):
     return cat_id
 
 
-def save_detection(db, image_name, date_info, detection):
-    """탐지 결과 DB 저장"""
-    cursor = db.cursor()
-
-    sql = """
-    INSERT INTO detections
-    (image_name, image_date, image_time, object_class, confidence,
-     bbox_x, bbox_y, bbox_w, bbox_h, is_cat, cat_id)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-
-    bbox = detection['bbox']
-    cursor.execute(sql, (
-        image_name,
-        date_info['date'],
-        date_info['time'],
-        detection['class'],
-        detection['confidence'],
-        bbox[0], bbox[1], bbox[2], bbox[3],
-        detection['is_cat'],
-        detection['cat_id']
-    ))
-
-    db.commit()
-    cursor.close()
-
-
-def update_daily_stats(db, date_str, hour, detection):
-    """일일 통계 업데이트"""
-    cursor = db.cursor()
-
-    # UPSERT 방식
-    hour_col = f"hour_{hour}"
-
-    is_cat = detection.get('is_cat', False)
-    is_dog = detection.get('is_dog', False)
-    is_person = detection.get('is_person', False)
-    is_car = detection.get('is_car', False)
-
-    cat_inc = 1 if is_cat else 0
-    dog_inc = 1 if is_dog else 0
-    person_inc = 1 if is_person else 0
-    car_inc = 1 if is_car else 0
-    other_inc = 1 if not (is_cat or is_dog or is_person or is_car) else 0
-
-    sql = f"""
-    INSERT INTO daily_stats (stat_date, total_detections, cat_count, dog_count, person_count, car_count, other_count, {hour_col})
-    VALUES (%s, 1, %s, %s, %s, %s, %s, 1)
-    ON DUPLICATE KEY UPDATE
-        total_detections = total_detections + 1,
-        cat_count = cat_count + %s,
-        dog_count = dog_count + %s,
-        person_count = person_count + %s,
-        car_count = car_count + %s,
-        other_count = other_count + %s,
-        {hour_col} = {hour_col} + 1
-    """
-
-    cursor.execute(sql, (date_str, cat_inc, dog_inc, person_inc, car_inc, other_inc, cat_inc, dog_inc, person_inc, car_inc, other_inc))
-    db.commit()
-    cursor.close()
-
-
 def analyze_date(date_str, limit=None):
     """특정 날짜의 이미지 분석"""
     print(f"\n=== Analyzing {date_str} ===")
 
     db = get_db()
+    # detections + daily_stats(개/사람/차 컬럼 포함) 버퍼 저장
+    writer = DetectionWriter(db, flush_images=FLUSH_IMAGES, class_counts=True, camera='feed')
 
-    # FTP에서 파일 목록 가져오기
-    ftp = get_ftp()
-    ftp.cwd(f"{FTP_BASE_PATH}/{date_str}/images")
-    files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-    ftp.quit()
+    # 카탈로그에서 파일 목록 가져오기 (해당 날짜 폴더만 다시 스캔)
+    catalog = get_catalog()
+    catalog.sync_date('feed', date_str)
+    files = catalog.files('feed', date_str)
 
     if limit:
         files = files[:limit]
@@ -213,56 +160,74 @@ def analyze_date(date_str, limit=None):
     print(f"Found {len(files)} images")
 
     analyzed = 0
+    analyzed_files = []
+    save_failed = False  # 저장 실패 시 버퍼에 있던 이미지가 유실되므로 분석 완료 표시 안 함
     total_cats = 0
     total_others = 0
 
-    for i, filename in enumerate(files):
-        # 각 이미지마다 새로운 FTP 연결 (안정성 향상)
+    def process_batch(batch):
+        """다운로드한 이미지들을 한 번에 추론 후 저장"""
+        nonlocal analyzed, total_cats, total_others, save_failed
         try:
-            ftp = get_ftp()
-            ftp.cwd(f"{FTP_BASE_PATH}/{date_str}/images")
-            data = io.BytesIO()
-            ftp.retrbinary(f"RETR {filename}", data.write)
-            ftp.quit()
-            data.seek(0)
+            results = analyze_images([data for _, _, data in batch])
         except Exception as e:
-            print(f"  FTP error for {filename}: {e}")
-            continue
-
-        # 파일명에서 날짜/시간 파싱
-        date_info = parse_filename(filename)
-        if not date_info:
-            continue
-
-        # 분석
-        try:
-            detections = analyze_image(data.getvalue(), filename)
+            print(f"  Error analyzing batch ({batch[0][0]}...): {e}")
+            return
+
+        for (filename, date_info, _), detections in zip(batch, results):
+            try:
+                writer.add(filename, date_info['date'], date_info['time'], date_info['hour'],
+                           [(d['class'], d['confidence'], d['bbox']) for d in detections],
+                           cat_ids=[d['cat_id'] for d in detections])
+            except Exception as e:
+                print(f"  Error saving batch ({filename}): {e}")
+                save_failed = True
+                continue
 
             for det in detections:
-                # DB 저장
-                save_detection(db, filename, date_info, det)
-
-                # 통계 업데이트
-                update_daily_stats(db, date_info['date'], date_info['hour'], det)
-
                 if det['is_cat']:
                     total_cats += 1
-                elif det.get('is_dog'):
-                    total_others += 1  # 개 카운트 (간단히)
-                elif det.get('is_person'):
-                    total_others += 1  # 사람 카운트 (간단히)
                 else:
-                    total_others += 1
+                    total_others += 1  # 개/사람/차 (간단히)
 
             analyzed += 1
+            analyzed_files.append(filename)
 
-            if (i + 1) % 10 == 0:
-                print(f"  Processed {i + 1}/{len(files)} images...")
+    batch = []
+    for i, filename in enumerate(files):
+        # 파일명에서 날짜/시간 파싱
+        date_info = parse_filename(filename)
+        if not date_info:
+            continue
 
+        # 풀 세션 재사용 (끊긴 연결은 풀이 버리고 다시 연결)
+        try:
+            data = io.BytesIO()
+            with ftp_session() as ftp:
+                ftp.retrbinary(f"RETR {FTP_BASE_PATH}/{date_str}/images/{filename}", data.write)
         except Exception as e:
-            print(f"  Error analyzing {filename}: {e}")
+            print(f"  FTP error for {filename}: {e}")
+            continue
+
+        batch.append((filename, date_info, data.getvalue()))
+        if len(batch) >= BATCH_SIZE:
+            process_batch(batch)
+            batch = []
+
+        if (i + 1) % 10 == 0:
+            print(f"  Processed {i + 1}/{len(files)} images...")
+
+    if batch:
+        process_batch(batch)
 
+    try:
+        writer.close()
+    except Exception as e:
+        print(f"  Error saving final batch: {e}")
+        save_failed = True
     db.close()
+    if not save_failed:
+        catalog.mark_analyzed('feed', date_str, analyzed_files)
 
     print(f"\nCompleted: {analyzed} images analyzed")
     print(f"  Cats: {total_cats}, Others: {total_others}")
@@ -0,0 +1,143 @@
+"""
+SSIRN 비동기 DB 접근 (aiomysql)
+
+대시보드 핸들러는 async def인데 mysql.connector를 직접 부르면 쿼리 시간 동안
+이벤트 루프 전체가 멈춰 프레임/동영상 프록시까지 같이 느려진다.
+요청 처리용 조회는 이 풀을 통해 비동기로 수행한다. (백그라운드 작업은 db_pool 사용)
+
+사용법:
+    rows = await async_db.fetchall("SELECT ... WHERE image_date >= %s", [from_date])
+    row = await async_db.fetchone("SELECT COUNT(*) AS cnt FROM detections")
+    async for rows in async_db.stream("SELECT ... FROM detections", [], batch_size=1000):
+        ...  # 서버 측 커서에서 batch_size개씩 (메모리 일정)
+
+params는 항상 넘기므로(없으면 빈 튜플) SQL 안의 '%%'는 언제나 '%'로 바뀐다.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+import aiomysql
+
+
+class AsyncDB:
+    """aiomysql 연결 풀 (이벤트 루프 안에서 처음 쓸 때 생성)
+
+    - maxsize: 최대 동시 연결 수
+    - pool_recycle: 이 시간(초)보다 오래된 연결은 재생성 (MySQL wait_timeout 대비)
+    - autocommit: 조회 전용이므로 켜 둠 (풀 연결이 오래된 스냅샷을 보지 않도록)
+    """
+    def __init__(self, host: str, port: int, user: str, password: str, db: str,
+                 minsize: int = 1, maxsize: int = 5, pool_recycle: int = 1800,
+                 connect_timeout: int = 10):
+        self.config = {
+            "host": host, "port": port, "user": user, "password": password, "db": db,
+            "minsize": minsize, "maxsize": maxsize, "pool_recycle": pool_recycle,
+            "connect_timeout": connect_timeout, "autocommit": True, "charset": "utf8mb4",
+        }
+        self._pool: Optional[aiomysql.Pool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._stats = {"queries": 0, "errors": 0, "query_sec": 0.0, "max_ms": 0.0,
+                       "streams": 0, "streamed_rows": 0}
+
+    async def pool(self) -> aiomysql.Pool:
+        """풀 조회 (없으면 생성)"""
+        if self._pool is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(**self.config)
+        return self._pool
+
+    async def _run(self, sql: str, params: Optional[Sequence[Any]], fetch: str):
+        pool = await self.pool()
+        start = time.monotonic()
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(sql, tuple(params or ()))
+                    if fetch == "all":
+                        return await cursor.fetchall()
+                    if fetch == "one":
+                        return await cursor.fetchone()
+                    return cursor.rowcount
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            self._stats["queries"] += 1
+            self._stats["query_sec"] += elapsed
+            self._stats["max_ms"] = max(self._stats["max_ms"], elapsed * 1000)
+
+    async def fetchall(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[dict]:
+        """여러 행 조회 (dict 목록)"""
+        return list(await self._run(sql, params, "all"))
+
+    async def fetchone(self, sql: str, params: Optional[Sequence[Any]] = None) -> Optional[dict]:
+        """한 행 조회 (없으면 None)"""
+        return await self._run(sql, params, "one")
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        """쓰기 쿼리 실행 (영향받은 행 수, autocommit)"""
+        return await self._run(sql, params, "none")
+
+    async def stream(self, sql: str, params: Optional[Sequence[Any]] = None,
+                     batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """서버 측 커서(SSDictCursor)로 결과를 batch_size개씩 전달
+
+        결과 전체를 메모리에 올리지 않는다. 스트림 동안 연결 하나를 점유하며,
+        소비자가 중간에 멈추면(클라이언트 연결 끊김) 남은 결과를 읽지 않고 연결을 닫아 버린다.
+        """
+        pool = await self.pool()
+        conn = await pool.acquire()
+        cursor = None
+        completed = False
+        self._stats["queries"] += 1
+        self._stats["streams"] += 1
+        try:
+            cursor = await conn.cursor(aiomysql.SSDictCursor)
+            await cursor.execute(sql, tuple(params or ()))
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                self._stats["streamed_rows"] += len(rows)
+                yield list(rows)
+            completed = True
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            if completed:
+                await cursor.close()
+            else:
+                conn.close()
+            pool.release(conn)
+
+    async def close(self):
+        """풀 종료 (앱 종료 시)"""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def get_stats(self) -> dict:
+        """풀 상태 + 쿼리 통계"""
+        queries = self._stats["queries"]
+        pool = self._pool
+        return {
+            "host": self.config["host"],
+            "database": self.config["db"],
+            "max_size": self.config["maxsize"],
+            "open": pool.size if pool else 0,
+            "idle": pool.freesize if pool else 0,
+            "in_use": (pool.size - pool.freesize) if pool else 0,
+            "queries": queries,
+            "errors": self._stats["errors"],
+            "avg_ms": round(self._stats["query_sec"] / queries * 1000, 2) if queries else 0,
+            "max_ms": round(self._stats["max_ms"], 2),
+            "streams": self._stats["streams"],
+            "streamed_rows": self._stats["streamed_rows"],
+        }
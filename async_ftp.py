@@ -0,0 +1,235 @@
+"""
+SSIRN 비동기 FTP 클라이언트 풀 (aioftp)
+
+FastAPI 요청 경로에서 ftplib(블로킹)을 쓰면 느린 LIST 하나가 이벤트 루프 전체를
+멈추므로, 요청 처리용 FTP 작업은 이 풀을 통해 비동기로 수행한다.
+백그라운드 작업(변환/분석)은 기존 ftp_pool(동기)을 그대로 사용한다.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import PurePosixPath
+from typing import List, Optional, Tuple
+
+import aioftp
+
+
+class AsyncFTPPool:
+    """aioftp 세션 풀
+
+    - max_size: 최대 동시 연결 수 (초과 시 대기)
+    - idle_timeout: 이 시간(초) 이상 쉬고 있던 연결은 정리
+    - check_after: 이 시간(초) 이상 쉬었던 연결은 체크아웃 시 NOOP로 확인
+    """
+    def __init__(self, host: str, port: int, user: str, password: str,
+                 max_size: int = 6, idle_timeout: float = 120, check_after: float = 10,
+                 timeout: float = 30, acquire_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[Tuple[aioftp.Client, float]] = []  # (연결, 마지막 사용 시각) - LIFO
+        self._size = 0
+        self._cond: Optional[asyncio.Condition] = None  # 이벤트 루프 안에서 생성
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "evicted": 0, "waits": 0}
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _open(self) -> aioftp.Client:
+        """새 연결 생성 + 로그인"""
+        client = aioftp.Client(socket_timeout=self.timeout, path_timeout=self.timeout)
+        await client.connect(self.host, self.port)
+        await client.login(self.user, self.password)
+        return client
+
+    @staticmethod
+    async def _close(client: aioftp.Client):
+        """연결 종료 (QUIT 실패 시 소켓만 닫음)"""
+        try:
+            await asyncio.wait_for(client.quit(), timeout=5)
+        except Exception:
+            client.close()
+
+    def _evict_idle(self) -> List[aioftp.Client]:
+        """idle_timeout 지난 연결 분리 (condition 안에서 호출)"""
+        now = time.monotonic()
+        expired = [c for c, used in self._idle if now - used > self.idle_timeout]
+        if expired:
+            self._idle = [(c, used) for c, used in self._idle if now - used <= self.idle_timeout]
+            self._size -= len(expired)
+            self._stats["evicted"] += len(expired)
+            self._condition().notify_all()
+        return expired
+
+    async def acquire(self) -> aioftp.Client:
+        """풀에서 연결 체크아웃"""
+        cond = self._condition()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            candidate = None
+            async with cond:
+                expired = self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"FTP 연결 대기 시간 초과 ({self.host}, 최대 {self.max_size}개)")
+                    self._stats["waits"] += 1
+                    try:
+                        await asyncio.wait_for(cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    expired += self._evict_idle()
+                if self._idle:
+                    candidate, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+
+            for client in expired:
+                await self._close(client)
+
+            if candidate is None:
+                try:
+                    client = await self._open()
+                except BaseException:
+                    async with cond:
+                        self._size -= 1
+                        cond.notify()
+                    raise
+                self._stats["created"] += 1
+                return client
+
+            # 오래 쉬었던 연결은 NOOP로 살아있는지 확인
+            if time.monotonic() - last_used > self.check_after:
+                try:
+                    await candidate.command("NOOP", "200")
+                except Exception:
+                    await self.release(candidate, discard=True)
+                    continue
+            self._stats["reused"] += 1
+            return candidate
+
+    async def release(self, client: aioftp.Client, discard: bool = False):
+        """연결 반납 (discard=True면 닫고 버림)"""
+        cond = self._condition()
+        if discard:
+            await self._close(client)
+            async with cond:
+                self._size -= 1
+                self._stats["discarded"] += 1
+                cond.notify()
+            return
+        async with cond:
+            self._idle.append((client, time.monotonic()))
+            cond.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        """async with 문용 체크아웃
+
+        FTP 응답 코드 오류(경로 없음 등)는 세션이 정상이므로 반납하고,
+        그 외 예외(소켓 끊김, 취소 등)는 연결을 버린다.
+        """
+        client = await self.acquire()
+        try:
+            yield client
+        except aioftp.StatusCodeError:
+            await self.release(client)
+            raise
+        except BaseException:
+            await self.release(client, discard=True)
+            raise
+        else:
+            await self.release(client)
+
+    # ---------- 편의 함수 ----------
+    async def list_dir(self, path: str) -> List[Tuple[str, dict]]:
+        """디렉토리 목록 (이름, 정보) - MLSD 우선, 미지원 시 LIST"""
+        async with self.connection() as client:
+            entries = await client.list(path)
+        return [(PurePosixPath(p).name, info) for p, info in entries]
+
+    async def list_names(self, path: str) -> List[str]:
+        """디렉토리 내 이름 목록 (nlst 대체)"""
+        return [name for name, _ in await self.list_dir(path)]
+
+    async def download(self, path: str) -> bytes:
+        """파일 전체 다운로드"""
+        chunks = []
+        async with self.connection() as client:
+            async with client.download_stream(path) as stream:
+                async for block in stream.iter_by_block():
+                    chunks.append(block)
+        return b"".join(chunks)
+
+    async def size(self, path: str) -> int:
+        """파일 크기 (bytes)"""
+        async with self.connection() as client:
+            info = await client.stat(path)
+        return int(info["size"])
+
+    async def iter_range(self, path: str, offset: int = 0, length: Optional[int] = None,
+                         block_size: int = 64 * 1024):
+        """파일의 일부를 블록 단위로 스트리밍 (REST offset 사용)
+
+        length=None이면 파일 끝까지. 중간에 끊으면(범위 끝 도달, 클라이언트 이탈)
+        데이터 연결이 정리되지 않은 상태이므로 세션을 풀에 돌려주지 않고 버린다.
+        """
+        client = await self.acquire()
+        try:
+            stream = await client.download_stream(path, offset=offset)
+        except aioftp.StatusCodeError:
+            await self.release(client)
+            raise
+        except BaseException:
+            await self.release(client, discard=True)
+            raise
+
+        completed = False
+        remaining = length
+        try:
+            async for block in stream.iter_by_block(block_size):
+                if remaining is not None:
+                    block = block[:remaining]
+                    remaining -= len(block)
+                if block:
+                    yield block
+                if remaining == 0:
+                    break
+            else:
+                await stream.finish()
+                completed = True
+        finally:
+            if not completed:
+                stream.close()
+            await self.release(client, discard=not completed)
+
+    async def close_all(self):
+        """idle 연결 전부 종료 (앱 종료 시)"""
+        cond = self._condition()
+        async with cond:
+            idle = [c for c, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            cond.notify_all()
+        for client in idle:
+            await self._close(client)
+
+    def get_stats(self) -> dict:
+        """풀 상태 조회"""
+        return {
+            "host": self.host,
+            "max_size": self.max_size,
+            "open": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            **self._stats
+        }
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+/api/dashboard/stats 쿼리 벤치마크 - 기존 26쿼리 방식 vs detection_rollups 조회
+
+별도 벤치마크용 DB에 detections 테이블을 만들고 수백만 행을 채워 롤업을 재계산한 뒤,
+기간 지정/전체 두 경우에 대해 두 방식의 쿼리 수와 응답 시간을 비교한다.
+두 방식의 결과가 같은지도 확인한다. (운영 DB는 건드리지 않음)
+
+사용법:
+    python bench_dashboard_stats.py                   # 300만 행, 90일, DB ssirn_bench
+    python bench_dashboard_stats.py --rows 5000000 --repeat 5
+    python bench_dashboard_stats.py --no-seed         # 이미 채운 테이블로 다시 측정
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from dashboard_stats import stats_queries, build_stats
+from migrations import apply_migrations
+from rollups import rebuild_rollups
+
+load_dotenv()
+
+CLASSES = ['cat', 'dog', 'person', 'car', 'bird']
+CLASS_WEIGHTS = [40, 10, 30, 15, 5]
+
+
+def connect(database=None):
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=database
+    )
+
+
+def seed(db_name, rows, days):
+    """벤치마크 DB/테이블 생성 후 rows개까지 채우기 (1만 행 삽입 후 INSERT ... SELECT로 복제)"""
+    db = connect()
+    cursor = db.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}`")
+    cursor.execute(f"USE `{db_name}`")
+    cursor.execute("DROP TABLE IF EXISTS detections")
+    cursor.execute("DROP TABLE IF EXISTS detection_rollups")
+    cursor.execute("DROP TABLE IF EXISTS images")
+    cursor.execute("DROP TABLE IF EXISTS schema_migrations")
+    cursor.execute("""
+        CREATE TABLE detections (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            image_name VARCHAR(64) NOT NULL,
+            image_date DATE NOT NULL,
+            image_time TIME NOT NULL,
+            object_class VARCHAR(20) NOT NULL,
+            confidence FLOAT,
+            bbox_x INT, bbox_y INT, bbox_w INT, bbox_h INT,
+            is_cat BOOLEAN DEFAULT FALSE,
+            cat_id VARCHAR(20),
+            KEY idx_image_date (image_date)
+        )
+    """)
+
+    start_day = date.today() - timedelta(days=days)
+    base = []
+    for _ in range(10000):
+        cls = random.choices(CLASSES, CLASS_WEIGHTS)[0]
+        d = start_day + timedelta(days=random.randrange(days))
+        t = f"{random.randrange(24):02d}:{random.randrange(60):02d}:{random.randrange(60):02d}"
+        cat_id = f"CAT_{random.randrange(1, 30):03d}" if cls == 'cat' and random.random() < 0.3 else None
+        base.append((f"A{d:%y%m%d}{t.replace(':', '')}10.jpg", d, t, cls, random.random(), cls == 'cat', cat_id))
+    cursor.executemany("""
+        INSERT INTO detections (image_name, image_date, image_time, object_class, confidence, is_cat, cat_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, base)
+    db.commit()
+
+    count = len(base)
+    while count < rows:
+        # 날짜를 섞어 복제 (기간 분포 유지)
+        cursor.execute(f"""
+            INSERT INTO detections (image_name, image_date, image_time, object_class, confidence, is_cat, cat_id)
+            SELECT image_name, DATE_ADD(%s, INTERVAL FLOOR(RAND() * %s) DAY), image_time,
+                   object_class, confidence, is_cat, cat_id
+            FROM detections
+            LIMIT %s
+        """, (start_day, days, min(count, rows - count)))
+        db.commit()
+        count += cursor.rowcount
+        print(f"  seeded {count:,} rows")
+    cursor.close()
+
+    # 운영과 같은 생성 컬럼/인덱스 적용 후 통계 갱신
+    apply_migrations(db)
+    cursor = db.cursor()
+    cursor.execute("ANALYZE TABLE detections")
+    cursor.fetchall()
+    cursor.close()
+
+    start = time.perf_counter()
+    rollup_rows = rebuild_rollups(db)
+    print(f"  rebuilt {rollup_rows:,} rollup rows in {time.perf_counter() - start:.1f}s")
+    db.close()
+
+
+def legacy_stats(cursor, from_date, to_date):
+    """기존 방식 (합계 1 + 시간대별 24 + 고유 고양이 1 쿼리)"""
+    date_condition = ""
+    params = []
+    if from_date and to_date:
+        date_condition = "WHERE image_date BETWEEN %s AND %s"
+        params = [from_date, to_date]
+    elif from_date:
+        date_condition = "WHERE image_date >= %s"
+        params = [from_date]
+    queries = 0
+
+    cursor.execute(f"""
+        SELECT
+            COUNT(*) as total,
+            SUM(CASE WHEN object_class = 'cat' THEN 1 ELSE 0 END) as cats,
+            SUM(CASE WHEN object_class = 'dog' THEN 1 ELSE 0 END) as dogs,
+            SUM(CASE WHEN object_class = 'person' THEN 1 ELSE 0 END) as persons,
+            SUM(CASE WHEN object_class = 'car' THEN 1 ELSE 0 END) as cars,
+            SUM(CASE WHEN object_class NOT IN ('cat', 'dog', 'person', 'car') THEN 1 ELSE 0 END) as others
+        FROM detections {date_condition}
+    """, params)
+    totals = cursor.fetchone()
+    queries += 1
+
+    hourly = []
+    for h in range(24):
+        hour_cond = f"HOUR(image_time) = {h}"
+        if date_condition:
+            cursor.execute(f"SELECT COUNT(*) as cnt FROM detections {date_condition} AND {hour_cond}", params)
+        else:
+            cursor.execute(f"SELECT COUNT(*) as cnt FROM detections WHERE {hour_cond}")
+        hourly.append(cursor.fetchone()['cnt'])
+        queries += 1
+
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT cat_id) as cnt FROM detections WHERE cat_id IS NOT NULL
+        {('AND image_date BETWEEN %s AND %s' if from_date and to_date else '')}
+    """, params if from_date and to_date else [])
+    unique_cats = cursor.fetchone()
+    queries += 1
+
+    result = {key: int(totals[key] or 0) for key in ('total', 'cats', 'dogs', 'persons', 'cars', 'others')}
+    result.update(uniqueCats=unique_cats['cnt'], hourly=hourly)
+    return result, queries
+
+
+def rollup_stats(cursor, from_date, to_date):
+    """현재 방식 (dashboard_stats.stats_queries, 시간대별 수는 detection_rollups)"""
+    (hourly_sql, hourly_params), (unique_sql, unique_params) = stats_queries(from_date, to_date)
+    cursor.execute(hourly_sql, hourly_params)
+    hour_rows = cursor.fetchall()
+    cursor.execute(unique_sql, unique_params)
+    unique_cats = cursor.fetchone()
+    return build_stats(hour_rows, unique_cats), 2
+
+
+def measure(cursor, func, from_date, to_date, repeat):
+    timings = []
+    result = queries = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result, queries = func(cursor, from_date, to_date)
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, queries, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대시보드 통계 쿼리 벤치마크")
+    parser.add_argument("--database", default=os.getenv("BENCH_DB_NAME", "ssirn_bench"))
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-seed", action="store_true", help="기존 벤치마크 테이블 재사용")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        print(f"Seeding {args.rows:,} rows into {args.database}.detections ...")
+        seed(args.database, args.rows, args.days)
+
+    db = connect(args.database)
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) AS cnt FROM detections")
+    print(f"detections: {cursor.fetchone()['cnt']:,} rows\n")
+
+    week_ago = (date.today() - timedelta(days=7)).isoformat()
+    cases = [("last 7 days", week_ago, date.today().isoformat()), ("all time", None, None)]
+
+    print(f"{'case':<12} {'method':<8} {'queries':>7} {'mean ms':>10} {'p50 ms':>10} {'min ms':>10}")
+    ok = True
+    for label, from_date, to_date in cases:
+        legacy, legacy_q, legacy_t = measure(cursor, legacy_stats, from_date, to_date, args.repeat)
+        rollup, rollup_q, rollup_t = measure(cursor, rollup_stats, from_date, to_date, args.repeat)
+        for method, queries, timings in (("legacy", legacy_q, legacy_t), ("rollup", rollup_q, rollup_t)):
+            print(f"{label:<12} {method:<8} {queries:>7} {statistics.mean(timings):>10.1f} "
+                  f"{statistics.median(timings):>10.1f} {min(timings):>10.1f}")
+        speedup = statistics.median(legacy_t) / statistics.median(rollup_t)
+        print(f"{'':<12} speedup x{speedup:.1f}")
+        if legacy != rollup:
+            ok = False
+            print(f"  MISMATCH\n  legacy:  {legacy}\n  rollup:  {rollup}")
+
+    cursor.close()
+    db.close()
+    print("\nresults match" if ok else "\nresults differ")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+SSIRN 카메라 아카이브 카탈로그 (로컬 SQLite)
+
+FTP 트리(camera -> YYYYMMDD -> images/*.jpg, videos/YYYYMMDD.mp4)를 로컬 테이블로 유지한다.
+동기화는 증분 방식: 카메라 루트와 videos 폴더는 매번 MLSD 한 번씩 읽고,
+날짜 폴더는 새로 생겼거나 수정 시각이 바뀌었거나 dirty 표시된 경우(또는 오늘/어제)만 다시 스캔한다.
+"""
+import ftplib
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_dates (
+    camera TEXT NOT NULL,
+    date TEXT NOT NULL,
+    has_folder INTEGER NOT NULL DEFAULT 0,
+    dir_mtime TEXT,
+    image_count INTEGER NOT NULL DEFAULT 0,
+    image_bytes INTEGER NOT NULL DEFAULT 0,
+    has_video INTEGER NOT NULL DEFAULT 0,
+    video_size INTEGER,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    scanned_at TEXT,
+    PRIMARY KEY (camera, date)
+);
+CREATE TABLE IF NOT EXISTS catalog_files (
+    camera TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime TEXT,
+    analyzed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera, date, name)
+);
+CREATE TABLE IF NOT EXISTS catalog_sync (
+    camera TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+class ArchiveCatalog:
+    """camera -> date -> file 카탈로그
+
+    - ftp_session: FTP 세션 체크아웃 함수 (with ftp_session() as ftp)
+    - cameras: {camera: {"path": 이미지 루트, "video": videos 폴더}}
+    """
+    def __init__(self, db_path: Path, ftp_session: Callable, cameras: Dict[str, dict]):
+        self.db_path = Path(db_path)
+        self.ftp_session = ftp_session
+        self.cameras = cameras
+        self._mlsd_supported = True
+        self._sync_locks = {camera: threading.Lock() for camera in cameras}
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ---------- FTP 스캔 ----------
+    def _list(self, ftp: ftplib.FTP, path: str) -> List[tuple]:
+        """(이름, facts) 목록 - MLSD 우선, 미지원 서버는 NLST로 대체"""
+        if self._mlsd_supported:
+            try:
+                return [(name, facts) for name, facts in ftp.mlsd(path, facts=["type", "size", "modify"])
+                        if facts.get("type") not in ("cdir", "pdir")]
+            except ftplib.error_perm as e:
+                if not str(e).startswith(("500", "502")):
+                    raise  # 경로 없음 등
+                self._mlsd_supported = False
+        return [(name.rsplit("/", 1)[-1], {}) for name in ftp.nlst(path)]
+
+    def _scan_images(self, ftp: ftplib.FTP, camera: str, date: str) -> List[tuple]:
+        """날짜 폴더의 이미지 파일 (이름, 크기, 수정시각)"""
+        try:
+            entries = self._list(ftp, f"{self.cameras[camera]['path']}/{date}/images")
+        except ftplib.error_perm:
+            return []  # images 폴더 없음
+        return [(name, int(facts["size"]) if "size" in facts else None, facts.get("modify"))
+                for name, facts in entries
+                if facts.get("type", "file") == "file" and name.lower().endswith(IMAGE_EXTS)]
+
+    def sync(self, camera: str, force: bool = False) -> dict:
+        """카메라 하나 증분 동기화
+
+        force=True면 모든 날짜 폴더를 다시 스캔한다.
+        """
+        cam = self.cameras[camera]
+        recent = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
+
+        with self._sync_locks[camera]:
+            known = {row["date"]: row for row in self._query(
+                "SELECT date, has_folder, dir_mtime, dirty FROM catalog_dates WHERE camera = ?", (camera,))}
+
+            with self.ftp_session() as ftp:
+                folders = {name: facts.get("modify") for name, facts in self._list(ftp, cam["path"])
+                           if len(name) == 8 and name.isdigit() and facts.get("type", "dir") == "dir"}
+                try:
+                    videos = {name[:-4]: (int(facts["size"]) if "size" in facts else None)
+                              for name, facts in self._list(ftp, cam["video"]) if name.endswith(".mp4")}
+                except ftplib.error_perm:
+                    videos = {}
+
+                to_scan = [d for d, mtime in folders.items()
+                           if force or d not in known or known[d]["dirty"] or not known[d]["has_folder"]
+                           or d >= recent or known[d]["dir_mtime"] != mtime]
+                scanned = {d: self._scan_images(ftp, camera, d) for d in to_scan}
+
+            now = datetime.now().isoformat(timespec="seconds")
+            with closing(self._connect()) as conn, conn:
+                # FTP에서 사라진 날짜 정리
+                gone = [d for d in known if d not in folders and d not in videos]
+                conn.executemany("DELETE FROM catalog_dates WHERE camera = ? AND date = ?", [(camera, d) for d in gone])
+                conn.executemany("DELETE FROM catalog_files WHERE camera = ? AND date = ?", [(camera, d) for d in gone])
+
+                for d in set(folders) | set(videos):
+                    conn.execute("""
+                        INSERT INTO catalog_dates (camera, date, has_folder, dir_mtime, has_video, video_size)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(camera, date) DO UPDATE SET
+                            has_folder = excluded.has_folder,
+                            dir_mtime = excluded.dir_mtime,
+                            has_video = excluded.has_video,
+                            video_size = excluded.video_size
+                    """, (camera, d, int(d in folders), folders.get(d), int(d in videos), videos.get(d)))
+
+                for d, files in scanned.items():
+                    self._store_files(conn, camera, d, files, now)
+
+                conn.execute("""
+                    INSERT INTO catalog_sync (camera, synced_at) VALUES (?, ?)
+                    ON CONFLICT(camera) DO UPDATE SET synced_at = excluded.synced_at
+                """, (camera, now))
+
+        return {"camera": camera, "dates": len(set(folders) | set(videos)), "scanned": len(scanned), "removed": len(gone)}
+
+    def sync_date(self, camera: str, date: str):
+        """날짜 폴더 하나만 다시 스캔 (분석 직전 등)"""
+        with self._sync_locks[camera]:
+            with self.ftp_session() as ftp:
+                files = self._scan_images(ftp, camera, date)
+            now = datetime.now().isoformat(timespec="seconds")
+            with closing(self._connect()) as conn, conn:
+                conn.execute("""
+                    INSERT INTO catalog_dates (camera, date, has_folder) VALUES (?, ?, 1)
+                    ON CONFLICT(camera, date) DO NOTHING
+                """, (camera, date))
+                self._store_files(conn, camera, date, files, now)
+
+    @staticmethod
+    def _store_files(conn: sqlite3.Connection, camera: str, date: str, files: List[tuple], now: str):
+        """날짜 폴더 파일 목록 반영 (analyzed 플래그는 유지)"""
+        names = {name for name, _, _ in files}
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM catalog_files WHERE camera = ? AND date = ?", (camera, date))}
+        conn.executemany("DELETE FROM catalog_files WHERE camera = ? AND date = ? AND name = ?",
+                         [(camera, date, n) for n in existing - names])
+        conn.executemany("""
+            INSERT INTO catalog_files (camera, date, name, size, mtime) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(camera, date, name) DO UPDATE SET size = excluded.size, mtime = excluded.mtime
+        """, [(camera, date, name, size, mtime) for name, size, mtime in files])
+        conn.execute("""
+            UPDATE catalog_dates SET image_count = ?, image_bytes = ?, dirty = 0, scanned_at = ?
+            WHERE camera = ? AND date = ?
+        """, (len(files), sum(size or 0 for _, size, _ in files), now, camera, date))
+
+    def invalidate(self, camera: str, date: str):
+        """날짜 폴더를 다음 동기화 때 다시 스캔하도록 표시 (변환/삭제 후 호출)"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE catalog_dates SET dirty = 1 WHERE camera = ? AND date = ?", (camera, date))
+
+    def mark_video(self, camera: str, date: str, size: Optional[int] = None):
+        """동영상 업로드 반영"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                INSERT INTO catalog_dates (camera, date, has_video, video_size) VALUES (?, ?, 1, ?)
+                ON CONFLICT(camera, date) DO UPDATE SET has_video = 1, video_size = excluded.video_size
+            """, (camera, date, size))
+
+    def mark_analyzed(self, camera: str, date: str, names: List[str]):
+        """분석 완료 표시"""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("UPDATE catalog_files SET analyzed = 1 WHERE camera = ? AND date = ? AND name = ?",
+                             [(camera, date, n) for n in names])
+
+    # ---------- 조회 ----------
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def is_synced(self, camera: str) -> bool:
+        """한 번이라도 동기화된 카메라인지"""
+        return bool(self._query("SELECT 1 FROM catalog_sync WHERE camera = ?", (camera,)))
+
+    def dates(self, camera: str, from_date: str = None, to_date: str = None) -> List[dict]:
+        """날짜 목록 (오름차순)"""
+        sql = "SELECT * FROM catalog_dates WHERE camera = ?"
+        params = [camera]
+        if from_date:
+            sql += " AND date >= ?"
+            params.append(from_date)
+        if to_date:
+            sql += " AND date <= ?"
+            params.append(to_date)
+        return [dict(row) for row in self._query(sql + " ORDER BY date", tuple(params))]
+
+    def image_counts(self, camera: str) -> Dict[str, int]:
+        """이미지가 있는 날짜 -> 이미지 수"""
+        return {row["date"]: row["image_count"] for row in self._query(
+            "SELECT date, image_count FROM catalog_dates WHERE camera = ? AND image_count > 0 ORDER BY date DESC",
+            (camera,))}
+
+    def files(self, camera: str, date: str, unanalyzed_only: bool = False) -> List[str]:
+        """날짜 폴더의 이미지 파일명 (시간순)"""
+        sql = "SELECT name FROM catalog_files WHERE camera = ? AND date = ?"
+        if unanalyzed_only:
+            sql += " AND analyzed = 0"
+        return [row["name"] for row in self._query(sql + " ORDER BY name", (camera, date))]
+
+    def files_since(self, camera: str, date: str, after_name: Optional[str] = None,
+                    after_mtime: Optional[str] = None) -> List[tuple]:
+        """워터마크 이후 파일 [(name, mtime), ...] (이름이 더 크거나 더 늦게 수정된 파일, 시간순)"""
+        sql = "SELECT name, mtime FROM catalog_files WHERE camera = ? AND date = ?"
+        params = [camera, date]
+        if after_name and after_mtime:
+            sql += " AND (name > ? OR mtime > ?)"
+            params += [after_name, after_mtime]
+        elif after_name:
+            sql += " AND name > ?"
+            params.append(after_name)
+        return [(row["name"], row["mtime"]) for row in self._query(sql + " ORDER BY name", tuple(params))]
+
+    def get_stats(self) -> dict:
+        rows = self._query("""
+            SELECT d.camera, COUNT(*) AS dates, SUM(d.image_count) AS images, SUM(d.has_video) AS videos, s.synced_at
+            FROM catalog_dates d LEFT JOIN catalog_sync s ON s.camera = d.camera
+            GROUP BY d.camera
+        """)
+        return {row["camera"]: dict(row) for row in rows}
+
+    # ---------- 백그라운드 동기화 ----------
+    def start_background_sync(self, interval: int):
+        """interval(초)마다 전체 카메라 증분 동기화"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sync_loop, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop_background_sync(self):
+        self._stop.set()
+
+    def _sync_loop(self, interval: int):
+        while not self._stop.is_set():
+            for camera in self.cameras:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.sync(camera)
+                except Exception as e:
+                    print(f"Catalog sync error for {camera}: {e}")
+            self._stop.wait(interval)
@@ -0,0 +1,72 @@
+"""
+SSIRN 대시보드 통계 쿼리
+
+/api/dashboard/stats는 합계 1번 + 시간대별 24번 + 고유 고양이 1번, 총 26번 detections를
+스캔했다. 시간대별 객체 수는 detection_rollups(날짜 × 카메라 × 클래스 × 시)에서
+GROUP BY 한 번으로 구하고 합계는 그 결과를 더해서 만든다. 고유 고양이 수만 detections를 읽는다.
+(main.py 엔드포인트와 bench_dashboard_stats.py가 같은 쿼리를 사용)
+"""
+from typing import List, Optional, Tuple
+
+
+def date_filter(from_date: Optional[str], to_date: Optional[str],
+                column: str = "image_date") -> Tuple[str, list]:
+    """기간 조건 (WHERE 절 없이 조건식만, 없으면 '1=1')"""
+    if from_date and to_date:
+        return f"{column} BETWEEN %s AND %s", [from_date, to_date]
+    if from_date:
+        return f"{column} >= %s", [from_date]
+    return "1=1", []
+
+
+def stats_queries(from_date: Optional[str], to_date: Optional[str],
+                  camera: Optional[str] = None) -> List[Tuple[str, list]]:
+    """통계 쿼리 목록 [(sql, params), ...] - 롤업 시간대별 집계 + 고유 고양이 수"""
+    rollup_condition, rollup_params = date_filter(from_date, to_date, "stat_date")
+    if camera:
+        rollup_condition += " AND camera = %s"
+        rollup_params.append(camera)
+    hourly = f"""
+        SELECT
+            stat_hour as hour,
+            SUM(detections) as total,
+            SUM(CASE WHEN object_class = 'cat' THEN detections ELSE 0 END) as cats,
+            SUM(CASE WHEN object_class = 'dog' THEN detections ELSE 0 END) as dogs,
+            SUM(CASE WHEN object_class = 'person' THEN detections ELSE 0 END) as persons,
+            SUM(CASE WHEN object_class = 'car' THEN detections ELSE 0 END) as cars
+        FROM detection_rollups
+        WHERE {rollup_condition}
+        GROUP BY stat_hour
+    """
+    # 카메라는 images에만 있으므로 카메라를 고를 때만 조인
+    condition, params = date_filter(from_date, to_date, "d.image_date")
+    join = ""
+    if camera:
+        join = "JOIN images i ON i.id = d.image_id"
+        condition += " AND i.camera = %s"
+        params.append(camera)
+    unique_cats = f"""
+        SELECT COUNT(DISTINCT d.cat_id) as cnt
+        FROM detections d
+        {join}
+        WHERE d.cat_id IS NOT NULL AND {condition}
+    """
+    return [(hourly, rollup_params), (unique_cats, params)]
+
+
+def build_stats(hour_rows: List[dict], unique_row: Optional[dict]) -> dict:
+    """쿼리 결과 -> 응답 dict (합계는 시간대별 결과를 더해서 계산)"""
+    hourly = [0] * 24
+    totals = {"total": 0, "cats": 0, "dogs": 0, "persons": 0, "cars": 0}
+    for row in hour_rows:
+        if row["hour"] is not None:
+            hourly[int(row["hour"])] = int(row["total"])
+        for key in totals:
+            totals[key] += int(row[key] or 0)
+    others = totals["total"] - totals["cats"] - totals["dogs"] - totals["persons"] - totals["cars"]
+    return {
+        **totals,
+        "others": others,
+        "uniqueCats": int(unique_row["cnt"]) if unique_row else 0,
+        "hourly": hourly,
+    }
@@ -0,0 +1,270 @@
+"""
+SSIRN MySQL 연결 풀
+
+대시보드 쿼리는 수 ms인데 mysql.connector.connect()는 TCP + 인증으로 그보다 오래 걸리므로
+호출마다 연결하지 않고 풀에서 빌려 쓴다. 빌린 연결의 close()는 실제로 닫지 않고 반납한다.
+
+사용법:
+    db = get_db_pool(DB_CONFIG).acquire()
+    cursor = db.cursor()
+    ...
+    db.close()  # 풀에 반납
+
+    with get_db_pool(DB_CONFIG).connection() as db:
+        ...
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import mysql.connector
+
+
+class PooledConnection:
+    """풀 연결 래퍼 - close()하면 닫지 않고 풀에 반납 (나머지 속성은 원래 연결로 위임)"""
+    def __init__(self, pool: "MySQLPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise mysql.connector.errors.OperationalError("이미 풀에 반납된 연결입니다")
+        return getattr(conn, name)
+
+    def close(self, discard: bool = False):
+        """풀에 반납 (discard=True면 실제로 닫고 버림)"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn, discard=discard)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 연결 자체 오류(끊김 등)면 버리고, 쿼리 오류 등은 롤백 후 반납
+        self.close(discard=isinstance(exc, (mysql.connector.errors.OperationalError,
+                                            mysql.connector.errors.InterfaceError)))
+
+    def __del__(self):
+        # 예외 경로에서 close()를 못 한 연결 회수
+        if self.__dict__.get("_conn") is not None:
+            self._pool._count("leaked")
+            self.close()
+
+
+class MySQLPool:
+    """단일 DB용 연결 풀
+
+    - max_size: 최대 동시 연결 수 (초과 시 대기)
+    - max_lifetime: 생성 후 이 시간(초)이 지난 연결은 반납/체크아웃 시 교체
+    - idle_timeout: 이 시간(초) 이상 쉬고 있던 연결은 정리 (MySQL wait_timeout보다 짧게)
+    - check_after: 이 시간(초) 이상 쉬었던 연결은 체크아웃 시 ping으로 확인
+    """
+    def __init__(self, config: dict, max_size: int = 8, max_lifetime: float = 1800,
+                 idle_timeout: float = 300, check_after: float = 10, acquire_timeout: float = 30):
+        self.config = dict(config)
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[Tuple[object, float]] = []  # (연결, 마지막 사용 시각) - LIFO
+        self._created: Dict[int, float] = {}  # id(연결) -> 생성 시각
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "evicted": 0, "expired": 0,
+                       "validation_failed": 0, "leaked": 0, "acquired": 0, "waits": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _count(self, key: str, n: int = 1):
+        with self._cond:
+            self._stats[key] += n
+
+    def _open(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _close(self, conn):
+        with self._cond:
+            self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn) -> bool:
+        """max_lifetime 초과 여부 (lock 안에서 호출)"""
+        created = self._created.get(id(conn), 0)
+        return time.monotonic() - created > self.max_lifetime
+
+    def _evict_idle(self) -> list:
+        """idle_timeout/max_lifetime 지난 idle 연결 분리 (lock 안에서 호출)"""
+        now = time.monotonic()
+        keep, removed = [], []
+        for conn, used in self._idle:
+            if now - used > self.idle_timeout:
+                self._stats["evicted"] += 1
+                removed.append(conn)
+            elif self._expired(conn):
+                self._stats["expired"] += 1
+                removed.append(conn)
+            else:
+                keep.append((conn, used))
+        if removed:
+            self._idle = keep
+            self._size -= len(removed)
+            self._cond.notify_all()
+        return removed
+
+    def _acquire_raw(self):
+        """풀에서 원래 연결 체크아웃 (없으면 생성, 한도 초과 시 대기)"""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+        while True:
+            candidate = None
+            with self._cond:
+                removed = self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise mysql.connector.errors.PoolError(
+                            f"DB 연결 대기 시간 초과 (최대 {self.max_size}개)")
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                    removed += self._evict_idle()
+                if self._idle:
+                    candidate, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+
+            for conn in removed:
+                self._close(conn)
+
+            if candidate is None:
+                try:
+                    conn = self._open()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self._record_acquire(start, "created")
+                return conn
+
+            # 오래 쉬었던 연결은 ping으로 살아있는지 확인
+            if time.monotonic() - last_used > self.check_after:
+                try:
+                    candidate.ping(reconnect=False)
+                except Exception:
+                    self._count("validation_failed")
+                    self.release(candidate, discard=True)
+                    continue
+            self._record_acquire(start, "reused")
+            return candidate
+
+    def _record_acquire(self, start: float, kind: str):
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats[kind] += 1
+            self._stats["acquired"] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def acquire(self) -> PooledConnection:
+        """연결 체크아웃 (close()하면 반납)"""
+        return PooledConnection(self, self._acquire_raw())
+
+    def release(self, conn, discard: bool = False):
+        """연결 반납 (열린 트랜잭션은 롤백, 수명이 다했거나 discard=True면 닫음)"""
+        if not discard:
+            try:
+                if getattr(conn, "in_transaction", False):
+                    conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            if not discard and self._expired(conn):
+                self._stats["expired"] += 1
+                discard = True
+            elif discard:
+                self._stats["discarded"] += 1
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close(conn)
+
+    @contextmanager
+    def connection(self):
+        """with 문용 체크아웃"""
+        db = self.acquire()
+        with db:
+            yield db
+
+    def close_all(self):
+        """idle 연결 전부 종료 (앱 종료 시)"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close(conn)
+
+    def get_stats(self) -> dict:
+        """풀 상태 조회 (대기 시간 ms)"""
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                "host": self.config.get("host"),
+                "database": self.config.get("database"),
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "wait_avg_ms": round(self._wait_total / acquired * 1000, 2) if acquired else 0,
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+                **self._stats
+            }
+
+
+# DB별 풀 (host, port, user, database) -> MySQLPool
+_pools: Dict[Tuple, MySQLPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_db_pool(config: dict, **kwargs) -> MySQLPool:
+    """DB별 풀 조회 (없으면 생성)"""
+    key = (config.get("host"), config.get("port"), config.get("user"), config.get("database"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = MySQLPool(config, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def get_all_db_pool_stats() -> List[dict]:
+    """모든 DB 풀 상태"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [p.get_stats() for p in pools]
+
+
+def close_all_db_pools():
+    """모든 풀의 idle 연결 종료"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for p in pools:
+        p.close_all()
@@ -0,0 +1,247 @@
+"""
+SSIRN 탐지 결과 버퍼 저장
+
+박스 하나마다 detections INSERT + daily_stats upsert + commit을 하면 바쁜 날은
+커밋이 수만 번이 된다. 탐지 행을 모아 두었다가 N장 또는 T초마다 한 트랜잭션으로
+executemany 하고, daily_stats 증가분은 flush마다 (날짜, 시) 하나당 upsert 한 번으로 합친다.
+detection_rollups(날짜 × 카메라 × 클래스 × 시)도 같은 트랜잭션에서 증가시킨다.
+이미지(또는 동영상 프레임)는 images 테이블에 executemany로 등록하고 탐지 행은 그 id를 참조한다.
+id와 새로 들어간 이미지는 (날짜, 유형)마다 uq_images 앞부분으로 SELECT 한 번씩 찾는다.
+탐지가 없는 이미지도 등록되므로 "이미 분석했나?"는 images 조회로 판단할 수 있다.
+
+저장은 멱등: images 유니크 키에 이미 있는 이미지(재실행, 동시 실행)는 탐지/통계를
+다시 쓰지 않고 건너뛴다. 같은 날짜를 다시 분석해도 숫자가 두 번 더해지지 않는다.
+
+사용법:
+    writer = DetectionWriter(db, flush_images=50, flush_interval=5, camera="feed")
+    writer.add(filename, "2026-02-04", "00:33:34", 0, [("cat", 0.91, (x, y, w, h)), ...])
+    writer.add("20260204.mp4", "2026-02-04", "00:33:34", 0, detections, frame_index=120)  # 동영상 프레임
+    writer.close()  # 남은 버퍼 저장
+
+on_commit(dates)를 넘기면 탐지가 새로 저장된 날짜 집합으로 커밋 직후 호출된다 (응답 캐시 무효화).
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from rollups import ROLLUP_UPSERT_SQL
+
+INTEREST_CLASSES = ('cat', 'dog', 'person', 'car')
+
+
+class DetectionWriter:
+    """detections/daily_stats 버퍼 저장기 (스레드 안전)
+
+    - flush_images: 이만큼의 이미지(탐지 없는 이미지 포함)가 쌓이면 저장
+    - flush_interval: 첫 행이 버퍼에 들어온 뒤 이 시간(초)이 지나면 저장
+    - class_counts: True면 daily_stats의 dog/person/car_count도 갱신 (analyzer.py 스키마)
+      False면 cat_count와 other_count(고양이 외 전부)만 갱신 (main.py 스키마)
+    - camera: images/롤업에 기록할 카메라
+    - on_commit: 커밋 후 탐지가 추가된 날짜 집합으로 호출 (예외는 무시)
+    """
+    def __init__(self, db, flush_images: int = 50, flush_interval: float = 5.0,
+                 class_counts: bool = False, camera: str = "feed",
+                 on_commit: Optional[Callable[[Set[str]], None]] = None):
+        self.db = db
+        self.camera = camera
+        self.on_commit = on_commit
+        self.flush_images = max(1, flush_images)
+        self.flush_interval = flush_interval
+        self.class_counts = class_counts
+
+        # (image_date, image_time, source_type, frame_index, image_name, hour, [탐지 컬럼 튜플])
+        self._buffer: List[tuple] = []
+        self._first_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stats = {"images": 0, "duplicates": 0, "rows": 0, "flushes": 0, "statements": 0,
+                       "flush_sec": 0.0}
+
+    def add(self, image_name: str, image_date: str, image_time: str, hour: int, detections: list,
+            cat_ids: Optional[list] = None, frame_index: Optional[int] = None):
+        """이미지 하나의 탐지 결과 추가 (탐지가 없어도 호출해 이미지 수에 포함)
+
+        detections: [(class, confidence, (x, y, w, h) 또는 None), ...]
+        frame_index: 동영상 프레임이면 프레임 번호 (image_name은 동영상 파일명)
+        """
+        source_type = "image" if frame_index is None else "video"
+        rows = []
+        for i, (cls_name, conf, bbox) in enumerate(detections):
+            x, y, w, h = bbox if bbox else (None, None, None, None)
+            cat_id = cat_ids[i] if cat_ids else None
+            rows.append((cls_name, conf, x, y, w, h, cls_name == 'cat', cat_id))
+        with self._lock:
+            self._buffer.append((image_date, image_time, source_type, frame_index or 0, image_name,
+                                 int(hour), rows))
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            due = (len(self._buffer) >= self.flush_images or
+                   time.monotonic() - self._first_at >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def _count(self, deltas: dict, rollup: dict, image_date: str, hour: int, cls_name: str):
+        """daily_stats/롤업 증가분 누적"""
+        rollup[(image_date, cls_name, hour)] += 1
+        delta = deltas[(image_date, hour)]
+        delta["total_detections"] += 1
+        delta["cat_count"] += cls_name == 'cat'
+        if self.class_counts:
+            delta["dog_count"] += cls_name == 'dog'
+            delta["person_count"] += cls_name == 'person'
+            delta["car_count"] += cls_name == 'car'
+            delta["other_count"] += cls_name not in INTEREST_CLASSES
+        else:
+            delta["other_count"] += cls_name != 'cat'
+
+    def _lookup(self, cursor, keys: List[tuple]) -> Dict[tuple, int]:
+        """images에 있는 키 -> id ((날짜, 유형)마다 uq_images 앞부분 SELECT 한 번)
+
+        keys: [(image_date, source_type, image_name, frame_index), ...]
+        """
+        groups: Dict[tuple, List[tuple]] = defaultdict(list)
+        for key in keys:
+            groups[key[:2]].append(key)
+        found = {}
+        for (image_date, source_type), group in groups.items():
+            wanted = set(group)
+            names = sorted({key[2] for key in group})
+            frames = sorted({key[3] for key in group})
+            cursor.execute(f"""
+                SELECT id, image_name, frame_index FROM images
+                WHERE camera = %s AND image_date = %s AND source_type = %s
+                  AND image_name IN ({", ".join(["%s"] * len(names))})
+                  AND frame_index IN ({", ".join(["%s"] * len(frames))})
+            """, (self.camera, image_date, source_type, *names, *frames))
+            for image_id, image_name, frame_index in cursor.fetchall():
+                key = (image_date, source_type, image_name, frame_index)
+                if key in wanted:
+                    found[key] = image_id
+        return found
+
+    def flush(self):
+        """버퍼를 한 트랜잭션으로 저장 (실패 시 롤백 후 예외, 버퍼는 비움)"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+            self._first_at = None
+            if not buffer:
+                return
+
+            start = time.monotonic()
+            statements = 0
+            duplicates = 0
+            rows: List[tuple] = []
+            deltas: Dict[Tuple[str, int], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            rollup: Dict[Tuple[str, str, int], int] = defaultdict(int)  # (날짜, 클래스, 시) -> 수
+            cursor = self.db.cursor()
+            try:
+                # 이미지 등록: 새로 들어간 이미지만 탐지/통계 저장
+                entries: Dict[tuple, tuple] = {}
+                for entry in buffer:
+                    image_date, _, source_type, frame_index, image_name, _, _ = entry
+                    key = (image_date, source_type, image_name, frame_index)
+                    if key in entries:
+                        duplicates += 1  # 같은 버퍼에 두 번
+                    else:
+                        entries[key] = entry
+                existing = self._lookup(cursor, list(entries))
+                statements += len({key[:2] for key in entries})
+                new = [key for key in entries if key not in existing]
+                duplicates += len(entries) - len(new)
+
+                if new:
+                    cursor.executemany("""
+                        INSERT IGNORE INTO images
+                        (camera, image_date, image_time, source_type, frame_index, image_name)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, [(self.camera, image_date, image_time, source_type, frame_index, image_name)
+                          for image_date, image_time, source_type, frame_index, image_name, _, _
+                          in (entries[key] for key in new)])
+                    # 두 조회는 같은 스냅샷(REPEATABLE READ)을 보므로 앞 조회 뒤에 다른 트랜잭션이
+                    # 커밋한 같은 이미지는 INSERT IGNORE가 건너뛰고 여기서도 보이지 않는다 -> 중복 처리
+                    # (커밋 전이면 유니크 키 행 잠금에서 기다렸다가 건너뛴다)
+                    ids = self._lookup(cursor, new)
+                    statements += 1 + len({key[:2] for key in new})
+                    for key in new:
+                        image_id = ids.get(key)
+                        if image_id is None:
+                            duplicates += 1
+                            continue
+                        image_date, image_time, _, _, _, hour, dets = entries[key]
+                        for det in dets:
+                            rows.append((image_id, image_date, image_time, *det))
+                            self._count(deltas, rollup, str(image_date), hour, det[0])
+
+                if rows:
+                    cursor.executemany("""
+                        INSERT INTO detections
+                        (image_id, image_date, image_time, object_class, confidence,
+                         bbox_x, bbox_y, bbox_w, bbox_h, is_cat, cat_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, rows)
+                    statements += 1
+
+                # (날짜, 시)당 upsert 한 번
+                for (stat_date, hour), delta in sorted(deltas.items()):
+                    hour_col = f"hour_{int(hour)}"
+                    columns = list(delta)
+                    cursor.execute(f"""
+                        INSERT INTO daily_stats (stat_date, {", ".join(columns)}, {hour_col})
+                        VALUES (%s, {", ".join(["%s"] * len(columns))}, %s)
+                        ON DUPLICATE KEY UPDATE
+                            {", ".join(f"{c} = {c} + VALUES({c})" for c in columns)},
+                            {hour_col} = {hour_col} + VALUES({hour_col})
+                    """, (stat_date, *delta.values(), delta["total_detections"]))
+                    statements += 1
+
+                if rollup:
+                    cursor.executemany(ROLLUP_UPSERT_SQL, [
+                        (stat_date, self.camera, cls_name, hour, count)
+                        for (stat_date, cls_name, hour), count in sorted(rollup.items())
+                    ])
+                    statements += 1
+
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            finally:
+                cursor.close()
+
+            self._stats["images"] += len(buffer) - duplicates
+            self._stats["duplicates"] += duplicates
+            self._stats["rows"] += len(rows)
+            self._stats["flushes"] += 1
+            self._stats["statements"] += statements
+            self._stats["flush_sec"] += time.monotonic() - start
+
+            if self.on_commit and deltas:
+                try:
+                    self.on_commit({stat_date for stat_date, _ in deltas})
+                except Exception:
+                    pass
+
+    def close(self):
+        """남은 버퍼 저장"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_stats(self) -> dict:
+        """저장 통계 (커밋 수 = flushes, duplicates = 이미 저장돼 건너뛴 이미지)"""
+        with self._lock:
+            s = dict(self._stats)
+            pending = len(self._buffer)
+        return {
+            "images": s["images"],
+            "duplicates": s["duplicates"],
+            "rows": s["rows"],
+            "flushes": s["flushes"],
+            "statements": s["statements"],
+            "pending_images": pending,
+            "avg_flush_ms": round(s["flush_sec"] / s["flushes"] * 1000, 1) if s["flushes"] else 0,
+        }
@@ -0,0 +1,145 @@
+"""
+SSIRN 탐지 기록 조회 (키셋 페이지네이션 + 내보내기)
+
+/api/dashboard/detections는 LIMIT만 있어서 한 달치 기록을 넘겨보거나 받으려면 큰 OFFSET이
+필요했다. 마지막 행의 (image_date, image_time, id)를 불투명 커서로 돌려주고 다음 페이지는
+그 뒤부터 idx_det_date_time 인덱스 범위로 읽는다 (페이지 깊이와 무관하게 같은 비용).
+
+내보내기는 같은 조건을 오래된 순으로 서버 측 커서에서 흘려보낸다 (main.py, AsyncDB.stream).
+"""
+import base64
+import csv
+import io
+import json
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+EXPORT_COLUMNS = ["id", "camera", "source", "image", "frame", "date", "time", "class", "confidence",
+                  "bbox_x", "bbox_y", "bbox_w", "bbox_h", "is_cat", "cat_id"]
+
+
+def encode_cursor(image_date: str, image_time: str, detection_id: int) -> str:
+    """마지막 행 -> 커서 (image_date는 YYYYMMDD 또는 YYYY-MM-DD)"""
+    image_date = str(image_date).replace("-", "")
+    raw = json.dumps([image_date, str(image_time), int(detection_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    """커서 -> (YYYY-MM-DD, HH:MM:SS, id), 잘못된 커서는 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        image_date, image_time, detection_id = json.loads(raw)
+        date(int(image_date[:4]), int(image_date[4:6]), int(image_date[6:8]))
+        return f"{image_date[:4]}-{image_date[4:6]}-{image_date[6:8]}", str(image_time), int(detection_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def detection_filter(from_date: Optional[str], to_date: Optional[str],
+                     camera: Optional[str] = None) -> Tuple[str, list]:
+    """기간/카메라 조건 (d = detections, i = images)"""
+    conditions, params = ["1=1"], []
+    if from_date and to_date:
+        conditions.append("d.image_date BETWEEN %s AND %s")
+        params += [from_date, to_date]
+    if camera:
+        conditions.append("i.camera = %s")
+        params.append(camera)
+    return " AND ".join(conditions), params
+
+
+def page_query(from_date: Optional[str], to_date: Optional[str], camera: Optional[str],
+               cursor: Optional[str], limit: int) -> Tuple[str, list]:
+    """최신순 한 페이지 (limit + 1개를 읽어 다음 페이지 여부 판단)
+
+    커서 조건은 행 생성자 대신 풀어 써서 (image_date, image_time) 인덱스 범위 조회가 되게 한다.
+    """
+    condition, params = detection_filter(from_date, to_date, camera)
+    if cursor:
+        last_date, last_time, last_id = decode_cursor(cursor)
+        condition += """ AND (d.image_date < %s OR (d.image_date = %s AND (d.image_time < %s
+                         OR (d.image_time = %s AND d.id < %s))))"""
+        params += [last_date, last_date, last_time, last_time, last_id]
+    sql = f"""
+        SELECT
+            d.id,
+            i.image_name as image,
+            i.camera,
+            i.source_type as source,
+            i.frame_index as frame,
+            REPLACE(DATE(d.image_date), '-', '') as date,
+            CONCAT(LPAD(HOUR(d.image_time),2,'0'), ':', LPAD(MINUTE(d.image_time),2,'0'), ':', LPAD(SECOND(d.image_time),2,'0')) as time,
+            d.object_class as class,
+            d.confidence,
+            d.is_cat,
+            d.cat_id
+        FROM detections d
+        JOIN images i ON i.id = d.image_id
+        WHERE {condition}
+        ORDER BY d.image_date DESC, d.image_time DESC, d.id DESC
+        LIMIT %s
+    """
+    return sql, params + [limit + 1]
+
+
+def split_page(rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """limit + 1개 결과 -> (페이지, 다음 커서 또는 None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["date"], last["time"], last["id"])
+
+
+def export_query(from_date: Optional[str], to_date: Optional[str],
+                 camera: Optional[str] = None) -> Tuple[str, list]:
+    """내보내기 쿼리 (오래된 순, 전체 컬럼)"""
+    condition, params = detection_filter(from_date, to_date, camera)
+    sql = f"""
+        SELECT
+            d.id,
+            i.camera,
+            i.source_type as source,
+            i.image_name as image,
+            i.frame_index as frame,
+            d.image_date as date,
+            d.image_time as time,
+            d.object_class as class,
+            d.confidence,
+            d.bbox_x, d.bbox_y, d.bbox_w, d.bbox_h,
+            d.is_cat,
+            d.cat_id
+        FROM detections d
+        JOIN images i ON i.id = d.image_id
+        WHERE {condition}
+        ORDER BY d.image_date, d.image_time, d.id
+    """
+    return sql, params
+
+
+def _plain(value):
+    """DB 값 -> JSON/CSV용 값 (DATE, TIME(timedelta))"""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return value
+
+
+def format_ndjson(rows: List[dict]) -> str:
+    """행 묶음 -> NDJSON 텍스트"""
+    return "".join(json.dumps({key: _plain(row[key]) for key in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+                   for row in rows)
+
+
+def format_csv(rows: List[dict], header: bool = False) -> str:
+    """행 묶음 -> CSV 텍스트 (header=True면 첫 줄에 컬럼명)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_plain(row[key]) for key in EXPORT_COLUMNS])
+    return buf.getvalue()
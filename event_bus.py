@@ -0,0 +1,146 @@
+"""
+SSIRN 서버 푸시 이벤트 버스 (Server-Sent Events)
+
+admin.html은 작업 목록(2초), 스케줄러 상태(10초), 분석 진행률(1초)을 폴링했고 매 응답마다
+작업별 로그 100줄까지 통째로 직렬화했다. TaskManager/AutoScheduler/DetectionWriter가 바뀐 부분만
+이벤트로 발행하고 /api/events 구독자에게 흘려보낸다.
+
+- publish()는 아무 스레드에서나 호출 가능 (구독자 큐에는 이벤트 루프 스레드에서 넣는다)
+- 이벤트마다 순번(id)을 붙이고 최근 history개를 보관해 재연결(Last-Event-ID) 시 놓친 것만 다시 보낸다
+- 느린 구독자의 큐가 가득 차면 큐를 비우고 resync 이벤트를 넣는다 (클라이언트가 전체 상태를 다시 받음)
+
+사용법:
+    bus = EventBus()
+    bus.publish("task_log", {"id": task_id, "time": "12:00:00", "message": "..."})
+
+    sub = bus.subscribe()          # 이벤트 루프 안에서
+    try:
+        events = await sub.next_batch(timeout=15)   # [(id, event, data)], 시간 초과면 []
+    finally:
+        bus.unsubscribe(sub)
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+
+Event = Tuple[int, str, dict]  # (순번, 이벤트 이름, 데이터)
+
+
+def format_sse(event_id: int, event: str, data: dict) -> str:
+    """SSE 메시지 한 개"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def coalesce(events: List[Event]) -> List[Event]:
+    """한 번에 꺼낸 이벤트 중 같은 작업의 task_update를 하나로 합침 (마지막 위치, 마지막 순번)
+
+    진행률은 이미지마다 갱신되므로 느린 클라이언트에는 최신 값만 보내면 된다.
+    """
+    merged = {}
+    for event_id, event, data in events:
+        if event == "task_update":
+            merged.setdefault(data.get("id"), {}).update(data)
+    if not merged:
+        return events
+    last = {}
+    for index, (_, event, data) in enumerate(events):
+        if event == "task_update":
+            last[data.get("id")] = index
+    result = []
+    for index, (event_id, event, data) in enumerate(events):
+        if event != "task_update":
+            result.append((event_id, event, data))
+        elif last[data.get("id")] == index:
+            result.append((event_id, event, merged[data.get("id")]))
+    return result
+
+
+class Subscription:
+    """구독자 한 명의 이벤트 큐 (구독한 이벤트 루프에서만 읽음)"""
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def _put(self, item: Event):
+        """이벤트 루프 스레드에서 호출"""
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.dropped += 1
+            self.queue.put_nowait((item[0], "resync", {"reason": "queue overflow"}))
+
+    async def next_batch(self, timeout: float) -> List[Event]:
+        """다음 이벤트들 (하나가 올 때까지 최대 timeout초 대기 후 쌓인 것 전부)"""
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return coalesce(batch)
+
+
+class EventBus:
+    """스레드 안전 발행 + asyncio 구독 이벤트 버스"""
+    def __init__(self, history: int = 500, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0}
+
+    @property
+    def last_id(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def publish(self, event: str, data: dict) -> int:
+        """이벤트 발행 (구독자가 없어도 history에는 남음), 순번 반환"""
+        with self._lock:
+            self._seq += 1
+            item = (self._seq, event, data)
+            self._history.append(item)
+            subscribers = list(self._subscribers)
+            self._stats["published"] += 1
+            self._stats["delivered"] += len(subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._put, item)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘
+                self.unsubscribe(sub)
+        return item[0]
+
+    def subscribe(self) -> Subscription:
+        """구독 시작 (이벤트 루프 안에서 호출)"""
+        sub = Subscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def replay(self, after_id: int) -> Optional[List[Event]]:
+        """after_id 이후 이벤트 (history에서 이미 밀려났거나 순번이 맞지 않으면 None)"""
+        with self._lock:
+            if after_id > self._seq:
+                return None  # 서버 재시작 전 순번
+            if after_id == self._seq:
+                return []
+            if not self._history or self._history[0][0] > after_id + 1:
+                return None
+            return [item for item in self._history if item[0] > after_id]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "last_id": self._seq,
+                    "history": len(self._history), **self._stats}
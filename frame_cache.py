@@ -0,0 +1,135 @@
+"""
+SSIRN 카메라 프레임 디스크 캐시 (LRU)
+
+카메라 JPEG는 한 번 기록되면 바뀌지 않으므로, FTP에서 받아온 프레임을
+로컬 디스크에 camera/date/filename 구조로 저장해 두고 재요청 시 바로 파일로 응답한다.
+전체 용량이 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터 삭제한다.
+get()이 돌려준 경로는 FileResponse가 나중에 열기 때문에 evict_grace초 안에 사용된 파일은
+삭제하지 않는다 (그동안은 용량을 잠깐 넘을 수 있음).
+"""
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class FrameCache:
+    """용량 제한 LRU 디스크 캐시"""
+    def __init__(self, root: Path, max_bytes: int, evict_grace: float = 10.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.evict_grace = evict_grace
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # 상대경로 -> 크기 (앞쪽이 오래된 것)
+        self._touched: Dict[str, float] = {}  # 상대경로 -> 마지막 사용 (monotonic)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._load()
+
+    def _load(self):
+        """기존 캐시 파일 인덱싱 (마지막 접근 시각 순)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.root.rglob("*"):
+            if not path.is_file():
+                continue
+            if path.name.startswith(".tmp"):
+                # 쓰기 도중 중단된 임시 파일
+                path.unlink(missing_ok=True)
+                continue
+            st = path.stat()
+            files.append((max(st.st_atime, st.st_mtime), str(path.relative_to(self.root)), st.st_size))
+        files.sort()
+        for _, key, size in files:
+            self._entries[key] = size
+            self._bytes += size
+        self._evict()
+
+    @staticmethod
+    def _key(camera: str, date: str, filename: str) -> Optional[str]:
+        """캐시 키 (경로 조작 방지: 각 요소는 단일 경로 이름이어야 함)"""
+        parts = (camera, date, filename)
+        for part in parts:
+            if not part or part in (".", "..") or "/" in part or "\\" in part or part.startswith(".tmp"):
+                return None
+        return "/".join(parts)
+
+    def _evict(self):
+        """용량 초과분 삭제 (lock 안에서 호출)
+
+        가장 오래된 항목도 evict_grace초 안에 사용됐다면 나머지는 모두 더 최근 것이므로 멈춘다.
+        """
+        now = time.monotonic()
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if now - self._touched.get(key, float("-inf")) < self.evict_grace:
+                break
+            size = self._entries.pop(key)
+            self._touched.pop(key, None)
+            self._bytes -= size
+            self._stats["evictions"] += 1
+            try:
+                (self.root / key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def get(self, camera: str, date: str, filename: str) -> Optional[Path]:
+        """캐시된 파일 경로 (없으면 None, 돌려준 파일은 evict_grace초 동안 삭제하지 않음)"""
+        key = self._key(camera, date, filename)
+        with self._lock:
+            if key is None or key not in self._entries:
+                self._stats["misses"] += 1
+                return None
+            path = self.root / key
+            if not path.exists():
+                # 외부에서 삭제됨
+                self._bytes -= self._entries.pop(key)
+                self._touched.pop(key, None)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._touched[key] = time.monotonic()
+            self._stats["hits"] += 1
+            return path
+
+    def put(self, camera: str, date: str, filename: str, data: bytes) -> Optional[Path]:
+        """파일 저장 (임시 파일에 쓴 뒤 rename으로 원자적 교체)"""
+        key = self._key(camera, date, filename)
+        if key is None or len(data) > self.max_bytes:
+            return None
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old
+            self._entries[key] = len(data)
+            self._touched[key] = time.monotonic()
+            self._bytes += len(data)
+            self._stats["stores"] += 1
+            self._evict()
+        return path
+
+    def get_stats(self) -> dict:
+        """캐시 상태 조회"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "files": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0,
+                **self._stats
+            }
@@ -0,0 +1,204 @@
+"""
+SSIRN FTP 연결 풀 - keep-alive 세션 재사용
+
+NAS는 TCP 연결 + 로그인 비용이 이미지 한 장 다운로드보다 크므로
+요청마다 FTP()를 새로 열지 않고 호스트별 풀에서 세션을 빌려 쓴다.
+
+사용법:
+    with get_ftp_pool(host, port, user, password).connection() as ftp:
+        ftp.cwd(path)
+        files = ftp.nlst()
+"""
+import ftplib
+import threading
+import time
+from contextlib import contextmanager
+from ftplib import FTP
+from typing import Dict, List, Optional, Tuple
+
+
+class FTPPool:
+    """단일 FTP 호스트용 세션 풀
+
+    - max_size: 호스트당 최대 동시 연결 수 (초과 시 대기)
+    - idle_timeout: 이 시간(초) 이상 쉬고 있던 연결은 정리
+    - check_after: 이 시간(초) 이상 쉬었던 연결은 체크아웃 시 NOOP로 확인
+    """
+    def __init__(self, host: str, port: int, user: str, password: str,
+                 max_size: int = 6, idle_timeout: float = 120, check_after: float = 10,
+                 timeout: float = 30, acquire_timeout: float = 60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[Tuple[FTP, float]] = []  # (연결, 마지막 사용 시각) - LIFO
+        self._size = 0  # 열려 있는 전체 연결 수 (idle + 사용 중)
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "evicted": 0, "waits": 0}
+
+    def _open(self) -> FTP:
+        """새 FTP 연결 생성 + 로그인"""
+        ftp = FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(self.user, self.password)
+        return ftp
+
+    @staticmethod
+    def _close(ftp: FTP):
+        """연결 종료 (QUIT 실패 시 소켓만 닫음)"""
+        try:
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
+
+    def _evict_idle(self) -> List[FTP]:
+        """idle_timeout 지난 연결 분리 (lock 안에서 호출)"""
+        now = time.monotonic()
+        expired = [ftp for ftp, used in self._idle if now - used > self.idle_timeout]
+        if expired:
+            self._idle = [(ftp, used) for ftp, used in self._idle if now - used <= self.idle_timeout]
+            self._size -= len(expired)
+            self._stats["evicted"] += len(expired)
+            self._cond.notify_all()
+        return expired
+
+    def acquire(self) -> FTP:
+        """풀에서 연결 체크아웃 (없으면 생성, 한도 초과 시 대기)"""
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            candidate = None
+            create = False
+            with self._cond:
+                expired = self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"FTP 연결 대기 시간 초과 ({self.host}, 최대 {self.max_size}개)")
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                    expired += self._evict_idle()
+                if self._idle:
+                    candidate, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            for ftp in expired:
+                self._close(ftp)
+
+            if create:
+                try:
+                    ftp = self._open()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                return ftp
+
+            # 오래 쉬었던 연결은 NOOP로 살아있는지 확인
+            if time.monotonic() - last_used > self.check_after:
+                try:
+                    candidate.voidcmd("NOOP")
+                except Exception:
+                    self.release(candidate, discard=True)
+                    continue
+            with self._cond:
+                self._stats["reused"] += 1
+            return candidate
+
+    def release(self, ftp: FTP, discard: bool = False):
+        """연결 반납 (discard=True면 닫고 버림)"""
+        if discard:
+            self._close(ftp)
+            with self._cond:
+                self._size -= 1
+                self._stats["discarded"] += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((ftp, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """with 문용 체크아웃
+
+        FTP 권한/경로 오류(5xx)는 세션이 정상이므로 반납하고,
+        그 외 예외(소켓 끊김, 전송 중단 등)는 연결을 버린다.
+        """
+        ftp = self.acquire()
+        try:
+            yield ftp
+        except ftplib.error_perm:
+            self.release(ftp)
+            raise
+        except BaseException:
+            self.release(ftp, discard=True)
+            raise
+        else:
+            self.release(ftp)
+
+    def close_all(self):
+        """idle 연결 전부 종료 (앱 종료 시)"""
+        with self._cond:
+            idle = [ftp for ftp, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for ftp in idle:
+            self._close(ftp)
+
+    def get_stats(self) -> dict:
+        """풀 상태 조회"""
+        with self._cond:
+            return {
+                "host": self.host,
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._stats
+            }
+
+
+# 호스트별 풀 (host, port, user) -> FTPPool
+_pools: Dict[Tuple[str, int, str], FTPPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ftp_pool(host: str, port: int, user: str, password: str, **kwargs) -> FTPPool:
+    """호스트별 풀 조회 (없으면 생성)"""
+    key = (host, port, user)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = FTPPool(host, port, user, password, **kwargs)
+            _pools[key] = pool
+        return pool
+
+
+def get_all_pool_stats() -> List[dict]:
+    """모든 호스트 풀 상태"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [p.get_stats() for p in pools]
+
+
+def close_all_pools():
+    """모든 풀의 idle 연결 종료"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for p in pools:
+        p.close_all()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+작업 큐 스케일아웃 하네스 - 워커 여러 개를 하위 프로세스로 띄워 리스/하트비트/재시도 확인
+
+운영 DB와 NAS는 건드리지 않는다. 같은 MySQL 서버에 별도 DB(ssirn_harness, 매번 새로 만듦)를 쓰고,
+FTP는 임시 디렉토리를 aioftp 서버로 띄운 대역을 쓴다. 워커는 worker.py와 main.analyze_image_range_task를
+그대로 실행하고 YOLO만 StubModel(이미지당 work-ms, 탐지 0~2개)로 바꾼다.
+
+1. 대역 FTP에 dates일 x images장 JPEG 생성
+2. 파일 목록을 chunk장씩 (카메라, 날짜, 파일명 구간) 작업으로 나눠 큐에 추가
+3. 워커 workers개 실행, kill-after초 뒤 하나를 SIGKILL (작업 중 이탈), join-after초 뒤 하나 추가 (합류)
+4. 큐가 빌 때까지 기다린 뒤 확인: 모든 작업 completed, 모든 파일이 images 테이블에 한 번씩 저장,
+   리스 만료/실패로 재실행된 작업 수, 워커별 처리량
+
+사용법:
+    python harness_workers.py                          # 워커 3개, 3일 x 600장, 50장 단위
+    python harness_workers.py --workers 5 --fail-rate 0.05 --kill-after 0
+"""
+import argparse
+import asyncio
+import ftplib
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import mysql.connector
+from dotenv import load_dotenv
+
+import job_queue
+from job_queue import JobQueue, split_ranges
+from migrations import apply_migrations
+
+load_dotenv()
+
+CAMERA = "harness"
+FTP_USER = "harness"
+FTP_PASSWORD = "harness"
+
+
+def connect(database=None):
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=database
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ==================== 대역 ====================
+def make_archive(root: Path, dates: int, images: int) -> list:
+    """임시 디렉토리에 카메라 폴더 구조와 이미지 파일 생성 -> [YYYYMMDD]"""
+    import cv2
+    import numpy as np
+
+    day_list = []
+    start = date.today() - timedelta(days=dates)
+    for d in range(dates):
+        day = start + timedelta(days=d)
+        folder = root / CAMERA / f"{day:%Y%m%d}" / "images"
+        folder.mkdir(parents=True, exist_ok=True)
+        step = max(1, 86400 // images)
+        for i in range(images):
+            seconds = i * step
+            name = f"A{day:%y%m%d}{seconds // 3600:02d}{seconds // 60 % 60:02d}{seconds % 60:02d}10.jpg"
+            frame = np.random.randint(0, 256, (120, 160, 3), dtype=np.uint8)
+            (folder / name).write_bytes(cv2.imencode(".jpg", frame)[1].tobytes())
+        day_list.append(f"{day:%Y%m%d}")
+    return day_list
+
+
+def start_ftp(root: Path, port: int):
+    """aioftp 서버를 백그라운드 스레드의 이벤트 루프에서 실행
+
+    aioftp에는 OPTS가 없어 카탈로그의 MLSD(facts 지정)가 실패하므로 NAS처럼 OPTS MLST를 받아 준다.
+    """
+    import aioftp
+
+    class Server(aioftp.Server):
+        def __init__(self, users):
+            super().__init__(users)
+            self.commands_mapping["opts"] = self.opts
+
+        async def opts(self, connection, rest):
+            connection.response("200", "ok")
+            return True
+
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        user = aioftp.User(FTP_USER, FTP_PASSWORD, base_path=root,
+                           permissions=[aioftp.Permission("/", readable=True, writable=False)])
+        server = Server([user])
+        loop.run_until_complete(server.start("127.0.0.1", port))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    if not ready.wait(10):
+        raise RuntimeError("FTP 대역 시작 실패")
+
+
+def ftp_connect(port: int) -> ftplib.FTP:
+    ftp = ftplib.FTP()
+    ftp.connect("127.0.0.1", port, timeout=10)
+    ftp.login(FTP_USER, FTP_PASSWORD)
+    return ftp
+
+
+def list_images(ftp: ftplib.FTP, path: str) -> list:
+    """폴더의 파일명 (aioftp 서버는 NLST가 없어 MLSD 사용)"""
+    return sorted(name for name, facts in ftp.mlsd(path) if facts.get("type") == "file")
+
+
+# ==================== 워커 (하위 프로세스) ====================
+class _Tensor:
+    """torch 텐서 대신 (.cpu().numpy()만 흉내)"""
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _Boxes:
+    def __init__(self, count: int, width: int, height: int):
+        import numpy as np
+
+        self.cls = _Tensor(np.random.randint(0, 2, count))
+        self.conf = _Tensor(np.random.uniform(0.2, 0.9, count))
+        x, y = np.random.randint(0, width // 2, count), np.random.randint(0, height // 2, count)
+        self.xyxy = _Tensor(np.stack([x, y, x + width // 4, y + height // 4], axis=1))
+
+    def __len__(self):
+        return len(self.cls.array)
+
+
+class _Result:
+    def __init__(self, frame):
+        count = random.randint(0, 2)
+        self.boxes = _Boxes(count, frame.shape[1], frame.shape[0]) if count else None
+
+
+class StubModel:
+    """YOLO 대신 쓰는 가짜 모델 - 프레임당 work-ms만큼 기다리고 탐지 0~2개 반환, fail-rate로 실패 주입"""
+    names = {0: "person", 1: "car"}
+
+    def __init__(self, work_ms: int, fail_rate: float):
+        self.work_ms = work_ms
+        self.fail_rate = fail_rate
+
+    def __call__(self, frames, verbose=False, conf=0.15):
+        time.sleep(self.work_ms / 1000 * len(frames))
+        if any(random.random() < self.fail_rate for _ in frames):
+            raise RuntimeError("injected failure")
+        return [_Result(frame) for frame in frames]
+
+
+def run_child(args):
+    """워커 하나 - worker.py를 그대로 실행하되 FTP/DB/카탈로그는 대역, 모델은 StubModel
+
+    analyze_range는 main.analyze_image_range_task가 그대로 처리한다 (카탈로그 동기화, 이미 저장된 이미지
+    건너뛰기, 다운로드/디코딩 파이프라인, BatchInferenceService, DetectionWriter).
+    카탈로그는 다른 머신의 워커처럼 워커마다 따로 둔다.
+    """
+    os.environ.update({
+        "FTP_HOST": "127.0.0.1", "FTP_PORT": str(args.ftp_port),
+        "FTP_USER": FTP_USER, "FTP_PASSWORD": FTP_PASSWORD,
+        "DB_NAME": args.database,
+        "CATALOG_DB": str(Path(args.catalog_dir) / f"catalog-{os.getpid()}.db"),
+        "MODEL_PRELOAD": "0",
+    })
+    import main as app
+    import worker
+    from catalog import ArchiveCatalog
+    from inference import BatchInferenceService
+
+    job_queue.RETRY_BASE_SEC = 1
+    app.CAMERA_PATHS[CAMERA] = {"path": f"/{CAMERA}", "video": f"/{CAMERA}/videos"}
+    app.CAMERAS[CAMERA] = {"path": f"/{CAMERA}", "name": "하네스"}
+    app.archive_catalog = ArchiveCatalog(app.CATALOG_DB, app.ftp_session, app.CAMERA_PATHS)
+    service = BatchInferenceService(StubModel(args.work_ms, args.fail_rate),
+                                    batch_size=app.INFERENCE_BATCH_SIZE,
+                                    max_wait=app.INFERENCE_MAX_WAIT_MS / 1000,
+                                    classes=app.DETECTION_CLASSES)
+    app.get_inference_service = lambda: service
+
+    sys.argv = [worker.__file__, "--types", "analyze_range", "--slots", str(args.slots),
+                "--lease", str(args.lease), "--no-preload"]
+    worker.main()
+    service.stop()
+
+
+# ==================== 하네스 ====================
+def prepare_database(name: str):
+    """하네스 DB를 지우고 새로 만들어 마이그레이션 적용"""
+    if name == os.getenv("DB_NAME", "ssirn"):
+        raise SystemExit(f"운영 DB({name})는 하네스에 쓸 수 없습니다")
+    db = connect()
+    cursor = db.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{name}`")
+    cursor.execute(f"CREATE DATABASE `{name}`")
+    cursor.close()
+    db.close()
+    db = connect(name)
+    try:
+        apply_migrations(db)
+    finally:
+        db.close()
+
+
+def spawn(args) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, __file__, "--child", "--database", args.database,
+                             "--ftp-port", str(args.ftp_port), "--catalog-dir", args.catalog_dir,
+                             "--lease", str(args.lease),
+                             "--slots", str(args.slots), "--work-ms", str(args.work_ms),
+                             "--fail-rate", str(args.fail_rate)])
+
+
+def report(args, queue: JobQueue, total_files: int, killed: list) -> bool:
+    db = connect(args.database)
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+    statuses = {row["status"]: row["n"] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT COUNT(*) AS n, COUNT(DISTINCT image_date, image_name) AS files FROM images
+        WHERE camera = %s AND source_type = 'image'
+    """, (CAMERA,))
+    results = cursor.fetchone()
+    cursor.execute("""
+        SELECT COUNT(*) AS n, COUNT(DISTINCT d.image_id) AS images FROM detections d
+        JOIN images i ON i.id = d.image_id WHERE i.camera = %s
+    """, (CAMERA,))
+    detections = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) AS n FROM jobs WHERE attempts > 1")
+    retried = cursor.fetchone()["n"]
+    cursor.close()
+    db.close()
+
+    print("\n==================== 결과 ====================")
+    print(f"jobs: {statuses}")
+    print(f"images: {results['files']}/{total_files}장 저장 (행 {results['n']}개)")
+    print(f"detections: {detections['n']}개 (이미지 {detections['images']}장)")
+    print(f"두 번 이상 실행된 작업 (리스 만료/실패 재시도): {retried}")
+    if killed:
+        print(f"강제 종료한 워커 pid: {killed}")
+    for worker in queue.list_workers(stale_sec=args.lease):
+        print(f"  [workers] {worker['worker_id']:<24} {worker['status']:<8} alive={worker['alive']} "
+              f"stats={worker['stats']}")
+
+    ok = results["n"] == results["files"] == total_files and set(statuses) == {"completed"}
+    print("\nOK" if ok else "\nFAILED")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="작업 큐 멀티 워커 하네스")
+    parser.add_argument("--database", default=os.getenv("HARNESS_DB_NAME", "ssirn_harness"))
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=1, help="워커당 slot 수")
+    parser.add_argument("--dates", type=int, default=3)
+    parser.add_argument("--images", type=int, default=600, help="날짜당 이미지 수")
+    parser.add_argument("--chunk", type=int, default=50, help="작업 하나의 이미지 수")
+    parser.add_argument("--work-ms", type=int, default=20, help="이미지당 가짜 추론 시간")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="이미지당 추론 실패 확률 (재시도 확인)")
+    parser.add_argument("--lease", type=int, default=6, help="리스 시간(초) - 짧게 해서 이탈 복구 확인")
+    parser.add_argument("--kill-after", type=float, default=4, help="이 시간(초) 뒤 워커 하나 SIGKILL (0: 안 함)")
+    parser.add_argument("--join-after", type=float, default=6, help="이 시간(초) 뒤 워커 하나 추가 (0: 안 함)")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--ftp-port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--catalog-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    prepare_database(args.database)
+    queue = JobQueue(lambda: connect(args.database))
+
+    with tempfile.TemporaryDirectory(prefix="ssirn_harness_") as tmp:
+        root = Path(tmp) / "ftp"
+        args.catalog_dir = str(Path(tmp) / "catalog")
+        days = make_archive(root, args.dates, args.images)
+        args.ftp_port = free_port()
+        start_ftp(root, args.ftp_port)
+
+        # 작업 단위는 FTP 목록 기준으로 나눔 (main.plan_backfill과 같은 구간 분할)
+        ftp = ftp_connect(args.ftp_port)
+        units = 0
+        for day in days:
+            for first, last in split_ranges(list_images(ftp, f"/{CAMERA}/{day}/images"), args.chunk):
+                queue.enqueue("analyze_range", {"camera": CAMERA, "date": day, "first": first, "last": last},
+                              f"{day} {first}~{last}", max_attempts=5,
+                              dedupe_key=f"analyze_range:{CAMERA}:{day}:{first}:{last}")
+                units += 1
+        ftp.close()
+        total_files = args.dates * args.images
+        print(f"{units}개 작업 ({total_files}장), 워커 {args.workers}개 x slot {args.slots}, 리스 {args.lease}초")
+
+        started = time.monotonic()
+        procs = [spawn(args) for _ in range(args.workers)]
+        killed, joined = [], False
+        try:
+            while time.monotonic() - started < args.timeout:
+                time.sleep(0.5)
+                elapsed = time.monotonic() - started
+                if args.kill_after and not killed and elapsed >= args.kill_after:
+                    victim = next((p for p in procs if p.poll() is None), None)
+                    if victim:
+                        victim.kill()
+                        killed.append(victim.pid)
+                        print(f"[{elapsed:.1f}s] 워커 pid {victim.pid} SIGKILL")
+                if args.join_after and not joined and elapsed >= args.join_after:
+                    procs.append(spawn(args))
+                    joined = True
+                    print(f"[{elapsed:.1f}s] 워커 추가 pid {procs[-1].pid}")
+                counts = queue.counts()
+                pending = sum(c.get("queued", 0) + c.get("running", 0) for c in counts.values())
+                if pending == 0 and (not args.join_after or joined):
+                    break
+            print(f"소요 {time.monotonic() - started:.1f}초")
+        finally:
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.terminate()
+            for proc in procs:
+                try:
+                    proc.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+        ok = report(args, queue, total_files, killed)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+SSIRN YOLO 배치 추론 서비스
+
+프레임을 한 장씩 model(frame)으로 돌리면 CPU에서 전처리/후처리 오버헤드가
+매번 반복된다. 여러 호출자의 프레임을 batch_size장 또는 max_wait초까지 모아
+model([...]) 한 번으로 추론하고, 결과 박스는 텐서를 NumPy로 한 번에 변환한다.
+
+사용법:
+    service = BatchInferenceService(model, batch_size=8, max_wait=0.05,
+                                    classes=('cat', 'dog', 'person', 'car'))
+    detections = service.predict(frame)            # [(class, confidence, (x, y, w, h)), ...]
+    results = service.predict_many([f1, f2, f3])   # 프레임별 목록
+    service.stop()
+
+모델은 ModelRegistry로 프로세스당 한 번만 로드/워밍업하고 추론 서비스도 모델별로 공유한다:
+    registry = ModelRegistry(BASE_DIR, threads=4)
+    service = registry.service('yolov8n.pt', batch_size=8, classes=(...))
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_STOP = object()
+
+Detection = Tuple[str, float, Tuple[int, int, int, int]]  # (클래스, 신뢰도, (x, y, w, h))
+
+
+def extract_detections(result, names: dict, class_ids=None) -> List[Detection]:
+    """YOLO 결과 하나를 탐지 목록으로 변환 (박스별 파이썬 루프 없이 벡터 변환)"""
+    import numpy as np
+
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    cls = boxes.cls.cpu().numpy().astype(np.int32)
+    conf = boxes.conf.cpu().numpy().astype(np.float32)
+    xyxy = boxes.xyxy.cpu().numpy().astype(np.int32)
+    if class_ids is not None:
+        keep = np.isin(cls, class_ids)
+        cls, conf, xyxy = cls[keep], conf[keep], xyxy[keep]
+    xywh = xyxy.copy()
+    xywh[:, 2:] -= xyxy[:, :2]
+    return [(names[c], s, tuple(b)) for c, s, b in zip(cls.tolist(), conf.tolist(), xywh.tolist())]
+
+
+class BatchInferenceService:
+    """여러 스레드의 추론 요청을 모아 배치로 실행하는 서비스
+
+    - batch_size: 한 번에 추론할 최대 프레임 수
+    - max_wait: 첫 프레임 도착 후 배치를 채우려고 기다리는 최대 시간(초)
+    - classes: 남길 클래스 이름 (None이면 전부)
+    모델 호출은 서비스 스레드 하나에서만 하므로 모델을 여러 작업이 공유해도 안전하다.
+    """
+    def __init__(self, model, batch_size: int = 8, max_wait: float = 0.05,
+                 conf: float = 0.15, classes: Optional[Iterable[str]] = None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.conf = conf
+        self.names = model.names
+        self.class_ids = None
+        if classes is not None:
+            import numpy as np
+            wanted = set(classes)
+            self.class_ids = np.array([i for i, n in self.names.items() if n in wanted], dtype=np.int32)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "frames": 0, "errors": 0, "infer_sec": 0.0, "max_batch": 0}
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+                self._thread.start()
+
+    def submit(self, frame: Any) -> Future:
+        """프레임 추론 요청 (결과는 Future로)"""
+        future: Future = Future()
+        self._ensure_thread()
+        self._queue.put((frame, future))
+        return future
+
+    def predict(self, frame: Any) -> List[Detection]:
+        """프레임 한 장 추론 (다른 요청과 같은 배치로 묶일 수 있음)"""
+        return self.submit(frame).result()
+
+    def predict_many(self, frames: List[Any]) -> List[List[Detection]]:
+        """여러 프레임 추론 (batch_size 단위로 묶여 실행)"""
+        futures = [self.submit(f) for f in frames]
+        return [f.result() for f in futures]
+
+    def _collect(self, first) -> Tuple[list, bool]:
+        """첫 요청부터 batch_size개 또는 max_wait까지 모으기 (종료 신호 여부 함께 반환)"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect(item)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: list):
+        frames = [frame for frame, _ in batch]
+        start = time.monotonic()
+        try:
+            results = self.model(frames, verbose=False, conf=self.conf)
+            detections = [extract_detections(r, self.names, self.class_ids) for r in results]
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["frames"] += len(batch)
+            self._stats["infer_sec"] += elapsed
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        for (_, future), dets in zip(batch, detections):
+            future.set_result(dets)
+
+    def stop(self):
+        """대기 중인 요청까지 처리하고 서비스 스레드 종료"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def snapshot(self) -> dict:
+        """누적 카운터 (작업 시작 때 저장해 두고 get_stats(since=...)로 그 뒤 구간만 계산)"""
+        with self._lock:
+            return dict(self._stats)
+
+    def get_stats(self, since: Optional[dict] = None) -> dict:
+        """배치 추론 통계 (since가 있으면 그 스냅샷 이후 구간, 같은 서비스를 쓰는 다른 작업 포함)"""
+        s = self.snapshot()
+        if since:
+            s = {k: v - since.get(k, 0) for k, v in s.items() if k != "max_batch"}
+        stats = {
+            "batch_size": self.batch_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "batches": s["batches"],
+            "frames": s["frames"],
+            "errors": s["errors"],
+            "avg_batch": round(s["frames"] / s["batches"], 2) if s["batches"] else 0,
+            "avg_batch_ms": round(s["infer_sec"] / s["batches"] * 1000, 1) if s["batches"] else 0,
+            "frames_per_sec": round(s["frames"] / s["infer_sec"], 2) if s["infer_sec"] > 0 else 0,
+        }
+        if not since:
+            stats["max_batch"] = s["max_batch"]  # 구간 값은 알 수 없어 누적 통계에만
+        return stats
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux /proc, 실패 시 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelRegistry:
+    """프로세스 전역 YOLO 모델 레지스트리
+
+    - 모델은 이름(가중치 파일)별로 한 번만 로드하고 더미 추론으로 워밍업
+    - 상대 경로는 base_dir 기준 (실행 위치와 무관)
+    - threads > 0이면 첫 로드 전에 torch intra-op 스레드 수 고정
+    - 모델별 BatchInferenceService도 하나만 만들어 모든 작업이 공유
+    """
+    def __init__(self, base_dir: Path, threads: int = 0, warmup_size: int = 640):
+        self.base_dir = Path(base_dir)
+        self.threads = threads
+        self.warmup_size = warmup_size
+        self._models: Dict[str, Any] = {}
+        self._services: Dict[str, BatchInferenceService] = {}
+        self._info: Dict[str, dict] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._threads_configured = False
+
+    def resolve(self, name: str) -> Path:
+        path = Path(name)
+        return path if path.is_absolute() else self.base_dir / path
+
+    def _configure_threads(self):
+        """torch intra-op 스레드 수 고정 (프로세스당 한 번)"""
+        if self._threads_configured:
+            return
+        self._threads_configured = True
+        if self.threads > 0:
+            import torch
+            torch.set_num_threads(self.threads)
+
+    def _load(self, name: str):
+        """모델 로드 + 워밍업 (로드 시간, 메모리 기록)"""
+        import numpy as np
+        from ultralytics import YOLO
+
+        self._configure_threads()
+        rss_before = _rss_bytes()
+        start = time.monotonic()
+        model = YOLO(str(self.resolve(name)))
+        loaded = time.monotonic()
+        # 첫 추론의 레이어 fuse/메모리 할당을 미리 끝내 둠
+        model(np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8), verbose=False)
+        warmed = time.monotonic()
+
+        try:
+            param_bytes = sum(p.numel() * p.element_size() for p in model.model.parameters())
+        except Exception:
+            param_bytes = 0
+        rss_after = _rss_bytes()
+        self._info[name] = {
+            "path": str(self.resolve(name)),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "load_sec": round(loaded - start, 3),
+            "warmup_sec": round(warmed - loaded, 3),
+            "param_mb": round(param_bytes / 1024 / 1024, 1),
+            "rss_delta_mb": round((rss_after - rss_before) / 1024 / 1024, 1) if rss_before and rss_after else None,
+        }
+        return model
+
+    def get(self, name: str):
+        """모델 조회 (처음이면 로드 + 워밍업, 동시 요청은 한 번만 로드)"""
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            with self._lock:
+                model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+                with self._lock:
+                    self._models[name] = model
+        return model
+
+    def service(self, name: str, **kwargs) -> BatchInferenceService:
+        """모델별 공유 배치 추론 서비스 (kwargs는 처음 만들 때만 적용)"""
+        with self._lock:
+            service = self._services.get(name)
+        if service is not None:
+            return service
+        model = self.get(name)
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                service = BatchInferenceService(model, **kwargs)
+                self._services[name] = service
+        return service
+
+    def stop_all(self):
+        """추론 서비스 스레드 종료 (앱 종료 시)"""
+        with self._lock:
+            services = list(self._services.values())
+        for service in services:
+            service.stop()
+
+    def get_stats(self) -> dict:
+        """로드된 모델 정보 + 추론 통계"""
+        torch_threads = None
+        if self._threads_configured:
+            try:
+                import torch
+                torch_threads = torch.get_num_threads()
+            except ImportError:
+                pass
+        with self._lock:
+            models = {name: dict(info) for name, info in self._info.items()}
+            services = dict(self._services)
+        for name, service in services.items():
+            models.setdefault(name, {})["inference"] = service.get_stats()
+        return {
+            "threads": self.threads or None,
+            "torch_threads": torch_threads,
+            "rss_mb": round(_rss_bytes() / 1024 / 1024, 1),
+            "models": models,
+        }
@@ -0,0 +1,652 @@
+"""
+SSIRN 영구 작업 큐 (MySQL jobs / job_logs)
+
+동영상 변환, 리사이즈, YOLO 분석은 uvicorn 프로세스 안에서 BackgroundTasks/데몬 스레드로 돌아
+요청 처리와 GIL을 다퉜고, 재시작하면 TaskManager 상태가 모두 사라졌다. 웹 프로세스는 jobs 테이블에
+작업을 넣고 상태만 보여 주며, 실제 실행은 별도 워커 프로세스(worker.py)가 한다.
+
+- 우선순위: priority가 큰 작업부터, 같으면 먼저 들어온 순
+- 유형별 동시 실행 한도: 모든 워커를 합쳐 적용 (claim은 GET_LOCK으로 직렬화)
+- 리스(lease): 실행 중인 작업은 lease_until까지 워커 소유, 워커가 주기적으로 연장한다.
+  워커가 죽어 리스가 끝나면 다음 claim 때 대기열로 되돌린다 (attempts가 남아 있으면)
+- 재시도: 실패하면 RETRY_BASE_SEC × 2^(attempts-1) 뒤에 다시 실행, max_attempts까지
+- dedupe_key: 같은 키의 작업이 대기/실행 중이면 새로 넣지 않고 기존 작업을 돌려준다
+- 진행률/로그: 워커의 TaskManager가 발행하는 이벤트를 JobReporter가 모아 1초마다 기록하고,
+  웹 프로세스의 JobMirror가 변경분을 읽어 자기 TaskManager에 반영한다 (-> /api/events)
+- 워커 등록: 워커는 workers 테이블에 자신을 기록하고 하트비트마다 last_seen을 갱신한다.
+  같은 DB와 FTP를 보는 LAN의 다른 머신도 worker.py만 띄우면 바로 참여하고, 그냥 꺼져도
+  리스가 끝나면 다른 워커가 이어받는다 (별도 조정 없음)
+
+사용법:
+    queue = JobQueue(get_db_connection)
+    job = queue.enqueue("analyze_images", {"camera": "feed", "date": "20260204"}, "feed/20260204 이미지 분석")
+
+    worker = JobWorker(queue, handlers, task_manager, limits={"analyze_images": 1})
+    worker.run()   # stop()까지 블록
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CLAIM_LOCK = "ssirn_job_claim"
+CLAIM_LOCK_TIMEOUT = 10  # 초
+RETRY_BASE_SEC = 30
+REPORT_INTERVAL = 1.0  # 진행률/로그 기록 간격 (초)
+FINISHED = ("completed", "failed", "cancelled")
+PROGRESS_COLUMNS = ("progress", "total", "current_item")
+JOB_COLUMNS = """id, task_id, job_type, description, payload, priority, status, attempts, max_attempts,
+                 run_after, lease_owner, lease_until, progress, total, current_item, state, error,
+                 created_at, started_at, finished_at, updated_at"""
+
+
+def default_worker_id() -> str:
+    """호스트명:PID (리스 소유자 표시)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """"analyze_images=1,convert=2" -> {"analyze_images": 1, "convert": 2}"""
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def split_ranges(names: List[str], size: int) -> List[Tuple[str, str]]:
+    """정렬된 파일명 -> size개씩 (첫 파일, 마지막 파일) 구간
+
+    작업 단위를 인덱스가 아닌 파일명 구간으로 나누므로 나중에 파일이 추가되어도 구간이 밀리지 않는다.
+    """
+    names = sorted(names)
+    size = max(1, size)
+    return [(names[i], names[min(i + size, len(names)) - 1]) for i in range(0, len(names), size)]
+
+
+def _decode(job: Optional[dict]) -> Optional[dict]:
+    """payload/state JSON 풀기"""
+    if job is None:
+        return None
+    job["payload"] = json.loads(job["payload"]) if job.get("payload") else {}
+    job["state"] = json.loads(job["state"]) if job.get("state") else {}
+    return job
+
+
+class JobQueue:
+    """jobs 테이블 작업 큐 (connect: 연결을 돌려주는 함수, close()로 반납)"""
+    def __init__(self, connect: Callable):
+        self.connect = connect
+
+    @contextmanager
+    def _cursor(self, dictionary: bool = False):
+        db = self.connect()
+        cursor = db.cursor(dictionary=dictionary)
+        try:
+            yield db, cursor
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+            db.close()
+
+    # ---------- 넣기 / 취소 ----------
+    def enqueue(self, job_type: str, payload: dict, description: str = "", priority: int = 0,
+                max_attempts: int = 3, dedupe_key: Optional[str] = None) -> dict:
+        """작업 추가 -> {id, task_id, duplicate}
+
+        dedupe_key가 같은 대기/실행 중 작업이 있으면 그 작업을 duplicate=True로 반환한다.
+        """
+        task_id = uuid.uuid4().hex[:8]
+        with self._cursor(dictionary=True) as (db, cursor):
+            cursor.execute("""
+                INSERT IGNORE INTO jobs
+                (task_id, job_type, description, payload, priority, max_attempts, dedupe_key)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (task_id, job_type, description[:255], json.dumps(payload, ensure_ascii=False),
+                  priority, max_attempts, dedupe_key))
+            if cursor.rowcount == 1:
+                return {"id": cursor.lastrowid, "task_id": task_id, "duplicate": False}
+            cursor.execute("SELECT id, task_id FROM jobs WHERE dedupe_key = %s", (dedupe_key,))
+            row = cursor.fetchone()
+        if row is None:
+            raise RuntimeError("작업 추가 실패")
+        return {"id": row["id"], "task_id": row["task_id"], "duplicate": True}
+
+    def cancel(self, job_id: int) -> bool:
+        """대기 중인 작업 취소 (실행 중인 작업은 취소하지 않음)"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                UPDATE jobs SET status = 'cancelled', dedupe_key = NULL, finished_at = NOW()
+                WHERE id = %s AND status = 'queued'
+            """, (job_id,))
+            return cursor.rowcount == 1
+
+    # ---------- 워커 ----------
+    def requeue_expired(self, cursor) -> int:
+        """리스가 끝난 실행 중 작업 -> 대기열 (시도 횟수를 다 쓴 작업은 failed)"""
+        cursor.execute("""
+            UPDATE jobs SET status = 'failed', dedupe_key = NULL, finished_at = NOW(),
+                   error = CONCAT('lease expired (', COALESCE(lease_owner, '?'), ')'), lease_owner = NULL
+            WHERE status = 'running' AND lease_until < NOW() AND attempts >= max_attempts
+        """)
+        failed = cursor.rowcount
+        cursor.execute("""
+            UPDATE jobs SET status = 'queued', run_after = NOW(),
+                   error = CONCAT('lease expired (', COALESCE(lease_owner, '?'), ')'), lease_owner = NULL
+            WHERE status = 'running' AND lease_until < NOW()
+        """)
+        return failed + cursor.rowcount
+
+    def claim(self, worker_id: str, types: Optional[Iterable[str]] = None,
+              limits: Optional[Dict[str, int]] = None, lease_sec: int = 120) -> Optional[dict]:
+        """실행할 작업 하나를 가져와 리스 설정 (없으면 None)
+
+        유형별 한도는 모든 워커의 running 수를 세어 적용하므로 claim 전체를 이름 잠금으로 감싼다.
+        """
+        limits = limits or {}
+        with self._cursor(dictionary=True) as (db, cursor):
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (CLAIM_LOCK, CLAIM_LOCK_TIMEOUT))
+            if cursor.fetchone()["locked"] != 1:
+                return None
+            try:
+                if self.requeue_expired(cursor):
+                    db.commit()
+                cursor.execute("SELECT job_type, COUNT(*) AS n FROM jobs WHERE status = 'running' GROUP BY job_type")
+                running = {row["job_type"]: row["n"] for row in cursor.fetchall()}
+
+                conditions, params = ["status = 'queued'", "run_after <= NOW()"], []
+                if types is not None:
+                    allowed = [t for t in types if t not in limits or running.get(t, 0) < limits[t]]
+                    if not allowed:
+                        return None
+                    conditions.append(f"job_type IN ({', '.join(['%s'] * len(allowed))})")
+                    params += allowed
+                else:
+                    blocked = [t for t, limit in limits.items() if running.get(t, 0) >= limit]
+                    if blocked:
+                        conditions.append(f"job_type NOT IN ({', '.join(['%s'] * len(blocked))})")
+                        params += blocked
+                cursor.execute(f"""
+                    SELECT {JOB_COLUMNS} FROM jobs
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY priority DESC, id
+                    LIMIT 1
+                """, params)
+                job = cursor.fetchone()
+                if job is None:
+                    return None
+                cursor.execute("""
+                    UPDATE jobs SET status = 'running', lease_owner = %s,
+                           lease_until = NOW() + INTERVAL %s SECOND, attempts = attempts + 1,
+                           started_at = COALESCE(started_at, NOW()), error = NULL
+                    WHERE id = %s
+                """, (worker_id, lease_sec, job["id"]))
+                db.commit()
+                job.update(status="running", lease_owner=worker_id, attempts=job["attempts"] + 1)
+                return _decode(job)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (CLAIM_LOCK,))
+                cursor.fetchall()
+
+    def heartbeat(self, worker_id: str, job_ids: List[int], lease_sec: int = 120) -> List[int]:
+        """리스 연장 -> 아직 이 워커 소유인 작업 id (빠진 id는 리스를 잃은 것)"""
+        if not job_ids:
+            return []
+        marks = ", ".join(["%s"] * len(job_ids))
+        with self._cursor() as (db, cursor):
+            cursor.execute(f"""
+                UPDATE jobs SET lease_until = NOW() + INTERVAL %s SECOND
+                WHERE id IN ({marks}) AND status = 'running' AND lease_owner = %s
+            """, (lease_sec, *job_ids, worker_id))
+            cursor.execute(f"""
+                SELECT id FROM jobs WHERE id IN ({marks}) AND status = 'running' AND lease_owner = %s
+            """, (*job_ids, worker_id))
+            return [row[0] for row in cursor.fetchall()]
+
+    def report(self, job_id: int, fields: dict, logs: List[tuple]):
+        """진행률 컬럼 + 기타 상태(state JSON 병합) + 로그 [(task_id, "HH:MM:SS", message)]"""
+        with self._cursor() as (db, cursor):
+            columns = {k: fields[k] for k in PROGRESS_COLUMNS if k in fields}
+            state = {k: v for k, v in fields.items() if k not in PROGRESS_COLUMNS}
+            sets, params = [f"{k} = %s" for k in columns], list(columns.values())
+            if state:
+                sets.append("state = %s")
+                cursor.execute("SELECT state FROM jobs WHERE id = %s", (job_id,))
+                row = cursor.fetchone()
+                merged = json.loads(row[0]) if row and row[0] else {}
+                merged.update(state)
+                params.append(json.dumps(merged, ensure_ascii=False, default=str))
+            if sets:
+                cursor.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id = %s", (*params, job_id))
+            if logs:
+                cursor.executemany("""
+                    INSERT INTO job_logs (job_id, task_id, logged_at, message) VALUES (%s, %s, %s, %s)
+                """, [(job_id, task_id, at, message[:1000]) for task_id, at, message in logs])
+
+    def complete(self, job_id: int, worker_id: str):
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                UPDATE jobs SET status = 'completed', dedupe_key = NULL, finished_at = NOW(),
+                       lease_owner = NULL, lease_until = NULL
+                WHERE id = %s AND lease_owner = %s
+            """, (job_id, worker_id))
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True):
+        """실패 기록 (retry이고 시도가 남았으면 지수 백오프 후 다시 대기열)"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                UPDATE jobs SET
+                    status = IF(%s AND attempts < max_attempts, 'queued', 'failed'),
+                    run_after = NOW() + INTERVAL %s * POW(2, GREATEST(attempts - 1, 0)) SECOND,
+                    finished_at = IF(%s AND attempts < max_attempts, NULL, NOW()),
+                    dedupe_key = IF(%s AND attempts < max_attempts, dedupe_key, NULL),
+                    error = %s, lease_owner = NULL, lease_until = NULL
+                WHERE id = %s AND lease_owner = %s
+            """, (retry, RETRY_BASE_SEC, retry, retry, error[:2000], job_id, worker_id))
+
+    # ---------- 워커 등록 ----------
+    def register_worker(self, worker_id: str, types: Iterable[str], slots: int):
+        """워커 시작 기록 (같은 id로 다시 시작하면 덮어씀)"""
+        hostname, _, pid = worker_id.rpartition(":")
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                INSERT INTO workers (worker_id, hostname, pid, types, slots, status, active, stats)
+                VALUES (%s, %s, %s, %s, %s, 'running', 0, NULL)
+                ON DUPLICATE KEY UPDATE types = VALUES(types), slots = VALUES(slots), status = 'running',
+                    active = 0, stats = NULL, started_at = NOW(), last_seen = NOW()
+            """, (worker_id, (hostname or worker_id)[:64], int(pid) if pid.isdigit() else 0,
+                  ",".join(types)[:255], slots))
+
+    def touch_worker(self, worker_id: str, active: int, stats: dict, status: str = "running"):
+        """워커 하트비트 (last_seen, 실행 중 작업 수, 통계)"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                UPDATE workers SET status = %s, active = %s, stats = %s, last_seen = NOW()
+                WHERE worker_id = %s
+            """, (status, active, json.dumps(stats, ensure_ascii=False), worker_id))
+
+    def list_workers(self, stale_sec: int = 300, window_sec: int = 3600) -> List[dict]:
+        """최근 window_sec초 안에 보였거나 리스를 가진 워커 (alive: last_seen이 stale_sec 이내)"""
+        with self._cursor(dictionary=True) as (db, cursor):
+            cursor.execute("""
+                SELECT w.worker_id, w.hostname, w.pid, w.types, w.slots, w.status, w.active, w.stats,
+                       w.started_at, w.last_seen, w.last_seen >= NOW() - INTERVAL %s SECOND AS alive,
+                       (SELECT COUNT(*) FROM jobs j WHERE j.status = 'running'
+                        AND j.lease_owner = w.worker_id) AS leased
+                FROM workers w
+                WHERE w.last_seen >= NOW() - INTERVAL %s SECOND
+                   OR EXISTS (SELECT 1 FROM jobs j WHERE j.status = 'running' AND j.lease_owner = w.worker_id)
+                ORDER BY w.hostname, w.worker_id
+            """, (stale_sec, window_sec))
+            workers = cursor.fetchall()
+        for worker in workers:
+            worker["stats"] = json.loads(worker["stats"]) if worker.get("stats") else {}
+            worker["alive"] = bool(worker["alive"])
+        return workers
+
+    # ---------- 조회 ----------
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._cursor(dictionary=True) as (db, cursor):
+            cursor.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = %s", (job_id,))
+            return _decode(cursor.fetchone())
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """최근 작업 (status 지정 시 해당 상태만)"""
+        with self._cursor(dictionary=True) as (db, cursor):
+            where, params = ("WHERE status = %s", [status]) if status else ("", [])
+            cursor.execute(f"SELECT {JOB_COLUMNS} FROM jobs {where} ORDER BY id DESC LIMIT %s",
+                           (*params, limit))
+            return [_decode(row) for row in cursor.fetchall()]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """유형 -> 상태 -> 수 (종료 상태는 최근 하루)"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                SELECT job_type, status, COUNT(*) FROM jobs
+                WHERE status IN ('queued', 'running') OR finished_at >= NOW() - INTERVAL 1 DAY
+                GROUP BY job_type, status
+            """)
+            counts: Dict[str, Dict[str, int]] = {}
+            for job_type, status, n in cursor.fetchall():
+                counts.setdefault(job_type, {})[status] = n
+            return counts
+
+    def changes(self, since: Optional[datetime], after_log_id: int, limit: int = 500) -> tuple:
+        """since 이후 갱신된 작업, after_log_id 이후 로그 -> (jobs, logs)"""
+        with self._cursor(dictionary=True) as (db, cursor):
+            if since is None:
+                # 처음: 대기/실행 중 + 최근 1시간 안에 끝난 작업
+                cursor.execute(f"""
+                    SELECT {JOB_COLUMNS} FROM jobs
+                    WHERE status IN ('queued', 'running') OR updated_at >= NOW() - INTERVAL 1 HOUR
+                    ORDER BY updated_at LIMIT %s
+                """, (limit,))
+            else:
+                cursor.execute(f"""
+                    SELECT {JOB_COLUMNS} FROM jobs WHERE updated_at >= %s ORDER BY updated_at LIMIT %s
+                """, (since, limit))
+            jobs = [_decode(row) for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT id, task_id, logged_at, message FROM job_logs WHERE id > %s ORDER BY id LIMIT %s
+            """, (after_log_id, limit))
+            return jobs, cursor.fetchall()
+
+    def db_now(self) -> datetime:
+        """DB 서버 시각 (updated_at 비교 기준)"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("SELECT NOW(3)")
+            return cursor.fetchone()[0]
+
+    def last_log_id(self) -> int:
+        with self._cursor() as (db, cursor):
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM job_logs")
+            return int(cursor.fetchone()[0])
+
+    def purge(self, days: int = 30) -> int:
+        """끝난 지 days일 지난 작업과 로그 삭제"""
+        with self._cursor() as (db, cursor):
+            cursor.execute("""
+                DELETE l FROM job_logs l JOIN jobs j ON j.id = l.job_id
+                WHERE j.status IN ('completed', 'failed', 'cancelled')
+                  AND j.finished_at < NOW() - INTERVAL %s DAY
+            """, (days,))
+            cursor.execute("""
+                DELETE FROM jobs WHERE status IN ('completed', 'failed', 'cancelled')
+                  AND finished_at < NOW() - INTERVAL %s DAY
+            """, (days,))
+            purged = cursor.rowcount
+            cursor.execute("DELETE FROM workers WHERE last_seen < NOW() - INTERVAL %s DAY", (days,))
+            return purged
+
+
+class JobReporter:
+    """워커 프로세스의 TaskManager 버스 대신 연결해 진행률/로그를 jobs에 기록
+
+    TaskManager(bus=reporter)로 만들면 작업 함수가 부르는 update_task/add_log가 그대로 여기로 온다.
+    이미지마다 오는 진행률은 REPORT_INTERVAL마다 마지막 값만 기록한다.
+    """
+    def __init__(self, queue: JobQueue):
+        self.queue = queue
+        self._jobs: Dict[str, int] = {}  # task_id -> job_id
+        self._fields: Dict[str, dict] = {}
+        self._logs: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, task_id: str, job_id: int):
+        with self._lock:
+            self._jobs[task_id] = job_id
+
+    def detach(self, task_id: str):
+        self.flush(task_id)
+        with self._lock:
+            self._jobs.pop(task_id, None)
+
+    def publish(self, event: str, data: dict) -> int:
+        """TaskManager 이벤트 수신 (상태/종료 시각은 워커가 따로 기록)"""
+        task_id = data.get("id")
+        with self._lock:
+            if task_id not in self._jobs:
+                return 0
+            if event == "task_update":
+                fields = {k: v for k, v in data.items() if k not in ("id", "status", "finished_at")}
+                if fields:
+                    self._fields.setdefault(task_id, {}).update(fields)
+            elif event == "task_log":
+                self._logs.setdefault(task_id, []).append((task_id, data["time"], data["message"]))
+        return 0
+
+    def flush(self, task_id: Optional[str] = None):
+        """모아 둔 진행률/로그 기록 (task_id 없으면 전체)"""
+        with self._lock:
+            ids = [task_id] if task_id else list(self._jobs)
+            pending = [(self._jobs[t], self._fields.pop(t, {}), self._logs.pop(t, []))
+                       for t in ids if t in self._jobs]
+        for job_id, fields, logs in pending:
+            if fields or logs:
+                try:
+                    self.queue.report(job_id, fields, logs)
+                except Exception as e:
+                    print(f"Job report error ({job_id}): {e}")
+
+
+class JobWorker:
+    """작업 큐 워커 (slot 스레드 concurrency개 + 하트비트 스레드 1개)
+
+    - handlers: job_type -> handler(payload, task_id)
+    - task_manager: 작업 함수가 쓰는 TaskManager (bus가 JobReporter여야 진행률이 기록됨)
+    - labels: job_type -> TaskManager 작업 유형 이름
+    - types: 이 워커가 실행할 유형 (None이면 handlers 전체)
+    - limits: 유형별 전체 동시 실행 한도
+    """
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[dict, str], None]], task_manager,
+                 reporter: Optional[JobReporter] = None, labels: Optional[Dict[str, str]] = None,
+                 worker_id: Optional[str] = None, concurrency: int = 1,
+                 types: Optional[Iterable[str]] = None, limits: Optional[Dict[str, int]] = None,
+                 lease_sec: int = 120, poll_sec: float = 2.0, log: Callable[[str], None] = print):
+        self.queue = queue
+        self.handlers = handlers
+        self.task_manager = task_manager
+        self.reporter = reporter
+        self.labels = labels or {}
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.types = list(types) if types else list(handlers)
+        self.limits = limits or {}
+        self.lease_sec = lease_sec
+        self.poll_sec = poll_sec
+        self.log = log
+
+        self._active: Dict[int, str] = {}  # job_id -> task_id
+        self._lost: set = set()  # 리스를 잃은 job_id (결과를 기록하지 않음)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"claimed": 0, "completed": 0, "failed": 0, "lost": 0}
+
+    def run(self):
+        """stop()까지 작업 실행 (실행 중인 작업은 끝까지 마친 뒤 반환)"""
+        self.log(f"[worker {self.worker_id}] 시작 (slots={self.concurrency}, types={','.join(self.types)})")
+        try:
+            self.queue.register_worker(self.worker_id, self.types, self.concurrency)
+        except Exception as e:
+            self.log(f"[worker] 등록 오류: {e}")
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        slots = [threading.Thread(target=self._slot_loop, daemon=True) for _ in range(self.concurrency)]
+        for slot in slots:
+            slot.start()
+        for slot in slots:
+            slot.join()
+        self._stop.set()
+        heartbeat.join(timeout=5)
+        self._touch("stopped")
+        self.log(f"[worker {self.worker_id}] 종료 {self._stats}")
+
+    def stop(self):
+        """새 작업을 더 가져오지 않음"""
+        self._stop.set()
+
+    def _touch(self, status: str):
+        stats = self.get_stats()
+        try:
+            self.queue.touch_worker(self.worker_id, stats["active"], stats, status)
+        except Exception as e:
+            self.log(f"[worker] 상태 기록 오류: {e}")
+
+    def _slot_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.worker_id, self.types, self.limits, self.lease_sec)
+            except Exception as e:
+                self.log(f"[worker] claim 오류: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_sec)
+                continue
+            self._execute(job)
+
+    def _execute(self, job: dict):
+        job_id, task_id = job["id"], job["task_id"]
+        with self._lock:
+            self._active[job_id] = task_id
+            self._stats["claimed"] += 1
+        if self.reporter:
+            self.reporter.attach(task_id, job_id)
+        self.task_manager.create_task(self.labels.get(job["job_type"], job["job_type"]), job["description"],
+                                      task_id=task_id)
+        if job["attempts"] > 1:
+            self.task_manager.add_log(task_id, f"재시도 {job['attempts']}/{job['max_attempts']}")
+        self.log(f"[worker] #{job_id} {job['job_type']} 시작 ({job['description']})")
+
+        error = None
+        try:
+            handler = self.handlers[job["job_type"]]
+            handler(job["payload"], task_id)
+            task = self.task_manager.get_task(task_id) or {}
+            if task.get("status") == "failed":
+                # 작업 함수가 예외를 잡고 failed로 끝낸 경우 (마지막 로그를 오류로)
+                logs = task.get("logs") or [{}]
+                error = logs[-1].get("message") or "failed"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self.task_manager.add_log(task_id, f"오류: {e}")
+
+        if self.reporter:
+            self.reporter.detach(task_id)
+        # 작업 함수가 종료 시각을 남기지 않아도 cleanup_old_tasks가 치우도록 (상태/시각은 jobs에 따로 기록)
+        self.task_manager.finish_task(task_id, "failed" if error else "completed")
+        with self._lock:
+            self._active.pop(job_id, None)
+            lost = job_id in self._lost
+            self._lost.discard(job_id)
+        try:
+            if lost:
+                self._stats["lost"] += 1
+                self.log(f"[worker] #{job_id} 리스 만료로 결과 기록 안 함")
+            elif error:
+                self.queue.fail(job_id, self.worker_id, error)
+                self._stats["failed"] += 1
+                self.log(f"[worker] #{job_id} 실패: {error}")
+            else:
+                self.queue.complete(job_id, self.worker_id)
+                self._stats["completed"] += 1
+                self.log(f"[worker] #{job_id} 완료")
+        except Exception as e:
+            self.log(f"[worker] #{job_id} 결과 기록 오류: {e}")
+        self.task_manager.cleanup_old_tasks()
+
+    def _heartbeat_loop(self):
+        """REPORT_INTERVAL마다 진행률 기록, lease_sec/3마다 리스 연장 + 워커 last_seen 갱신"""
+        last_beat = time.monotonic()
+        while not self._stop.is_set() or self._active:
+            time.sleep(REPORT_INTERVAL)
+            if self.reporter:
+                self.reporter.flush()
+            if time.monotonic() - last_beat < self.lease_sec / 3:
+                continue
+            last_beat = time.monotonic()
+            with self._lock:
+                job_ids = list(self._active)
+            try:
+                owned = set(self.queue.heartbeat(self.worker_id, job_ids, self.lease_sec))
+            except Exception as e:
+                self.log(f"[worker] 하트비트 오류: {e}")
+                continue
+            with self._lock:
+                self._lost.update(job_id for job_id in job_ids if job_id not in owned and job_id in self._active)
+            self._touch("stopping" if self._stop.is_set() else "running")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"worker_id": self.worker_id, "active": len(self._active), **self._stats}
+
+
+class JobMirror:
+    """웹 프로세스: jobs 변경분을 TaskManager에 반영 (기존 /api/tasks, /api/events가 그대로 동작)"""
+    STATUS = {"queued": "queued", "running": "running", "completed": "completed",
+              "failed": "failed", "cancelled": "cancelled"}
+
+    def __init__(self, queue: JobQueue, task_manager, labels: Optional[Dict[str, str]] = None,
+                 interval: float = 1.0, on_change: Optional[Callable[[dict], None]] = None):
+        self.queue = queue
+        self.task_manager = task_manager
+        self.labels = labels or {}
+        self.interval = interval
+        # 진행률/상태가 바뀐 작업마다 호출 (워커가 쓴 결과에 맞춰 웹 프로세스 캐시 무효화 등)
+        self.on_change = on_change
+        self._since: Optional[datetime] = None
+        self._log_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Job mirror error: {e}")
+            self._stop.wait(self.interval)
+
+    def sync(self):
+        """변경분 한 번 반영"""
+        since = self._since
+        if self._log_id is None:
+            # 처음에는 지난 로그를 모두 다시 보내지 않고 현재 위치부터
+            self._log_id = self.queue.last_log_id()
+            self._since = self.queue.db_now()
+        jobs, logs = self.queue.changes(since, self._log_id)
+        for job in jobs:
+            self._apply(job)
+            # 같은 시각에 갱신된 작업을 놓치지 않도록 >= 로 다시 읽고, 값이 같으면 _apply가 무시한다
+            self._since = max(self._since, job["updated_at"])
+        for log in logs:
+            self.task_manager.add_log(log["task_id"], log["message"], at=log["logged_at"])
+            self._log_id = log["id"]
+
+    def _apply(self, job: dict):
+        tm = self.task_manager
+        task_id = job["task_id"]
+        status = self.STATUS.get(job["status"], job["status"])
+        task = tm.get_task(task_id)
+        if task is None:
+            tm.create_task(self.labels.get(job["job_type"], job["job_type"]), job["description"],
+                           task_id=task_id, status=status,
+                           started_at=job["created_at"].isoformat() if job.get("created_at") else None)
+            task = tm.get_task(task_id)
+
+        fields = {"progress": job["progress"], "total": job["total"], "current_item": job["current_item"],
+                  "job_id": job["id"], "attempts": job["attempts"], **(job["state"] or {})}
+        if job.get("error"):
+            fields["error"] = job["error"]
+        changed = {k: v for k, v in fields.items() if task.get(k) != v}
+        if changed:
+            tm.update_task(task_id, **changed)
+        status_changed = status != task.get("status")
+        if status_changed:
+            if status in FINISHED:
+                tm.finish_task(task_id, status)
+            else:
+                tm.update_task(task_id, status=status)
+        if self.on_change and (changed or status_changed):
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"Job mirror callback error: {e}")
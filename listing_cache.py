@@ -0,0 +1,74 @@
+"""
+SSIRN FTP 디렉토리 목록 캐시 (경로별 TTL)
+
+지난 날짜 폴더는 거의 바뀌지 않고 오늘 폴더만 계속 이미지가 추가되므로,
+경로마다 TTL을 다르게 두고 변환/삭제/리사이즈 작업이 트리를 바꾸면 명시적으로 무효화한다.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class ListingCache:
+    """경로 -> 목록 TTL 캐시 (스레드 안전)"""
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}  # 경로 -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _norm(path: str) -> str:
+        return path.rstrip("/") or "/"
+
+    def get(self, path: str) -> Optional[Any]:
+        """캐시된 목록 (없거나 만료면 None)"""
+        path = self._norm(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[path]
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, path: str, value: Any, ttl: float):
+        """목록 저장"""
+        path = self._norm(path)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired()
+                if len(self._entries) >= self.max_entries:
+                    # 가장 먼저 만료될 항목 제거
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    del self._entries[oldest]
+            self._entries[path] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, path: str):
+        """해당 경로와 하위 경로, 상위 경로의 캐시 삭제
+
+        상위 폴더 목록도 하위 항목 생성/삭제에 따라 바뀔 수 있으므로 함께 지운다.
+        """
+        path = self._norm(path)
+        with self._lock:
+            for key in list(self._entries):
+                if key == path or key.startswith(path + "/") or path.startswith(key + "/"):
+                    del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def _purge_expired(self):
+        """만료 항목 정리 (lock 안에서 호출)"""
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._entries.items() if exp < now]:
+            del self._entries[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), **self._stats}
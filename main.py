@@ -1,11 +1,12 @@
-from fastapi import FastAPI, Request, HTTPException, Depends, Response, BackgroundTasks
+from fastapi import FastAPI, Request, HTTPException, Depends, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import sys
 import jwt
-from ftplib import FTP
+import ftplib
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from typing import Optional, Dict, List
@@ -14,57 +15,97 @@ import subprocess
 import re
 import tempfile
 import shutil
-import mysql.connector
 import threading
 import uuid
+import asyncio
+import aioftp
+
+from ftp_pool import get_ftp_pool, get_all_pool_stats, close_all_pools
+from db_pool import get_db_pool, get_all_db_pool_stats, close_all_db_pools
+from async_db import AsyncDB
+from dashboard_stats import stats_queries, build_stats, date_filter
+from response_cache import ResponseCache, normalize_date
+from detections_query import page_query, split_page, export_query, format_ndjson, format_csv
+from rollups import rebuild_rollups
+from retention import run_maintenance
+from watermarks import get_watermark, watermark_args, advance_watermark
+from migrations import apply_migrations, verify_plans, migration_status
+from async_ftp import AsyncFTPPool
+from frame_cache import FrameCache
+from listing_cache import ListingCache
+from catalog import ArchiveCatalog
+from analysis_pipeline import AnalysisPipeline, get_active_pipeline_stats
+from inference import BatchInferenceService, ModelRegistry
+from detection_writer import DetectionWriter
+from event_bus import EventBus, format_sse
+from system_monitor import SystemSampler, port_pids, service_unit
+from job_queue import JobQueue, JobMirror, parse_limits, split_ranges
 
 # 환경변수 로드
 load_dotenv()
 
 # ==================== 백그라운드 작업 관리 ====================
+# 관리자 화면 푸시 채널 (/api/events): 작업/스케줄러/탐지 저장 변경분만 발행
+event_bus = EventBus(history=int(os.getenv("EVENT_HISTORY", 500)))
+
+
 class TaskManager:
-    def __init__(self):
+    """백그라운드 작업 상태 (변경 시 event_bus로 task / task_update / task_log 발행)"""
+    def __init__(self, bus: Optional[EventBus] = None):
         self.tasks: Dict[str, dict] = {}
         self.lock = threading.Lock()
+        self.bus = bus
+
+    def _publish(self, event: str, data: dict):
+        if self.bus:
+            self.bus.publish(event, data)
 
-    def create_task(self, task_type: str, description: str) -> str:
-        task_id = str(uuid.uuid4())[:8]
+    def create_task(self, task_type: str, description: str, task_id: str = None,
+                    status: str = "running", started_at: str = None) -> str:
+        """작업 등록 (task_id를 주면 그 id로 - 작업 큐의 job과 같은 id를 쓸 때)"""
+        task_id = task_id or str(uuid.uuid4())[:8]
         with self.lock:
             self.tasks[task_id] = {
                 "id": task_id,
                 "type": task_type,
                 "description": description,
-                "status": "running",
+                "status": status,
                 "progress": 0,
                 "total": 0,
                 "current_item": "",
-                "started_at": datetime.now().isoformat(),
+                "started_at": started_at or datetime.now().isoformat(),
                 "finished_at": None,
                 "logs": []
             }
+            self._publish("task", {**self.tasks[task_id], "logs": []})
         return task_id
 
     def update_task(self, task_id: str, **kwargs):
         with self.lock:
             if task_id in self.tasks:
                 self.tasks[task_id].update(kwargs)
+                self._publish("task_update", {"id": task_id, **kwargs})
 
-    def add_log(self, task_id: str, message: str):
+    def add_log(self, task_id: str, message: str, at: str = None):
         with self.lock:
             if task_id in self.tasks:
-                self.tasks[task_id]["logs"].append({
-                    "time": datetime.now().strftime("%H:%M:%S"),
+                entry = {
+                    "time": at or datetime.now().strftime("%H:%M:%S"),
                     "message": message
-                })
+                }
+                self.tasks[task_id]["logs"].append(entry)
                 # 최대 100개 로그만 유지
                 if len(self.tasks[task_id]["logs"]) > 100:
                     self.tasks[task_id]["logs"] = self.tasks[task_id]["logs"][-100:]
+                self._publish("task_log", {"id": task_id, **entry})
 
     def finish_task(self, task_id: str, status: str = "completed"):
         with self.lock:
             if task_id in self.tasks:
                 self.tasks[task_id]["status"] = status
                 self.tasks[task_id]["finished_at"] = datetime.now().isoformat()
+                self._publish("task_update", {"id": task_id, "status": status,
+                                              "finished_at": self.tasks[task_id]["finished_at"]})
 
     def get_task(self, task_id: str) -> Optional[dict]:
         with self.lock:
@@ -93,8 +134,10 @@ class TaskManager:
                         to_delete.append(task_id)
             for task_id in to_delete:
                 del self.tasks[task_id]
+            if to_delete:
+                self._publish("task_removed", {"ids": to_delete})
 
-task_manager = TaskManager()
+task_manager = TaskManager(event_bus)
 
 # 카메라별 경로 (AutoScheduler에서 사용)
 CAMERA_PATHS = {
@@ -109,8 +152,9 @@ CAMERA_PATHS = {
 class AutoScheduler:
     """이미지 분석 + 영상 변환 자동화 스케줄러
 
-    - 분석: 설정된 주기(1~24시간)로 오늘/어제 이미지 분석
-    - 영상 변환: 매일 자정에 이전 날짜들만 변환 (당일 제외)
+    - 분석: 설정된 주기(1~24시간)로 모든 카메라의 오늘/어제 새 이미지를 작업 큐에 넣음 (워커가 실행)
+    - 영상 변환: 매일 자정에 이전 날짜들의 변환 작업을 큐에 넣음 (당일 제외)
+    - DB 유지보수: 영상 변환 뒤 detections 파티션 생성 + 보존 기간 지난 원본 삭제
     """
     def __init__(self):
         self.running = False
@@ -119,6 +163,7 @@ class AutoScheduler:
         self.last_run = None
         self.next_run = None
         self.last_conversion = None  # 마지막 영상 변환 날짜
+        self.last_maintenance = None  # 마지막 DB 유지보수 결과
         self.lock = threading.Lock()
         self.status_log = []
 
@@ -145,13 +190,18 @@ class AutoScheduler:
 
     def _log(self, msg: str):
         """로그 추가"""
-        self.status_log.append({
+        entry = {
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "message": msg
-        })
+        }
+        self.status_log.append(entry)
         # 최대 50개 유지
         if len(self.status_log) > 50:
             self.status_log = self.status_log[-50:]
+        # 시작/중지/실행 후 상태 변화는 모두 로그와 함께 일어나므로 상태 요약도 같이 보낸다
+        status = self.get_status()
+        status.pop("logs")
+        event_bus.publish("auto", {"log": entry, **status})
 
     def _run_loop(self):
         """스케줄러 루프"""
@@ -159,14 +209,8 @@ class AutoScheduler:
         while self.running:
             now = datetime.now()
 
-            # 자정 체크 (00:00 ~ 00:10 사이에 영상 변환 실행)
-            if now.hour == 0 and now.minute < 10:
-                today_date = now.strftime("%Y-%m-%d")
-                if self.last_conversion != today_date:
-                    self._log("=== 자정 영상 변환 시작 ===")
-                    self._run_midnight_conversion()
-                    self.last_conversion = today_date
-                    self._log("=== 자정 영상 변환 완료 ===")
+            # 자정 체크 (00:00 ~ 00:10 사이에 영상 변환 + DB 유지보수 실행)
+            self._run_midnight_jobs(now)
 
             # 정기 분석 실행
             try:
@@ -182,48 +226,68 @@ class AutoScheduler:
                 if not self.running:
                     break
                 # 자정 체크 (대기 중에도)
-                now = datetime.now()
-                if now.hour == 0 and now.minute < 10:
-                    today_date = now.strftime("%Y-%m-%d")
-                    if self.last_conversion != today_date:
-                        self._log("=== 자정 영상 변환 시작 ===")
-                        self._run_midnight_conversion()
-                        self.last_conversion = today_date
-                        self._log("=== 자정 영상 변환 완료 ===")
+                self._run_midnight_jobs(datetime.now())
                 time.sleep(10)
 
+    def _run_midnight_jobs(self, now: datetime):
+        """자정 작업 (하루 한 번): 영상 변환 후 DB 유지보수"""
+        if not (now.hour == 0 and now.minute < 10):
+            return
+        today_date = now.strftime("%Y-%m-%d")
+        if self.last_conversion == today_date:
+            return
+        self._log("=== 자정 영상 변환 시작 ===")
+        self._run_midnight_conversion()
+        self.last_conversion = today_date
+        self._log("=== 자정 영상 변환 완료 ===")
+        self._run_maintenance()
+
+    def _run_maintenance(self):
+        """DB 유지보수: 다음 달 파티션 생성 + 보존 기간 지난 detections 삭제 (롤업 확인 후)"""
+        try:
+            db = get_db_connection()
+            try:
+                result = run_maintenance(db, DETECTION_RETENTION_DAYS, log=self._log)
+            finally:
+                db.close()
+            if result.get("rolled_up") or result.get("dropped") or result.get("deleted_rows"):
+                response_cache.clear()
+            result["purged_jobs"] = job_queue.purge(JOB_RETENTION_DAYS)
+            self.last_maintenance = {"time": datetime.now().isoformat(), **result}
+            self._log(f"[유지보수] 완료 (파티션 삭제 {len(result.get('dropped', []))}개, "
+                      f"행 삭제 {result.get('deleted_rows', 0)}개)")
+        except Exception as e:
+            self._log(f"[유지보수] 오류: {str(e)}")
+
     def _run_analysis(self):
-        """이미지 분석 실행: 오늘과 어제 날짜만"""
+        """이미지 분석 예약: 모든 카메라의 오늘과 어제 날짜 (새 이미지가 있는 것만)"""
         today = datetime.now()
         yesterday = today - timedelta(days=1)
         dates = [yesterday.strftime("%Y%m%d"), today.strftime("%Y%m%d")]
 
-        for date in dates:
-            self._log(f"[분석] {date} 시작")
-            try:
-                self._analyze_images("feed", date)
-                self._log(f"[분석] {date} 완료")
-            except Exception as e:
-                self._log(f"[분석] {date} 오류: {str(e)}")
+        for camera in CAMERA_PATHS:
+            for date in dates:
+                try:
+                    self._queue_analysis(camera, date)
+                except Exception as e:
+                    self._log(f"[분석] {camera}/{date} 오류: {str(e)}")
 
     def _run_midnight_conversion(self):
         """자정 영상 변환: 오늘 이전의 모든 날짜 변환"""
         today = datetime.now()
-        cam_info = CAMERA_PATHS.get("feed", CAMERA_PATHS["feed"])
-        cam_path = cam_info["path"]
 
         try:
-            ftp = get_ftp_connection()
-            ftp.cwd(cam_path)
-            folders = [f for f in ftp.nlst() if f.isdigit() and len(f) == 8]
-            ftp.quit()
+            # 카탈로그 증분 동기화 (바뀐 폴더만 다시 스캔)
+            archive_catalog.sync("feed")
         except Exception as e:
             self._log(f"[변환] 폴더 목록 조회 실패: {str(e)}")
             return
 
         today_str = today.strftime("%Y%m%d")
-        # 오늘 이전 날짜만 필터링
-        dates_to_convert = sorted([f for f in folders if f < today_str])
+        # 오늘 이전 날짜 중 동영상이 없는 날짜만 필터링
+        yesterday_str = (today - timedelta(days=1)).strftime("%Y%m%d")
+        dates_to_convert = [d["date"] for d in archive_catalog.dates("feed", to_date=yesterday_str)
+                            if d["has_folder"] and not d["has_video"]]
 
         if not dates_to_convert:
             self._log("[변환] 변환할 날짜 없음")
@@ -233,169 +297,48 @@ class AutoScheduler:
 
         for date in dates_to_convert:
             try:
-                self._convert_to_video("feed", date)
+                self._queue_conversion("feed", date)
             except Exception as e:
                 self._log(f"[변환] {date} 오류: {str(e)}")
 
-    def _analyze_images(self, camera: str, date: str):
-        """이미지 분석 (간소화 버전)"""
-        import cv2
-        import numpy as np
-        import re
-
-        date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
-        cam_info = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])
-        cam_path = cam_info["path"]
-
+    def _queue_analysis(self, camera: str, date: str):
+        """워터마크 이후 새 이미지가 있으면 분석 작업 추가 (같은 날짜 작업이 대기/실행 중이면 그대로 둠)"""
         try:
-            ftp = get_ftp_connection()
-            ftp.cwd(f"{cam_path}/{date}/images")
-            files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-            ftp.quit()
+            archive_catalog.sync_date(camera, date)
         except:
-            self._log(f"[{date}] 이미지 없음")
-            return
-
-        if not files:
+            self._log(f"[{camera}/{date}] 이미지 없음")
             return
 
-        self._log(f"[{date}] {len(files)}개 이미지 분석")
-        log_job_history("analysis", date_formatted, "started", len(files), 0, "분석 시작")
-
-        # YOLO 모델 로드
-        from ultralytics import YOLO
-        model = YOLO(str(BASE_DIR / 'yolov8n.pt'))
-
-        # DB 연결
         db = get_db_connection()
-
-        # 이미 분석된 이미지 확인
-        cursor = db.cursor()
-        cursor.execute("SELECT image_name FROM detections WHERE image_date = %s", (date_formatted,))
-        analyzed_files = set(row[0] for row in cursor.fetchall())
-        cursor.close()
-
-        # 분석되지 않은 이미지만 처리
-        files_to_analyze = [f for f in files if f not in analyzed_files]
-        if not files_to_analyze:
-            self._log(f"[{date}] 이미 분석됨")
-            log_job_history("analysis", date_formatted, "completed", 0, 0, "이미 분석됨")
+        try:
+            candidates = pending_image_files(db, camera, date)
+        finally:
             db.close()
+        if not candidates:
+            self._log(f"[{camera}/{date}] 새 이미지 없음")
             return
 
-        self._log(f"[{date}] {len(files_to_analyze)}개 새 이미지 분석")
-        detection_count = 0
-
-        for filename in files_to_analyze:
-            # 파일명에서 시간 추출
-            time_str = "00:00:00"
-            hours = 0
-            match = re.match(r'[A-Z](\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', filename)
-            if match:
-                _, _, _, h, m, s = match.groups()
-                hours = int(h)
-                time_str = f"{h}:{m}:{s}"
-
-            try:
-                ftp = get_ftp_connection()
-                ftp.cwd(f"{cam_path}/{date}/images")
-                img_data = io.BytesIO()
-                ftp.retrbinary(f"RETR {filename}", img_data.write)
-                ftp.quit()
-                img_data.seek(0)
-
-                img_array = np.frombuffer(img_data.read(), np.uint8)
-                frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                if frame is None:
-                    continue
-
-                # 리사이즈 (메모리 절약)
-                h, w = frame.shape[:2]
-                if max(h, w) > 640:
-                    scale = 640 / max(h, w)
-                    frame = cv2.resize(frame, (int(w*scale), int(h*scale)))
-
-                # YOLO 탐지
-                results = model(frame, verbose=False, conf=0.15)
-
-                for r in results:
-                    for box in r.boxes:
-                        cls_id = int(box.cls[0])
-                        cls_name = model.names[cls_id]
-                        conf = float(box.conf[0])
-
-                        if cls_name in ['cat', 'dog', 'person', 'car']:
-                            detection_count += 1
-                            cursor = db.cursor()
-                            cursor.execute("""
-                                INSERT INTO detections (image_name, image_date, image_time, object_class, confidence, is_cat)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """, (filename, date_formatted, time_str, cls_name, conf, cls_name=='cat'))
-
-                            # daily_stats 업데이트
-                            hour_col = f"hour_{hours}"
-                            is_cat = 1 if cls_name == 'cat' else 0
-                            is_other = 0 if cls_name == 'cat' else 1
-                            cursor.execute(f"""
-                                INSERT INTO daily_stats (stat_date, total_detections, cat_count, other_count, {hour_col})
-                                VALUES (%s, 1, %s, %s, 1)
-                                ON DUPLICATE KEY UPDATE
-                                    total_detections = total_detections + 1,
-                                    cat_count = cat_count + %s,
-                                    other_count = other_count + %s,
-                                    {hour_col} = {hour_col} + 1
-                            """, (date_formatted, is_cat, is_other, is_cat, is_other))
-
-                            db.commit()
-                            cursor.close()
-            except:
-                continue
-
-        db.close()
-        log_job_history("analysis", date_formatted, "completed", len(files_to_analyze), detection_count,
-                        f"{len(files_to_analyze)}개 이미지, {detection_count}개 탐지")
-
-    def _convert_to_video(self, camera: str, date: str):
-        """이미지를 영상으로 변환"""
-        date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
-        cam_info = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])
-        cam_path = cam_info["path"]
-        video_path = cam_info["video"]
-
-        try:
-            # 영상이 이미 존재하는지 확인
-            ftp = get_ftp_connection()
-            ftp.cwd(video_path)
-            existing = ftp.nlst()
-            ftp.quit()
-
-            if f"{date}.mp4" in existing:
-                self._log(f"[{date}] 영상 이미 존재")
-                return
-        except:
-            pass
-
-        # 이미지 목록 확인
-        try:
-            ftp = get_ftp_connection()
-            ftp.cwd(f"{cam_path}/{date}/images")
-            files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-            ftp.quit()
-        except:
+        job = enqueue_job("auto_analyze", {"camera": camera, "date": date},
+                          f"{camera}/{date} 자동 분석 ({len(candidates)}개)")
+        state = "이미 대기/실행 중" if job["duplicate"] else "작업 추가"
+        self._log(f"[{camera}/{date}] {len(candidates)}개 새 이미지 - {state} (#{job['id']})")
+
+    def _queue_conversion(self, camera: str, date: str):
+        """이미지를 영상으로 변환하는 작업 추가 (실행과 작업 히스토리 기록은 워커)"""
+        # 영상 존재 여부와 이미지 수는 카탈로그에서 확인
+        info = next(iter(archive_catalog.dates(camera, date, date)), None)
+        if info and info["has_video"]:
+            self._log(f"[{date}] 영상 이미 존재")
             return
 
-        if len(files) < 10:
+        image_count = info["image_count"] if info else 0
+        if image_count < 10:
             return
 
-        self._log(f"[{date}] 영상 변환 시작")
-        log_job_history("conversion", date_formatted, "started", len(files), 0, "영상 변환 시작")
-        try:
-            convert_images_to_video(date, camera, resize_720p=True)
-            self._log(f"[{date}] 영상 변환 완료")
-            log_job_history("conversion", date_formatted, "completed", len(files), 0, "영상 변환 완료")
-        except Exception as e:
-            self._log(f"[{date}] 영상 변환 실패: {str(e)}")
-            log_job_history("conversion", date_formatted, "failed", len(files), 0, str(e))
+        job = enqueue_job("convert", {"camera": camera, "date": date, "delete_originals": True},
+                          f"{camera}/{date} 동영상 변환 ({image_count}개)")
+        state = "이미 대기/실행 중" if job["duplicate"] else "작업 추가"
+        self._log(f"[{date}] 영상 변환 - {state} (#{job['id']})")
 
     def get_status(self):
         """상태 조회"""
@@ -406,6 +349,8 @@ class AutoScheduler:
             "next_run": self.next_run.isoformat() if self.next_run else None,
             "last_conversion": self.last_conversion,
             "conversion_schedule": "매일 00:00 (이전 날짜만)",
+            "retention_days": DETECTION_RETENTION_DAYS,
+            "last_maintenance": self.last_maintenance,
             "logs": self.status_log[-20:]
         }
 
@@ -435,43 +380,42 @@ DB_PORT = int(os.getenv("DB_PORT", 3306))
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME", "ssirn")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+DB_POOL_LIFETIME = int(os.getenv("DB_POOL_LIFETIME", 1800))  # 연결 최대 수명 (초)
+DETECTION_RETENTION_DAYS = int(os.getenv("DETECTION_RETENTION_DAYS", 365))  # detections 원본 보존 일수 (0이면 무기한)
 
 
-def init_job_history_table():
-    """작업 히스토리 테이블 초기화"""
-    try:
-        db = mysql.connector.connect(
-            host=DB_HOST, port=DB_PORT, user=DB_USER,
-            password=DB_PASSWORD, database=DB_NAME
-        )
-        cursor = db.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS job_history (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                job_type ENUM('analysis', 'conversion') NOT NULL,
-                target_date VARCHAR(10) NOT NULL,
-                status ENUM('started', 'completed', 'failed') NOT NULL,
-                images_processed INT DEFAULT 0,
-                detections_found INT DEFAULT 0,
-                message TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        db.commit()
-        cursor.close()
-        db.close()
-    except Exception as e:
-        print(f"job_history 테이블 초기화 실패: {e}")
+# 요청 처리용 비동기 DB 풀 (대시보드 조회가 이벤트 루프를 막지 않도록)
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 5))
+async_db = AsyncDB(DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+                   maxsize=ASYNC_DB_POOL_SIZE, pool_recycle=DB_POOL_LIFETIME)
+
+# 대시보드/공개 통계 응답 캐시 (DetectionWriter 커밋 시 해당 날짜 무효화)
+response_cache = ResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", 500)))
+
+
+def detections_committed(camera: str):
+    """DetectionWriter on_commit: 응답 캐시 무효화 + 관리자 화면에 detections 이벤트"""
+    def on_commit(dates):
+        response_cache.invalidate_dates(dates)
+        event_bus.publish("detections", {"camera": camera, "dates": sorted(dates)})
+    return on_commit
+
+
+def get_db_connection():
+    """DB 연결 (풀에서 체크아웃, close()하면 풀에 반납)"""
+    pool = get_db_pool({
+        "host": DB_HOST, "port": DB_PORT, "user": DB_USER,
+        "password": DB_PASSWORD, "database": DB_NAME
+    }, max_size=DB_POOL_SIZE, max_lifetime=DB_POOL_LIFETIME)
+    return pool.acquire()
 
 
 def log_job_history(job_type: str, target_date: str, status: str,
                     images_processed: int = 0, detections_found: int = 0, message: str = ""):
     """작업 히스토리 DB 기록"""
     try:
-        db = mysql.connector.connect(
-            host=DB_HOST, port=DB_PORT, user=DB_USER,
-            password=DB_PASSWORD, database=DB_NAME
-        )
+        db = get_db_connection()
         cursor = db.cursor()
         cursor.execute("""
             INSERT INTO job_history (job_type, target_date, status, images_processed, detections_found, message)
@@ -480,12 +424,30 @@ def log_job_history(job_type: str, target_date: str, status: str,
         db.commit()
         cursor.close()
         db.close()
+        response_cache.invalidate_endpoint("job-history")
     except Exception as e:
         print(f"job_history 기록 실패: {e}")
 
 
-# 앱 시작시 테이블 초기화
-init_job_history_table()
+def init_database():
+    """미적용 스키마 마이그레이션 실행 + 대시보드 쿼리 실행 계획 확인"""
+    try:
+        db = get_db_connection()
+        try:
+            applied = apply_migrations(db)
+            if applied:
+                print(f"스키마 마이그레이션 적용: {applied}")
+            for plan in verify_plans(db):
+                if not plan["ok"]:
+                    print(f"인덱스 미사용 쿼리: {plan['name']} - {plan.get('error') or plan['full_scan']}")
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"스키마 마이그레이션 실패: {e}")
+
+
+# 앱 시작시 스키마 마이그레이션
+init_database()
 
 # 정적 파일 마운트
 app.mount("/css", StaticFiles(directory=BASE_DIR / "css"), name="css")
@@ -641,12 +603,79 @@ CAMERAS = {
 FTP_BASE_PATH = "/homes/ha/camFTP/feed"  # 기본값 (하위호환)
 
 
-def get_ftp_connection():
-    """FTP 연결 생성"""
-    ftp = FTP()
-    ftp.connect(FTP_HOST, FTP_PORT)
-    ftp.login(FTP_USER, FTP_PASSWORD)
-    return ftp
+FTP_POOL_SIZE = int(os.getenv("FTP_POOL_SIZE", 6))
+FTP_POOL_IDLE = int(os.getenv("FTP_POOL_IDLE", 120))
+
+
+def ftp_session():
+    """FTP 풀에서 세션 체크아웃 (with 문으로 사용, 끝나면 자동 반납)"""
+    pool = get_ftp_pool(FTP_HOST, FTP_PORT, FTP_USER, FTP_PASSWORD,
+                        max_size=FTP_POOL_SIZE, idle_timeout=FTP_POOL_IDLE)
+    return pool.connection()
+
+
+# 요청 처리용 비동기 FTP 풀 (이벤트 루프를 막지 않음)
+async_ftp_pool = AsyncFTPPool(FTP_HOST, FTP_PORT, FTP_USER, FTP_PASSWORD,
+                              max_size=FTP_POOL_SIZE, idle_timeout=FTP_POOL_IDLE)
+
+
+# 디렉토리 목록 캐시 TTL (초): 오늘 폴더는 짧게, 지난 날짜는 길게
+LISTING_TTL_TODAY = int(os.getenv("LISTING_TTL_TODAY", 15))
+LISTING_TTL_PAST = int(os.getenv("LISTING_TTL_PAST", 3600))
+LISTING_TTL_ROOT = int(os.getenv("LISTING_TTL_ROOT", 60))  # 카메라 루트 (날짜 폴더 목록)
+LISTING_TTL_VIDEOS = int(os.getenv("LISTING_TTL_VIDEOS", 600))  # videos 폴더 (변환/리사이즈 시 무효화)
+listing_cache = ListingCache()
+
+
+def listing_ttl(date: str) -> int:
+    """날짜 폴더 목록 캐시 TTL"""
+    return LISTING_TTL_TODAY if date >= datetime.now().strftime("%Y%m%d") else LISTING_TTL_PAST
+
+
+async def list_dir_cached(path: str, ttl: int) -> list:
+    """캐시를 거친 디렉토리 목록 (이름, 정보)"""
+    entries = listing_cache.get(path)
+    if entries is None:
+        entries = await async_ftp_pool.list_dir(path)
+        listing_cache.set(path, entries, ttl)
+    return entries
+
+
+async def list_names_cached(path: str, ttl: int) -> List[str]:
+    """캐시를 거친 디렉토리 내 이름 목록"""
+    return [name for name, _ in await list_dir_cached(path, ttl)]
+
+
+# 아카이브 카탈로그 (camera -> date -> file, 로컬 SQLite)
+CATALOG_DB = Path(os.getenv("CATALOG_DB", BASE_DIR / "catalog.db"))
+CATALOG_SYNC_INTERVAL = int(os.getenv("CATALOG_SYNC_INTERVAL", 300))
+archive_catalog = ArchiveCatalog(CATALOG_DB, ftp_session, CAMERA_PATHS)
+
+
+@app.on_event("startup")
+def start_catalog_sync():
+    """카탈로그 증분 동기화 스레드 시작"""
+    archive_catalog.start_background_sync(CATALOG_SYNC_INTERVAL)
+
+
+@app.get("/api/feed/catalog")
+async def get_catalog_status():
+    """카탈로그 상태 (카메라별 날짜/이미지/동영상 수, 마지막 동기화)"""
+    return {"success": True, "cameras": await asyncio.to_thread(archive_catalog.get_stats)}
+
+
+@app.on_event("shutdown")
+async def close_ftp_pools():
+    """앱 종료 시 FTP 풀의 idle 연결 정리"""
+    close_all_pools()
+    await async_ftp_pool.close_all()
+
+
+@app.on_event("shutdown")
+async def close_db_pools():
+    """앱 종료 시 DB 풀의 idle 연결 정리"""
+    close_all_db_pools()
+    await async_db.close()
 
 
 @app.get("/api/cameras")
@@ -658,15 +687,19 @@ async def get_cameras():
     }
 
 
+# 프레임 디스크 캐시 (이미지 프록시용)
+FRAME_CACHE_DIR = Path(os.getenv("FRAME_CACHE_DIR", "/tmp/ssirn_frame_cache"))
+FRAME_CACHE_MB = int(os.getenv("FRAME_CACHE_MB", 512))
+frame_cache = FrameCache(FRAME_CACHE_DIR, FRAME_CACHE_MB * 1024 * 1024)
+
+
 @app.get("/api/feed/dates")
 async def get_feed_dates(camera: str = "feed"):
     """사용 가능한 날짜 폴더 목록"""
     try:
         cam_path = CAMERAS.get(camera, CAMERAS["feed"])["path"]
-        ftp = get_ftp_connection()
-        ftp.cwd(cam_path)
-        folders = sorted([f for f in ftp.nlst() if f.isdigit() and len(f) == 8], reverse=True)
-        ftp.quit()
+        names = await list_names_cached(cam_path, LISTING_TTL_ROOT)
+        folders = sorted([f for f in names if f.isdigit() and len(f) == 8], reverse=True)
         return {"success": True, "dates": folders, "camera": camera}
     except Exception as e:
         return {"success": False, "error": str(e), "dates": []}
@@ -677,22 +710,17 @@ async def get_feed_list(date: str = None, camera: str = "feed"):
     """FTP feed 폴더의 이미지 목록 가져오기"""
     try:
         cam_path = CAMERAS.get(camera, CAMERAS["feed"])["path"]
-        ftp = get_ftp_connection()
-        ftp.cwd(cam_path)
 
         # 날짜가 없으면 가장 최근 폴더 사용
         if not date:
-            folders = sorted([f for f in ftp.nlst() if f.isdigit() and len(f) == 8], reverse=True)
+            names = await list_names_cached(cam_path, LISTING_TTL_ROOT)
+            folders = sorted([f for f in names if f.isdigit() and len(f) == 8], reverse=True)
             if not folders:
-                ftp.quit()
                 return {"success": False, "error": "No date folders found", "files": [], "count": 0}
             date = folders[0]
 
-        # images 폴더로 이동
-        ftp.cwd(f"{cam_path}/{date}/images")
-
         # 이미지 파일 목록
-        all_files = ftp.nlst()
+        all_files = await list_names_cached(f"{cam_path}/{date}/images", listing_ttl(date))
         files = []
         for name in all_files:
             if name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
@@ -705,7 +733,6 @@ async def get_feed_list(date: str = None, camera: str = "feed"):
 
         # 파일명 기준 정렬 (시간순)
         files.sort(key=lambda x: x["name"])
-        ftp.quit()
 
         return {"success": True, "files": files, "count": len(files), "date": date, "camera": camera}
     except Exception as e:
@@ -714,17 +741,14 @@ async def get_feed_list(date: str = None, camera: str = "feed"):
 
 @app.get("/api/feed/image/{camera}/{date}/{filename}")
 async def get_feed_image_with_camera(camera: str, date: str, filename: str):
-    """FTP에서 이미지 프록시 (카메라 지정)"""
-    try:
-        cam_path = CAMERAS.get(camera, CAMERAS["feed"])["path"]
-        ftp = get_ftp_connection()
+    """FTP에서 이미지 프록시 (카메라 지정)
 
-        # 이미지 다운로드
-        data = io.BytesIO()
-        ftp.retrbinary(f"RETR {cam_path}/{date}/images/{filename}", data.write)
-        ftp.quit()
-
-        data.seek(0)
+    한 번 받아온 프레임은 디스크 캐시에 저장하고, 이후 요청은 파일로 바로 응답한다.
+    """
+    try:
+        if camera not in CAMERAS:
+            camera = "feed"
+        cam_path = CAMERAS[camera]["path"]
 
         # Content-Type 결정
         ext = filename.lower().split('.')[-1]
@@ -736,11 +760,21 @@ async def get_feed_image_with_camera(camera: str, date: str, filename: str):
             'webp': 'image/webp'
         }
         content_type = content_types.get(ext, 'image/jpeg')
+        headers = {"Cache-Control": "public, max-age=3600"}
 
-        return StreamingResponse(
-            data,
+        # 캐시 히트: sendfile로 바로 응답
+        cached = frame_cache.get(camera, date, filename)
+        if cached:
+            return FileResponse(cached, media_type=content_type, headers=headers)
+
+        # 이미지 다운로드 후 캐시에 저장 (디스크 쓰기는 스레드에서)
+        data = await async_ftp_pool.download(f"{cam_path}/{date}/images/{filename}")
+        await asyncio.to_thread(frame_cache.put, camera, date, filename, data)
+
+        return Response(
+            content=data,
             media_type=content_type,
-            headers={"Cache-Control": "public, max-age=3600"}
+            headers=headers
         )
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Image not found: {str(e)}")
@@ -752,6 +786,12 @@ async def get_feed_image(date: str, filename: str):
     return await get_feed_image_with_camera("feed", date, filename)
 
 
+@app.get("/api/feed/cache/stats")
+async def get_frame_cache_stats():
+    """프레임 캐시 상태 (히트/미스, 사용 용량)"""
+    return {"success": True, **frame_cache.get_stats(), "listings": listing_cache.get_stats()}
+
+
 # ==================== 동영상 API ====================
 TEMP_DIR = Path("/tmp/ssirn_timelapse")
 
@@ -766,12 +806,11 @@ def ensure_video_folder(camera: str = "feed"):
     """FTP에 videos 폴더가 있는지 확인하고 없으면 생성"""
     try:
         video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
-        try:
-            ftp.cwd(video_path)
-        except:
-            ftp.mkd(video_path)
-        ftp.quit()
+        with ftp_session() as ftp:
+            try:
+                ftp.cwd(video_path)
+            except:
+                ftp.mkd(video_path)
     except:
         pass
 
@@ -781,133 +820,188 @@ async def get_video_list(camera: str = "feed"):
     """변환된 동영상 목록 (파일 크기 포함)"""
     try:
         video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
         try:
-            ftp.cwd(video_path)
             # 파일 목록과 크기 가져오기
-            video_info = []
-            files = []
-            ftp.retrlines('LIST', files.append)
-
-            for line in files:
-                parts = line.split()
-                if len(parts) >= 9:
-                    size = int(parts[4])  # 파일 크기 (bytes)
-                    name = parts[8]  # 파일명
-                    if name.endswith('.mp4'):
-                        date = name.replace('.mp4', '')
-                        # 720p 동영상은 보통 5MB 이하 (분당 약 1MB)
-                        # 원본 1080p 이상은 보통 10MB 이상
-                        is_720p = size < 8 * 1024 * 1024  # 8MB 기준
-                        video_info.append({
-                            "date": date,
-                            "size": size,
-                            "size_mb": round(size / (1024 * 1024), 2),
-                            "is_720p": is_720p
-                        })
-
-            ftp.quit()
-            video_info.sort(key=lambda x: x["date"], reverse=True)
-
-            # 모든 동영상이 720p인지 체크
-            all_720p = all(v["is_720p"] for v in video_info) if video_info else True
-
-            return {
-                "success": True,
-                "videos": [v["date"] for v in video_info],  # 기존 호환
-                "video_info": video_info,  # 상세 정보
-                "all_720p": all_720p,
-                "camera": camera
-            }
-        except:
-            ftp.quit()
+            entries = await list_dir_cached(video_path, LISTING_TTL_VIDEOS)
+        except aioftp.StatusCodeError:
             return {"success": True, "videos": [], "video_info": [], "all_720p": True, "camera": camera}
+
+        video_info = []
+        for name, info in entries:
+            if name.endswith('.mp4'):
+                size = int(info.get("size", 0))  # 파일 크기 (bytes)
+                date = name.replace('.mp4', '')
+                # 720p 동영상은 보통 5MB 이하 (분당 약 1MB)
+                # 원본 1080p 이상은 보통 10MB 이상
+                is_720p = size < 8 * 1024 * 1024  # 8MB 기준
+                video_info.append({
+                    "date": date,
+                    "size": size,
+                    "size_mb": round(size / (1024 * 1024), 2),
+                    "is_720p": is_720p
+                })
+
+        video_info.sort(key=lambda x: x["date"], reverse=True)
+
+        # 모든 동영상이 720p인지 체크
+        all_720p = all(v["is_720p"] for v in video_info) if video_info else True
+
+        return {
+            "success": True,
+            "videos": [v["date"] for v in video_info],  # 기존 호환
+            "video_info": video_info,  # 상세 정보
+            "all_720p": all_720p,
+            "camera": camera
+        }
     except Exception as e:
         return {"success": False, "error": str(e), "videos": [], "video_info": [], "all_720p": True}
 
 
+# image-dates 스캔 시 동시에 사용할 FTP 연결 수 (다른 요청용 여유 남김)
+IMAGE_SCAN_CONCURRENCY = max(1, FTP_POOL_SIZE // 2)
+
+
 @app.get("/api/feed/image-dates")
 async def get_image_dates(camera: str = "feed"):
-    """이미지가 있는 날짜 목록 조회"""
+    """이미지가 있는 날짜 목록 조회 (날짜별 이미지 수 포함)
+
+    카메라 루트를 MLSD로 한 번 읽고, 각 날짜의 images 폴더는 풀 연결로 병렬 스캔한다.
+    """
     try:
-        cam_info = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])
-        cam_path = cam_info["path"]
+        if camera not in CAMERA_PATHS:
+            camera = "feed"
+        cam_path = CAMERA_PATHS[camera]["path"]
+
+        # 카탈로그가 준비되어 있으면 인덱스 조회로 처리
+        if await asyncio.to_thread(archive_catalog.is_synced, camera):
+            counts = await asyncio.to_thread(archive_catalog.image_counts, camera)
+            return {"success": True, "dates": sorted(counts, reverse=True), "counts": counts, "camera": camera}
 
-        ftp = get_ftp_connection()
         try:
-            ftp.cwd(cam_path)
             # 날짜 폴더 목록 가져오기
-            dirs = []
-            ftp.retrlines('LIST', dirs.append)
-
-            dates = []
-            for line in dirs:
-                parts = line.split()
-                if len(parts) >= 9:
-                    name = parts[8]
-                    # 날짜 형식 폴더만 (8자리 숫자)
-                    if len(name) == 8 and name.isdigit():
-                        # images 폴더가 있는지 확인
-                        try:
-                            ftp.cwd(f"{cam_path}/{name}/images")
-                            files = ftp.nlst()
-                            image_count = len([f for f in files if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-                            if image_count > 0:
-                                dates.append(name)
-                            ftp.cwd(cam_path)  # 원래 위치로
-                        except:
-                            ftp.cwd(cam_path)  # 원래 위치로
-                            continue
-
-            ftp.quit()
-            dates.sort(reverse=True)
+            entries = await list_dir_cached(cam_path, LISTING_TTL_ROOT)
+        except aioftp.StatusCodeError:
+            return {"success": True, "dates": [], "counts": {}, "camera": camera}
 
-            return {
-                "success": True,
-                "dates": dates,
-                "camera": camera
-            }
-        except Exception as e:
-            ftp.quit()
-            return {"success": True, "dates": [], "camera": camera}
+        # 날짜 형식 폴더만 (8자리 숫자)
+        date_dirs = [name for name, info in entries
+                     if len(name) == 8 and name.isdigit() and info.get("type", "dir") == "dir"]
+
+        semaphore = asyncio.Semaphore(IMAGE_SCAN_CONCURRENCY)
+
+        async def count_images(date: str) -> int:
+            async with semaphore:
+                try:
+                    files = await list_dir_cached(f"{cam_path}/{date}/images", listing_ttl(date))
+                except aioftp.StatusCodeError:
+                    return 0  # images 폴더 없음
+            return len([name for name, info in files
+                        if info.get("type", "file") == "file"
+                        and name.lower().endswith(('.jpg', '.jpeg', '.png'))])
+
+        image_counts = await asyncio.gather(*(count_images(d) for d in date_dirs))
+        counts = {d: c for d, c in zip(date_dirs, image_counts) if c > 0}
+        dates = sorted(counts, reverse=True)
+
+        return {
+            "success": True,
+            "dates": dates,
+            "counts": counts,
+            "camera": camera
+        }
     except Exception as e:
-        return {"success": False, "error": str(e), "dates": []}
+        return {"success": False, "error": str(e), "dates": [], "counts": {}}
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[tuple]:
+    """Range 헤더 파싱 -> (start, end) 포함 범위
+
+    단일 범위만 지원 (다중 범위는 None을 반환해 전체 응답).
+    만족할 수 없는 범위는 ValueError.
+    """
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', range_header or "")
+    if not match:
+        return None
+    start_s, end_s = match.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        # bytes=-N : 마지막 N바이트
+        suffix = int(end_s)
+        if suffix == 0:
+            raise ValueError("empty suffix range")
+        start = max(0, file_size - suffix)
+        end = file_size - 1
+    else:
+        start = int(start_s)
+        end = int(end_s) if end_s else file_size - 1
+        end = min(end, file_size - 1)
+    if start >= file_size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
 
 
 @app.get("/api/feed/video/{camera}/{date}")
-async def get_video_with_camera(camera: str, date: str):
-    """FTP에서 동영상 스트리밍 (카메라 지정)"""
+async def get_video_with_camera(camera: str, date: str, request: Request):
+    """FTP에서 동영상 스트리밍 (카메라 지정)
+
+    Range 요청은 FTP REST 오프셋으로 변환해 해당 구간만 206으로 스트리밍한다.
+    파일 전체를 메모리에 올리지 않는다.
+    """
+    video_path = get_video_path(camera)
+    remote_path = f"{video_path}/{date}.mp4"
     try:
-        video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
-        data = io.BytesIO()
-        ftp.retrbinary(f"RETR {video_path}/{date}.mp4", data.write)
-        ftp.quit()
+        # 목록 캐시에 크기가 있으면 SIZE/MLST 왕복 생략
+        sizes = {name: info.get("size") for name, info in await list_dir_cached(video_path, LISTING_TTL_VIDEOS)}
+        if sizes.get(f"{date}.mp4") is not None:
+            file_size = int(sizes[f"{date}.mp4"])
+        else:
+            file_size = await async_ftp_pool.size(remote_path)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Video not found: {str(e)}")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400"
+    }
 
-        data.seek(0)
-        file_size = len(data.getvalue())
+    try:
+        byte_range = parse_range_header(request.headers.get("range"), file_size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{file_size}"})
 
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
         return StreamingResponse(
-            data,
+            async_ftp_pool.iter_range(remote_path),
             media_type="video/mp4",
-            headers={
-                "Content-Length": str(file_size),
-                "Accept-Ranges": "bytes",
-                "Cache-Control": "public, max-age=86400"
-            }
+            headers=headers
         )
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Video not found: {str(e)}")
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    return StreamingResponse(
+        # 파일 끝까지 요청한 경우 length=None으로 전송을 정상 종료시켜 세션을 재사용
+        async_ftp_pool.iter_range(remote_path, offset=start, length=None if end == file_size - 1 else length),
+        status_code=206,
+        media_type="video/mp4",
+        headers=headers
+    )
 
 
 @app.get("/api/feed/video/{date}")
-async def get_video(date: str):
+async def get_video(date: str, request: Request):
     """FTP에서 동영상 스트리밍 (하위호환 - feed 카메라)"""
-    return await get_video_with_camera("feed", date)
+    return await get_video_with_camera("feed", date, request)
 
 
 def convert_images_to_video(date: str, camera: str = "feed", delete_originals: bool = True):
-    """이미지를 동영상으로 변환 (백그라운드 작업) - 720p로 리사이즈"""
+    """이미지를 동영상으로 변환 (백그라운드 작업) - 720p로 리사이즈
+
+    실패하면 임시 파일을 정리한 뒤 예외를 그대로 올린다 (작업 큐가 재시도).
+    """
     work_dir = None
     try:
         cam_path = CAMERAS.get(camera, CAMERAS["feed"])["path"]
@@ -919,21 +1013,18 @@ def convert_images_to_video(date: str, camera: str = "feed", delete_originals: b
         work_dir.mkdir(exist_ok=True)
 
         # FTP에서 이미지 다운로드
-        ftp = get_ftp_connection()
-        ftp.cwd(f"{cam_path}/{date}/images")
-        files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-
-        if not files:
-            ftp.quit()
-            return
+        with ftp_session() as ftp:
+            ftp.cwd(f"{cam_path}/{date}/images")
+            files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
 
-        # 이미지 다운로드
-        for i, filename in enumerate(files):
-            local_path = work_dir / f"img_{i:05d}.jpg"
-            with open(local_path, 'wb') as f:
-                ftp.retrbinary(f"RETR {filename}", f.write)
+            if not files:
+                return
 
-        ftp.quit()
+            # 이미지 다운로드
+            for i, filename in enumerate(files):
+                local_path = work_dir / f"img_{i:05d}.jpg"
+                with open(local_path, 'wb') as f:
+                    ftp.retrbinary(f"RETR {filename}", f.write)
 
         # ffmpeg로 동영상 생성 (10fps, 720p 리사이즈)
         output_path = work_dir / f"{date}.mp4"
@@ -952,11 +1043,12 @@ def convert_images_to_video(date: str, camera: str = "feed", delete_originals: b
 
         # FTP에 업로드
         ensure_video_folder(camera)
-        ftp = get_ftp_connection()
-        ftp.cwd(video_path)
-        with open(output_path, 'rb') as f:
-            ftp.storbinary(f"STOR {date}.mp4", f)
-        ftp.quit()
+        with ftp_session() as ftp:
+            ftp.cwd(video_path)
+            with open(output_path, 'rb') as f:
+                ftp.storbinary(f"STOR {date}.mp4", f)
+        listing_cache.invalidate(video_path)
+        archive_catalog.mark_video(camera, date, output_path.stat().st_size)
 
         # 원본 이미지 삭제
         if delete_originals:
@@ -970,10 +1062,11 @@ def convert_images_to_video(date: str, camera: str = "feed", delete_originals: b
         print(f"Video conversion error for {camera}/{date}: {e}")
         if work_dir:
             shutil.rmtree(work_dir, ignore_errors=True)
+        raise
 
 
 def resize_existing_video(camera: str, date: str):
-    """기존 동영상을 720p로 리사이즈"""
+    """기존 동영상을 720p로 리사이즈 (실패하면 임시 파일 정리 후 예외)"""
     work_dir = None
     try:
         video_path = get_video_path(camera)
@@ -983,15 +1076,13 @@ def resize_existing_video(camera: str, date: str):
         work_dir.mkdir(exist_ok=True)
 
         # FTP에서 동영상 다운로드
-        ftp = get_ftp_connection()
-        ftp.cwd(video_path)
-
         input_path = work_dir / f"original_{date}.mp4"
         output_path = work_dir / f"{date}.mp4"
 
-        with open(input_path, 'wb') as f:
-            ftp.retrbinary(f"RETR {date}.mp4", f.write)
-        ftp.quit()
+        with ftp_session() as ftp:
+            ftp.cwd(video_path)
+            with open(input_path, 'wb') as f:
+                ftp.retrbinary(f"RETR {date}.mp4", f.write)
 
         # 현재 파일 크기 확인
         original_size = input_path.stat().st_size
@@ -1013,11 +1104,12 @@ def resize_existing_video(camera: str, date: str):
 
         # 새 파일이 더 작으면 업로드
         if new_size < original_size:
-            ftp = get_ftp_connection()
-            ftp.cwd(video_path)
-            with open(output_path, 'rb') as f:
-                ftp.storbinary(f"STOR {date}.mp4", f)
-            ftp.quit()
+            with ftp_session() as ftp:
+                ftp.cwd(video_path)
+                with open(output_path, 'rb') as f:
+                    ftp.storbinary(f"STOR {date}.mp4", f)
+            listing_cache.invalidate(video_path)
+            archive_catalog.mark_video(camera, date, new_size)
             print(f"Resized {camera}/{date}: {original_size//1024}KB -> {new_size//1024}KB")
         else:
             print(f"Skipped {camera}/{date}: already optimized")
@@ -1028,27 +1120,35 @@ def resize_existing_video(camera: str, date: str):
         print(f"Resize error for {camera}/{date}: {e}")
         if work_dir:
             shutil.rmtree(work_dir, ignore_errors=True)
+        raise
 
 
 def resize_all_videos_task(camera: str, task_id: str = None):
-    """카메라의 모든 동영상 리사이즈 태스크"""
+    """카메라의 모든 동영상 리사이즈 태스크 (한 개라도 실패하면 나머지를 마친 뒤 예외)"""
     try:
         video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
-        ftp.cwd(video_path)
-        files = [f.replace('.mp4', '') for f in ftp.nlst() if f.endswith('.mp4')]
-        ftp.quit()
+        with ftp_session() as ftp:
+            ftp.cwd(video_path)
+            files = [f.replace('.mp4', '') for f in ftp.nlst() if f.endswith('.mp4')]
 
         total = len(files)
         if task_id:
             task_manager.update_task(task_id, total=total)
             task_manager.add_log(task_id, f"총 {total}개 동영상 리사이즈 시작")
 
+        failed = []
         for i, date in enumerate(files):
             if task_id:
                 task_manager.update_task(task_id, progress=i+1, current_item=f"{date}.mp4")
                 task_manager.add_log(task_id, f"리사이즈 중: {date}")
-            resize_existing_video(camera, date)
+            try:
+                resize_existing_video(camera, date)
+            except Exception as e:
+                failed.append(date)
+                if task_id:
+                    task_manager.add_log(task_id, f"오류 ({date}): {e}")
+        if failed:
+            raise RuntimeError(f"{len(failed)}개 동영상 리사이즈 실패 (첫 날짜: {failed[0]})")
 
         if task_id:
             task_manager.add_log(task_id, f"완료: {total}개 동영상 리사이즈")
@@ -1059,10 +1159,11 @@ def resize_all_videos_task(camera: str, task_id: str = None):
             task_manager.add_log(task_id, f"오류: {e}")
             task_manager.finish_task(task_id, "failed")
         print(f"Error resizing videos for {camera}: {e}")
+        raise
 
 
 @app.post("/api/feed/convert/{camera}/{date}")
-async def convert_to_video_with_camera(camera: str, date: str, background_tasks: BackgroundTasks, request: Request):
+async def convert_to_video_with_camera(camera: str, date: str, request: Request):
     """이미지를 동영상으로 변환 (관리자 전용, 카메라 지정)"""
     # 인증 확인
     token = request.cookies.get("auth_token")
@@ -1072,13 +1173,15 @@ async def convert_to_video_with_camera(camera: str, date: str, background_tasks:
     if camera not in CAMERAS:
         raise HTTPException(status_code=400, detail=f"Invalid camera: {camera}")
 
-    # 백그라운드에서 변환 작업 실행 (변환 후 원본 삭제)
-    background_tasks.add_task(convert_images_to_video, date, camera, True)
-    return {"success": True, "message": f"Converting {camera}/{date} to 720p video (originals will be deleted)"}
+    # 작업 큐에 변환 작업 추가 (변환 후 원본 삭제)
+    job = await asyncio.to_thread(enqueue_job, "convert", {"camera": camera, "date": date, "delete_originals": True},
+                                  f"{camera}/{date} 동영상 변환")
+    return {"success": True, "message": f"Converting {camera}/{date} to 720p video (originals will be deleted)",
+            "task_id": job["task_id"], "job_id": job["id"]}
 
 
 @app.post("/api/feed/resize-all/{camera}")
-async def resize_all_videos(camera: str, background_tasks: BackgroundTasks, request: Request):
+async def resize_all_videos(camera: str, request: Request):
     """기존 동영상 일괄 720p 리사이즈 (관리자 전용)"""
     token = request.cookies.get("auth_token")
     if not token or not verify_token(token):
@@ -1087,17 +1190,16 @@ async def resize_all_videos(camera: str, background_tasks: BackgroundTasks, requ
     if camera not in CAMERAS:
         raise HTTPException(status_code=400, detail=f"Invalid camera: {camera}")
 
-    # 작업 생성
-    task_id = task_manager.create_task("resize", f"{camera} 동영상 일괄 리사이즈")
-
-    background_tasks.add_task(resize_all_videos_task, camera, task_id)
-    return {"success": True, "message": f"Resizing all videos for {camera} in background", "task_id": task_id}
+    # 작업 큐에 추가
+    job = await asyncio.to_thread(enqueue_job, "resize_all", {"camera": camera}, f"{camera} 동영상 일괄 리사이즈")
+    return {"success": True, "message": f"Resizing all videos for {camera} in background",
+            "task_id": job["task_id"], "job_id": job["id"]}
 
 
 @app.post("/api/feed/convert/{date}")
-async def convert_to_video(date: str, background_tasks: BackgroundTasks, request: Request):
+async def convert_to_video(date: str, request: Request):
     """이미지를 동영상으로 변환 (하위호환 - feed 카메라)"""
-    return await convert_to_video_with_camera("feed", date, background_tasks, request)
+    return await convert_to_video_with_camera("feed", date, request)
 
 
 @app.get("/api/feed/status/{camera}/{date}")
@@ -1105,10 +1207,7 @@ async def get_conversion_status_with_camera(camera: str, date: str):
     """동영상 변환 상태 확인 (카메라 지정)"""
     try:
         video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
-        ftp.cwd(video_path)
-        files = ftp.nlst()
-        ftp.quit()
+        files = await list_names_cached(video_path, LISTING_TTL_VIDEOS)
 
         exists = f"{date}.mp4" in files
         return {"success": True, "date": date, "camera": camera, "hasVideo": exists}
@@ -1123,180 +1222,162 @@ async def get_conversion_status(date: str):
 
 
 # ==================== 대시보드 API ====================
-def get_db_connection():
-    """DB 연결"""
-    return mysql.connector.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME
-    )
+DETECTIONS_PAGE_MAX = int(os.getenv("DETECTIONS_PAGE_MAX", 500))  # 탐지 기록 한 페이지 최대 행 수
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", 1000))  # 내보내기 시 서버 측 커서에서 한 번에 읽을 행 수
+
+# 응답 캐시 TTL (초): 오늘이 포함된 기간은 짧게, 지난 기간은 길게 (탐지 저장 시 해당 날짜는 즉시 무효화)
+RESPONSE_TTL_LIVE = int(os.getenv("RESPONSE_TTL_LIVE", 30))
+RESPONSE_TTL_PAST = int(os.getenv("RESPONSE_TTL_PAST", 600))
+RESPONSE_TTL_JOBS = int(os.getenv("RESPONSE_TTL_JOBS", 10))  # 작업 히스토리 (기록 시 무효화)
+
+
+def response_ttl(to_date: Optional[str]) -> int:
+    """조회 기간 응답 캐시 TTL (기간이 없거나 오늘까지면 LIVE)"""
+    to_date = normalize_date(to_date)
+    return RESPONSE_TTL_PAST if to_date and to_date < datetime.now().strftime("%Y-%m-%d") else RESPONSE_TTL_LIVE
+
+
+def is_success(result: dict) -> bool:
+    """성공 응답만 캐시"""
+    return bool(result.get("success"))
+
+
+def image_url(camera: str, source: str, date: str, image_name: str) -> Optional[str]:
+    """탐지 이미지 URL (동영상 프레임은 개별 이미지가 없으므로 None)"""
+    if source != "image":
+        return None
+    return f"/api/feed/image/{camera}/{date}/{image_name}"
 
 
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(request: Request):
-    """대시보드 통계 - detections 테이블에서 직접 조회"""
+    """대시보드 통계 - 시간대별 수는 detection_rollups, 고유 고양이 수는 detections에서 조회"""
     try:
         from_date = request.query_params.get('from_date') or request.query_params.get('from')
         to_date = request.query_params.get('to_date') or request.query_params.get('to')
-
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-
-        # 날짜 조건
-        date_condition = ""
-        params = []
-        if from_date and to_date:
-            date_condition = "WHERE image_date BETWEEN %s AND %s"
-            params = [from_date, to_date]
-        elif from_date:
-            date_condition = "WHERE image_date >= %s"
-            params = [from_date]
-
-        # detections 테이블에서 객체별 카운트
-        cursor.execute(f"""
-            SELECT
-                COUNT(*) as total,
-                SUM(CASE WHEN object_class = 'cat' THEN 1 ELSE 0 END) as cats,
-                SUM(CASE WHEN object_class = 'dog' THEN 1 ELSE 0 END) as dogs,
-                SUM(CASE WHEN object_class = 'person' THEN 1 ELSE 0 END) as persons,
-                SUM(CASE WHEN object_class = 'car' THEN 1 ELSE 0 END) as cars,
-                SUM(CASE WHEN object_class NOT IN ('cat', 'dog', 'person', 'car') THEN 1 ELSE 0 END) as others
-            FROM detections {date_condition}
-        """, params)
-        totals = cursor.fetchone()
-
-        # 시간대별 합계 (detections 테이블에서)
-        hourly = []
-        for h in range(24):
-            hour_cond = f"HOUR(image_time) = {h}"
-            if date_condition:
-                cursor.execute(f"""
-                    SELECT COUNT(*) as cnt FROM detections
-                    {date_condition} AND {hour_cond}
-                """, params)
-            else:
-                cursor.execute(f"""
-                    SELECT COUNT(*) as cnt FROM detections WHERE {hour_cond}
-                """)
-            result = cursor.fetchone()
-            hourly.append(result['cnt'] if result else 0)
-
-        # 고유 고양이 수
-        cursor.execute(f"""
-            SELECT COUNT(DISTINCT cat_id) as cnt
-            FROM detections
-            WHERE cat_id IS NOT NULL
-            {('AND image_date BETWEEN %s AND %s' if from_date and to_date else '')}
-        """, params if from_date and to_date else [])
-        unique_cats = cursor.fetchone()
-
-        cursor.close()
-        db.close()
-
-        return {
-            "success": True,
-            "total": totals['total'] if totals else 0,
-            "cats": totals['cats'] if totals else 0,
-            "dogs": totals['dogs'] if totals else 0,
-            "persons": totals['persons'] if totals else 0,
-            "cars": totals['cars'] if totals else 0,
-            "others": totals['others'] if totals else 0,
-            "uniqueCats": unique_cats['cnt'] if unique_cats else 0,
-            "hourly": hourly
-        }
+        camera = request.query_params.get('camera')
+
+        async def compute():
+            # 시간대별 객체 수 (롤업 GROUP BY) + 고유 고양이 수
+            (hourly_sql, hourly_params), (unique_sql, unique_params) = stats_queries(from_date, to_date, camera)
+            hour_rows = await async_db.fetchall(hourly_sql, hourly_params)
+            unique_cats = await async_db.fetchone(unique_sql, unique_params)
+            return {"success": True, **build_stats(hour_rows, unique_cats)}
+
+        return await response_cache.get_or_compute(
+            "stats", {"from": from_date, "to": to_date, "camera": camera},
+            response_ttl(to_date), compute, (from_date, to_date))
     except Exception as e:
         return {"success": False, "error": str(e), "total": 0, "cats": 0, "dogs": 0, "persons": 0, "cars": 0, "others": 0, "hourly": [0]*24}
 
 
 @app.get("/api/dashboard/detections")
-async def get_detections(request: Request, limit: int = 50):
-    """탐지 기록 조회"""
+async def get_detections(request: Request, limit: int = 50, cursor: str = None):
+    """탐지 기록 조회 (최신순, 키셋 페이지네이션)
+
+    응답의 next_cursor를 cursor로 넘기면 다음 페이지 (없으면 마지막 페이지).
+    """
     try:
         from_date = request.query_params.get('from_date') or request.query_params.get('from')
         to_date = request.query_params.get('to_date') or request.query_params.get('to')
+        camera = request.query_params.get('camera')
+        limit = max(1, min(limit, DETECTIONS_PAGE_MAX))
 
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-
-        params = []
-        where_clause = "WHERE 1=1"
-        if from_date and to_date:
-            where_clause += " AND image_date BETWEEN %s AND %s"
-            params.extend([from_date, to_date])
+        try:
+            sql, params = page_query(from_date, to_date, camera, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async def compute():
+            rows = await async_db.fetchall(sql, params)
+            detections, next_cursor = split_page(rows, limit)
+            for det in detections:
+                det['image_url'] = image_url(det['camera'], det['source'], det['date'], det['image'])
+            return {"success": True, "detections": detections, "next_cursor": next_cursor}
+
+        return await response_cache.get_or_compute(
+            "detections", {"from": from_date, "to": to_date, "camera": camera, "cursor": cursor, "limit": limit},
+            response_ttl(to_date), compute, (from_date, to_date))
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"success": False, "error": str(e), "detections": [], "next_cursor": None}
 
-        cursor.execute(f"""
-            SELECT
-                image_name as image,
-                REPLACE(DATE(image_date), '-', '') as date,
-                CONCAT(LPAD(HOUR(image_time),2,'0'), ':', LPAD(MINUTE(image_time),2,'0'), ':', LPAD(SECOND(image_time),2,'0')) as time,
-                object_class as class,
-                confidence,
-                is_cat,
-                cat_id
-            FROM detections
-            {where_clause}
-            ORDER BY image_date DESC, image_time DESC
-            LIMIT %s
-        """, params + [limit])
 
-        detections = cursor.fetchall()
+@app.get("/api/dashboard/detections/export")
+async def export_detections(request: Request, format: str = "ndjson", camera: str = None):
+    """탐지 기록 내보내기 (관리자 전용, NDJSON/CSV 스트리밍)
 
-        cursor.close()
-        db.close()
+    서버 측 커서에서 EXPORT_BATCH행씩 읽어 바로 내보내므로 기간이 길어도 메모리가 일정하다.
+    """
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    from_date = request.query_params.get('from_date') or request.query_params.get('from')
+    to_date = request.query_params.get('to_date') or request.query_params.get('to')
+    sql, params = export_query(from_date, to_date, camera)
+
+    async def generate():
+        first = True
+        async for rows in async_db.stream(sql, params, batch_size=EXPORT_BATCH):
+            if format == "csv":
+                yield format_csv(rows, header=first)
+            else:
+                yield format_ndjson(rows)
+            first = False
+        if first and format == "csv":
+            yield format_csv([], header=True)
 
-        return {"success": True, "detections": detections}
-    except Exception as e:
-        return {"success": False, "error": str(e), "detections": []}
+    period = f"{from_date}_{to_date}" if from_date and to_date else "all"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="detections_{camera or "all"}_{period}.{format}"',
+        "Cache-Control": "no-store",
+    })
 
 
 @app.get("/api/dashboard/heatmap")
-async def get_heatmap_data(from_date: str = None, to_date: str = None):
-    """날짜별/시간대별 탐지 데이터 (3D Surface Plot용)"""
-    try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
+async def get_heatmap_data(from_date: str = None, to_date: str = None, camera: str = None):
+    """날짜별/시간대별 탐지 데이터 (3D Surface Plot용, 응답 캐시)"""
+    return await response_cache.get_or_compute(
+        "heatmap", {"from": from_date, "to": to_date, "camera": camera}, response_ttl(to_date),
+        lambda: query_heatmap_data(from_date, to_date, camera), (from_date, to_date), cacheable=is_success)
 
-        # 날짜 조건
-        params = []
-        where_clause = "WHERE 1=1"
-        if from_date and to_date:
-            where_clause += " AND image_date BETWEEN %s AND %s"
-            params.extend([from_date, to_date])
+
+async def query_heatmap_data(from_date: str = None, to_date: str = None, camera: str = None):
+    """날짜별/시간대별 탐지 수 (detection_rollups에서 조회)"""
+    try:
+        # 날짜 조건 (기간은 둘 다 있을 때만 적용)
+        condition, params = date_filter(from_date, to_date, "stat_date") if from_date and to_date else ("1=1", [])
+        if camera:
+            condition += " AND camera = %s"
+            params.append(camera)
 
         # 날짜별/시간대별 탐지 수 집계
-        cursor.execute(f"""
+        results = await async_db.fetchall(f"""
             SELECT
-                DATE(image_date) as date,
-                HOUR(image_time) as hour,
-                COUNT(*) as count
-            FROM detections
-            {where_clause}
-            GROUP BY DATE(image_date), HOUR(image_time)
+                stat_date as date,
+                stat_hour as hour,
+                SUM(detections) as count
+            FROM detection_rollups
+            WHERE {condition}
+            GROUP BY stat_date, stat_hour
+            HAVING count > 0
             ORDER BY date, hour
         """, params)
 
-        results = cursor.fetchall()
-
-        # 날짜 목록 추출
-        cursor.execute(f"""
-            SELECT DISTINCT DATE(image_date) as date
-            FROM detections
-            {where_clause}
-            ORDER BY date
-        """, params)
-        dates = [str(row['date']) for row in cursor.fetchall()]
-
-        cursor.close()
-        db.close()
+        # 날짜 목록 추출 (집계 결과에서)
+        dates = sorted({str(row['date']) for row in results})
 
         # 2D 배열로 변환 (날짜 x 시간)
         data = {}
         for row in results:
             date = str(row['date'])
-            hour = row['hour']
-            count = row['count']
+            hour = int(row['hour'])
+            count = int(row['count'])
             if date not in data:
                 data[date] = [0] * 24
             data[date][hour] = count
@@ -1314,20 +1395,47 @@ async def get_heatmap_data(from_date: str = None, to_date: str = None):
         return {"success": False, "error": str(e), "dates": [], "hours": [], "z": []}
 
 
+@app.post("/api/dashboard/rollups/rebuild")
+async def rebuild_dashboard_rollups(request: Request, from_date: str = None, to_date: str = None,
+                                    camera: str = None):
+    """detections에서 롤업 재계산 (관리자 전용, 과거 데이터 백필/보정용)"""
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    def rebuild():
+        db = get_db_connection()
+        try:
+            return rebuild_rollups(db, from_date, to_date, camera)
+        finally:
+            db.close()
+
+    try:
+        rows = await asyncio.to_thread(rebuild)
+        response_cache.clear()
+        return {"success": True, "rows": rows, "camera": camera}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @app.get("/api/dashboard/job-history")
 async def get_job_history(days: int = 7, job_type: str = None):
+    """작업 히스토리 조회 (최근 N일, 응답 캐시)"""
+    return await response_cache.get_or_compute(
+        "job-history", {"days": days, "job_type": job_type}, RESPONSE_TTL_JOBS,
+        lambda: query_job_history(days, job_type), cacheable=is_success)
+
+
+async def query_job_history(days: int = 7, job_type: str = None):
     """작업 히스토리 조회 (최근 N일)"""
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-
         where_clause = "WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)"
         params = [days]
         if job_type:
             where_clause += " AND job_type = %s"
             params.append(job_type)
 
-        cursor.execute(f"""
+        history = await async_db.fetchall(f"""
             SELECT
                 id,
                 job_type,
@@ -1343,10 +1451,8 @@ async def get_job_history(days: int = 7, job_type: str = None):
             LIMIT 100
         """, params)
 
-        history = cursor.fetchall()
-
         # 요약 통계
-        cursor.execute(f"""
+        summary = await async_db.fetchall(f"""
             SELECT
                 job_type,
                 status,
@@ -1357,10 +1463,6 @@ async def get_job_history(days: int = 7, job_type: str = None):
             {where_clause}
             GROUP BY job_type, status
         """, params)
-        summary = cursor.fetchall()
-
-        cursor.close()
-        db.close()
 
         return {
             "success": True,
@@ -1373,39 +1475,45 @@ async def get_job_history(days: int = 7, job_type: str = None):
 
 @app.get("/api/dashboard/cats")
 async def get_cat_profiles(from_date: str = None, to_date: str = None):
+    """고양이 개체별 프로필 (응답 캐시)"""
+    return await response_cache.get_or_compute(
+        "cats", {"from": from_date, "to": to_date}, response_ttl(to_date),
+        lambda: query_cat_profiles(from_date, to_date), (from_date, to_date), cacheable=is_success)
+
+
+async def query_cat_profiles(from_date: str = None, to_date: str = None):
     """고양이 개체별 프로필"""
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-
         params = []
         where_clause = "WHERE is_cat = TRUE AND cat_id IS NOT NULL"
         if from_date and to_date:
             where_clause += " AND image_date BETWEEN %s AND %s"
             params.extend([from_date, to_date])
 
-        cursor.execute(f"""
+        # 개체별 집계 후 처음 등록된 이미지만 images에서 조회
+        cats = await async_db.fetchall(f"""
             SELECT
-                cat_id as id,
-                cat_id as name,
-                COUNT(*) as count,
-                MIN(image_name) as first_image,
-                DATE_FORMAT(MIN(image_date), '%%Y%%m%%d') as first_date
-            FROM detections
-            {where_clause}
-            GROUP BY cat_id
-            ORDER BY count DESC
+                c.id,
+                c.name,
+                c.count,
+                i.image_name as first_image,
+                i.camera,
+                i.source_type as source,
+                DATE_FORMAT(i.image_date, '%%Y%%m%%d') as first_date
+            FROM (
+                SELECT cat_id as id, cat_id as name, COUNT(*) as count, MIN(image_id) as first_image_id
+                FROM detections
+                {where_clause}
+                GROUP BY cat_id
+            ) c
+            LEFT JOIN images i ON i.id = c.first_image_id
+            ORDER BY c.count DESC
         """, params)
 
-        cats = cursor.fetchall()
-
         # 썸네일 URL 추가
         for cat in cats:
             if cat['first_image'] and cat['first_date']:
-                cat['thumbnail'] = f"/api/feed/image/{cat['first_date']}/{cat['first_image']}"
-
-        cursor.close()
-        db.close()
+                cat['thumbnail'] = image_url(cat['camera'], cat['source'], cat['first_date'], cat['first_image'])
 
         return {"success": True, "cats": cats}
     except Exception as e:
@@ -1413,7 +1521,7 @@ async def get_cat_profiles(from_date: str = None, to_date: str = None):
 
 
 @app.post("/api/analyze/{date}")
-async def analyze_date(date: str, background_tasks: BackgroundTasks, request: Request, camera: str = "feed"):
+async def analyze_date(date: str, request: Request, camera: str = "feed"):
     """특정 날짜 동영상 분석 (관리자 전용)"""
     # 인증 확인
     token = request.cookies.get("auth_token")
@@ -1423,27 +1531,23 @@ async def analyze_date(date: str, background_tasks: BackgroundTasks, request: Re
     # 동영상 존재 여부 확인
     video_path = get_video_path(camera)
     try:
-        ftp = get_ftp_connection()
-        ftp.cwd(video_path)
-        files = ftp.nlst()
-        ftp.quit()
+        files = await async_ftp_pool.list_names(video_path)
         if f"{date}.mp4" not in files:
             return {"success": False, "error": f"동영상이 없습니다: {date}.mp4"}
     except:
         return {"success": False, "error": "FTP 연결 실패"}
 
-    # TaskManager로 작업 생성
-    task_id = task_manager.create_task("분석", f"{camera}/{date} 동영상 분석")
-
-    # 백그라운드에서 분석 실행
-    background_tasks.add_task(analyze_video_task, camera, date, task_id)
+    # 작업 큐에 추가 (워커가 실행)
+    job = await asyncio.to_thread(enqueue_job, "analyze_video", {"camera": camera, "date": date},
+                                  f"{camera}/{date} 동영상 분석")
 
-    return {"success": True, "message": f"Analyzing video {camera}/{date}", "task_id": task_id}
+    return {"success": True, "message": f"Analyzing video {camera}/{date}",
+            "task_id": job["task_id"], "job_id": job["id"]}
 
 
 @app.post("/api/analyze/images/{date}")
-async def analyze_images(date: str, background_tasks: BackgroundTasks, request: Request, camera: str = "feed"):
-    """특정 날짜 이미지 분석 (관리자 전용)"""
+async def analyze_images(date: str, request: Request, camera: str = "feed", full: bool = False):
+    """특정 날짜 이미지 분석 (관리자 전용, full=true면 워터마크와 관계없이 날짜 전체 확인)"""
     # 인증 확인
     token = request.cookies.get("auth_token")
     if not token or not verify_token(token):
@@ -1453,22 +1557,19 @@ async def analyze_images(date: str, background_tasks: BackgroundTasks, request:
     cam_info = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])
     cam_path = cam_info["path"]
     try:
-        ftp = get_ftp_connection()
-        ftp.cwd(f"{cam_path}/{date}/images")
-        files = [f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        ftp.quit()
+        names = await async_ftp_pool.list_names(f"{cam_path}/{date}/images")
+        files = [f for f in names if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
         if not files:
             return {"success": False, "error": f"이미지가 없습니다: {date}"}
     except:
         return {"success": False, "error": "FTP 연결 실패 또는 이미지 폴더 없음"}
 
-    # TaskManager로 작업 생성
-    task_id = task_manager.create_task("이미지분석", f"{camera}/{date} 이미지 분석 ({len(files)}개)")
+    # 작업 큐에 추가 (워커가 실행)
+    job = await asyncio.to_thread(enqueue_job, "analyze_images", {"camera": camera, "date": date, "full": full},
+                                  f"{camera}/{date} 이미지 분석 ({len(files)}개)")
 
-    # 백그라운드에서 분석 실행
-    background_tasks.add_task(analyze_images_task, camera, date, task_id)
-
-    return {"success": True, "message": f"Analyzing images {camera}/{date}", "task_id": task_id}
+    return {"success": True, "message": f"Analyzing images {camera}/{date}",
+            "task_id": job["task_id"], "job_id": job["id"]}
 
 
 # ==================== 자동화 API ====================
@@ -1507,9 +1608,11 @@ async def get_auto_status(request: Request):
 
 
 @app.post("/api/auto/run-now")
-async def run_auto_now(request: Request, background_tasks: BackgroundTasks, mode: str = "analysis"):
+async def run_auto_now(request: Request, mode: str = "analysis"):
     """자동화 즉시 실행 (수동)
-    mode: analysis(분석만), conversion(변환만), both(둘 다)
+    mode: analysis(분석만), conversion(변환만), both(둘 다), maintenance(DB 유지보수)
+
+    분석/변환은 작업 큐에 넣기만 하고 (실행은 워커), 유지보수는 DB 작업이라 스레드에서 실행한다.
     """
     token = request.cookies.get("auth_token")
     if not token or not verify_token(token):
@@ -1519,153 +1622,310 @@ async def run_auto_now(request: Request, background_tasks: BackgroundTasks, mode
         if mode in ("analysis", "both"):
             auto_scheduler._log("수동 분석 시작")
             auto_scheduler._run_analysis()
-            auto_scheduler._log("수동 분석 완료")
+            auto_scheduler._log("수동 분석 예약 완료")
         if mode in ("conversion", "both"):
             auto_scheduler._log("수동 영상 변환 시작")
             auto_scheduler._run_midnight_conversion()
-            auto_scheduler._log("수동 영상 변환 완료")
+            auto_scheduler._log("수동 영상 변환 예약 완료")
+        if mode == "maintenance":
+            auto_scheduler._run_maintenance()
+
+    await asyncio.to_thread(run_once)
+    mode_text = {"analysis": "분석", "conversion": "영상 변환", "both": "분석 + 영상 변환",
+                 "maintenance": "DB 유지보수"}
+    done = "완료" if mode == "maintenance" else "작업 추가"
+    return {"success": True, "message": f"{mode_text.get(mode, '분석')} 즉시 실행 {done}"}
+
+
+# ==================== 이미지 분석 파이프라인 ====================
+# 다운로드 스레드는 FTP 풀을 공유하므로 풀 크기보다 약간 적게 (요청 처리용 여유)
+ANALYSIS_DOWNLOAD_WORKERS = int(os.getenv("ANALYSIS_DOWNLOAD_WORKERS", max(1, FTP_POOL_SIZE - 2)))
+ANALYSIS_DECODE_WORKERS = int(os.getenv("ANALYSIS_DECODE_WORKERS", 2))
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", 16))
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", 32))  # 저장 배치 (이미지 수)
+DETECTION_FLUSH_IMAGES = int(os.getenv("DETECTION_FLUSH_IMAGES", 50))  # 동영상 분석 저장 주기 (프레임 수)
+DETECTION_FLUSH_SEC = float(os.getenv("DETECTION_FLUSH_SEC", 5))  # 저장 주기 (초)
+DETECTION_CLASSES = ('cat', 'dog', 'person', 'car')
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", 8))  # 한 번에 추론할 프레임 수
+INFERENCE_MAX_WAIT_MS = int(os.getenv("INFERENCE_MAX_WAIT_MS", 50))  # 배치 채우기 최대 대기
+
+
+YOLO_MODEL = os.getenv("YOLO_MODEL", "yolov8n.pt")  # BASE_DIR 기준 상대 경로 또는 절대 경로
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 0))  # torch intra-op 스레드 (0이면 torch 기본값)
+# 웹 프로세스는 추론을 하지 않으므로 기본은 로드하지 않음 (워커는 worker.py가 시작할 때 미리 로드)
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "0") == "1"
+model_registry = ModelRegistry(BASE_DIR, threads=INFERENCE_THREADS)
+
+
+def get_inference_service() -> BatchInferenceService:
+    """공유 모델의 배치 추론 서비스 (관심 클래스만 반환)"""
+    return model_registry.service(YOLO_MODEL, batch_size=INFERENCE_BATCH_SIZE,
+                                  max_wait=INFERENCE_MAX_WAIT_MS / 1000,
+                                  conf=0.15, classes=DETECTION_CLASSES)
+
+
+@app.on_event("startup")
+def preload_model():
+    """모델 로드 + 워밍업을 백그라운드로 미리 (첫 분석 작업이 바로 시작되도록)"""
+    if not MODEL_PRELOAD:
+        return
+
+    def load():
+        try:
+            get_inference_service()
+        except Exception as e:
+            print(f"모델 사전 로드 실패: {e}")
+
+    threading.Thread(target=load, daemon=True).start()
+
 
-    background_tasks.add_task(run_once)
-    mode_text = {"analysis": "분석", "conversion": "영상 변환", "both": "분석 + 영상 변환"}
-    return {"success": True, "message": f"{mode_text.get(mode, '분석')} 즉시 실행 시작"}
+@app.on_event("shutdown")
+def stop_inference_services():
+    """추론 서비스 스레드 종료"""
+    model_registry.stop_all()
 
 
-def analyze_images_task(camera: str, date: str, task_id: str):
-    """이미지 분석 백그라운드 작업"""
+def parse_image_time(filename: str) -> tuple:
+    """파일명에서 촬영 시각 추출 (예: A26020400333410.jpg -> ("00:33:34", 0))"""
+    match = re.match(r'[A-Z](\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', filename)
+    if not match:
+        return "00:00:00", 0
+    _, _, _, h, m, s = match.groups()
+    return f"{h}:{m}:{s}", int(h)
+
+
+def build_image_pipeline(camera: str, date: str, service: BatchInferenceService, writer: DetectionWriter,
+                         on_done=None, max_side: int = None) -> AnalysisPipeline:
+    """카메라/날짜 이미지 분석 파이프라인 구성
+
+    결과는 이미지별 [(class, confidence, bbox), ...] 목록이며 탐지가 없는 이미지도 []로 저장 단계까지 간다.
+    max_side가 있으면 긴 변을 그 크기로 줄여서 추론 (메모리 절약).
+    """
     import cv2
     import numpy as np
-    import re
 
+    cam_path = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])["path"]
+    date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+
+    def fetch(filename):
+        buf = io.BytesIO()
+        with ftp_session() as ftp:
+            ftp.retrbinary(f"RETR {cam_path}/{date}/images/{filename}", buf.write)
+        return buf.getvalue()
+
+    def decode(filename, data):
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None and max_side:
+            h, w = frame.shape[:2]
+            if max(h, w) > max_side:
+                scale = max_side / max(h, w)
+                frame = cv2.resize(frame, (int(w*scale), int(h*scale)))
+        return frame
+
+    def infer(filenames, frames):
+        return service.predict_many(frames)
+
+    def persist(batch):
+        # 배치 전체를 한 트랜잭션으로 커밋 (executemany + (날짜, 시)별 daily_stats upsert)
+        for filename, detections in batch:
+            time_str, hours = parse_image_time(filename)
+            writer.add(filename, date_formatted, time_str, hours, detections)
+        writer.flush()
+
+    return AnalysisPipeline(fetch, decode, infer, persist,
+                            download_workers=ANALYSIS_DOWNLOAD_WORKERS,
+                            decode_workers=ANALYSIS_DECODE_WORKERS,
+                            queue_size=ANALYSIS_QUEUE_SIZE,
+                            batch_size=ANALYSIS_BATCH_SIZE,
+                            infer_batch=service.batch_size,
+                            on_done=on_done)
+
+
+def pending_image_files(db, camera: str, date: str, full: bool = False) -> list:
+    """분석할 파일 [(name, mtime), ...] - 워터마크(이름/수정 시각) 이후 파일만 (full이면 전체)"""
+    after = (None, None)
+    if not full:
+        after = watermark_args(get_watermark(db, camera, f"{date[:4]}-{date[4:6]}-{date[6:8]}"))
+    return archive_catalog.files_since(camera, date, *after)
+
+
+def format_pipeline_stats(stats: dict) -> str:
+    """파이프라인 통계 한 줄 요약 (로그용)"""
+    stages = " ".join(f"{name}:{s['per_sec']}/s({int(s['utilization'] * 100)}%)"
+                      for name, s in stats["stages"].items())
+    return f"{stats['images_per_sec']}장/s, 병목={stats['bottleneck']} | {stages}"
+
+
+def analyze_images_task(camera: str, date: str, task_id: str, full: bool = False, scheduled: bool = False):
+    """이미지 분석 백그라운드 작업
+
+    기본은 워터마크 이후 파일만, full=True면 날짜 전체를 다시 확인한다.
+    (이미 저장된 이미지는 DetectionWriter가 건너뛰므로 어느 쪽이든 중복 저장되지 않음)
+    scheduled=True는 자동화 정기 분석: 640px로 줄여 추론하고 작업 히스토리를 남기며,
+    영상 변환은 자정 작업에 맡긴다.
+    """
+    date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+    total_images = 0
     try:
         task_manager.add_log(task_id, "이미지 목록 가져오기")
 
         # 카메라 경로
-        cam_info = CAMERA_PATHS.get(camera, CAMERA_PATHS["feed"])
-        cam_path = cam_info["path"]
+        if camera not in CAMERA_PATHS:
+            camera = "feed"
 
-        # FTP에서 이미지 목록 가져오기
-        ftp = get_ftp_connection()
-        ftp.cwd(f"{cam_path}/{date}/images")
-        files = sorted([f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-        ftp.quit()
+        # 이미지 목록 (날짜 폴더만 다시 스캔해 카탈로그 갱신)
+        archive_catalog.sync_date(camera, date)
+
+        # DB 연결
+        db = get_db_connection()
+        candidates = pending_image_files(db, camera, date, full=full)
+        files = [name for name, _ in candidates]
 
         total_images = len(files)
         task_manager.update_task(task_id, total=total_images)
         task_manager.add_log(task_id, f"총 {total_images}개 이미지 분석 예정")
+        if scheduled:
+            log_job_history("analysis", date_formatted, "started", total_images, 0, f"{camera} 분석 시작")
 
-        # YOLO 모델 로드
-        from ultralytics import YOLO
-        model = YOLO(str(BASE_DIR / 'yolov8n.pt'))
-
-        # DB 연결
-        import mysql.connector
-        db = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            port=int(os.getenv('DB_PORT', 3306)),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME', 'ssirn')
-        )
+        # YOLO 모델 (프로세스당 한 번 로드 + 워밍업된 공유 모델)
+        service = get_inference_service()
+        inference_start = service.snapshot()
 
         analyzed = 0
+        finished_files = []
         detections_count = {'cat': 0, 'dog': 0, 'person': 0, 'car': 0}
-        date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
 
-        for filename in files:
+        def on_done(filename, detections, error):
+            # 파이프라인이 직렬화해서 호출
+            nonlocal analyzed
             analyzed += 1
             task_manager.update_task(task_id, progress=analyzed, current_item=filename)
-
-            # 파일명에서 타임스탬프 추출 (예: A26020400333410.jpg -> 00:33:34)
-            time_str = "00:00:00"
-            hours = 0
-            match = re.match(r'[A-Z](\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', filename)
-            if match:
-                _, _, _, h, m, s = match.groups()
-                hours = int(h)
-                time_str = f"{h}:{m}:{s}"
-
-            # FTP에서 이미지 다운로드
-            try:
-                ftp = get_ftp_connection()
-                ftp.cwd(f"{cam_path}/{date}/images")
-                img_data = io.BytesIO()
-                ftp.retrbinary(f"RETR {filename}", img_data.write)
-                ftp.quit()
-                img_data.seek(0)
-
-                # 이미지 로드
-                img_array = np.frombuffer(img_data.read(), np.uint8)
-                frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-
-                if frame is None:
-                    continue
-
-                # YOLO 탐지
-                results = model(frame, verbose=False, conf=0.15)
-
-                for r in results:
-                    for box in r.boxes:
-                        cls_id = int(box.cls[0])
-                        cls_name = model.names[cls_id]
-                        conf = float(box.conf[0])
-
-                        if cls_name in detections_count:
-                            detections_count[cls_name] += 1
-
-                            # DB에 저장
-                            cursor = db.cursor()
-                            cursor.execute("""
-                                INSERT INTO detections (image_name, image_date, image_time, object_class, confidence, is_cat)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """, (filename, date_formatted, time_str, cls_name, conf, cls_name=='cat'))
-
-                            # daily_stats 테이블 업데이트
-                            hour_col = f"hour_{hours}"
-                            is_cat = 1 if cls_name == 'cat' else 0
-                            is_other = 0 if cls_name == 'cat' else 1
-
-                            cursor.execute(f"""
-                                INSERT INTO daily_stats (stat_date, total_detections, cat_count, other_count, {hour_col})
-                                VALUES (%s, 1, %s, %s, 1)
-                                ON DUPLICATE KEY UPDATE
-                                    total_detections = total_detections + 1,
-                                    cat_count = cat_count + %s,
-                                    other_count = other_count + %s,
-                                    {hour_col} = {hour_col} + 1
-                            """, (date_formatted, is_cat, is_other, is_cat, is_other))
-
-                            db.commit()
-                            cursor.close()
-
-            except Exception as e:
-                task_manager.add_log(task_id, f"이미지 처리 오류: {filename} - {str(e)}")
-                continue
+            if error is not None:
+                task_manager.add_log(task_id, f"이미지 처리 오류: {filename} - {str(error)}")
+                return
+            finished_files.append(filename)
+            for cls_name, _, _ in detections or []:
+                detections_count[cls_name] += 1
 
             # 10개마다 로그
             if analyzed % 10 == 0:
                 task_manager.add_log(task_id, f"{analyzed}/{total_images} 분석 | 고양이:{detections_count['cat']} 개:{detections_count['dog']} 사람:{detections_count['person']} 차:{detections_count['car']}")
-                task_manager.update_task(task_id, detections=detections_count.copy())
+                task_manager.update_task(task_id, detections=detections_count.copy(),
+                                         pipeline=pipeline.get_stats())
 
-        db.close()
+        writer = DetectionWriter(db, flush_images=ANALYSIS_BATCH_SIZE, flush_interval=DETECTION_FLUSH_SEC,
+                                 camera=camera, on_commit=detections_committed(camera))
+        pipeline = build_image_pipeline(camera, date, service, writer, on_done=on_done,
+                                        max_side=640 if scheduled else None)
+        try:
+            stats = pipeline.run(files)
+            advance_watermark(db, camera, date_formatted, candidates, finished_files)
+        finally:
+            db.close()
+        archive_catalog.mark_analyzed(camera, date, finished_files)
+        task_manager.update_task(task_id, pipeline=stats, inference=service.get_stats(since=inference_start),
+                                 writer=writer.get_stats())
+        task_manager.add_log(task_id, f"파이프라인: {format_pipeline_stats(stats)}")
 
         # 완료
         task_manager.update_task(task_id, status='completed', progress=total_images, detections=detections_count)
         task_manager.add_log(task_id, f"분석 완료! 고양이:{detections_count['cat']} 개:{detections_count['dog']} 사람:{detections_count['person']} 차:{detections_count['car']}")
+        if scheduled:
+            saved = writer.get_stats()
+            log_job_history("analysis", date_formatted, "completed", total_images, saved["rows"],
+                            f"{camera} {total_images}개 이미지, {saved['rows']}개 탐지")
+            return
 
-        # 자동 영상 변환
-        task_manager.add_log(task_id, "영상 변환 시작...")
-        try:
-            convert_images_to_video(date, camera, resize_720p=True)
-            task_manager.add_log(task_id, "영상 변환 완료!")
-        except Exception as ve:
-            task_manager.add_log(task_id, f"영상 변환 실패: {str(ve)}")
+        # 자동 영상 변환 (convert 작업으로 - 유형별 한도/재시도 적용, 당일은 자정 변환에 맡김)
+        if date >= datetime.now().strftime("%Y%m%d"):
+            task_manager.add_log(task_id, "당일 영상 변환은 자정 작업에서")
+        else:
+            try:
+                job = enqueue_job("convert", {"camera": camera, "date": date, "delete_originals": True},
+                                  f"{camera}/{date} 동영상 변환", register=False)
+                task_manager.add_log(task_id, f"영상 변환 작업 추가 (#{job['id']})")
+            except Exception as ve:
+                task_manager.add_log(task_id, f"영상 변환 작업 추가 실패: {str(ve)}")
 
     except Exception as e:
         task_manager.update_task(task_id, status='failed')
         task_manager.add_log(task_id, f"오류: {str(e)}")
+        if scheduled:
+            log_job_history("analysis", date_formatted, "failed", total_images, 0, f"{camera}: {e}")
         print(f"Image analyze error: {e}")
 
 
+def analyzed_image_names(db, camera: str, date: str) -> set:
+    """이미 저장된 이미지 파일명 (images 테이블)"""
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT image_name FROM images
+        WHERE camera = %s AND image_date = %s AND source_type = 'image'
+    """, (camera, f"{date[:4]}-{date[4:6]}-{date[6:8]}"))
+    names = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+
+def unanalyzed_image_files(camera: str, date: str) -> List[str]:
+    """아직 분석 결과가 없는 이미지 (워터마크 이후이면서 images 테이블에 없는 파일, FTP 기준으로 갱신 후)"""
+    archive_catalog.sync_date(camera, date)
+    db = get_db_connection()
+    try:
+        done = analyzed_image_names(db, camera, date)
+        return [name for name, _ in pending_image_files(db, camera, date) if name not in done]
+    finally:
+        db.close()
+
+
+def analyze_image_range_task(camera: str, date: str, first: str, last: str, task_id: str):
+    """파일명 구간 [first, last] 이미지 분석 (여러 머신이 나눠 처리하는 백필 작업 단위)
+
+    구간들은 순서 없이 끝나므로 워터마크는 건드리지 않고, 이미 저장된 이미지는 다운로드부터 건너뛴다.
+    실패한 파일이 있으면 예외로 끝내 작업 큐가 재시도하게 한다 (재시도는 남은 파일만 처리).
+    """
+    if camera not in CAMERA_PATHS:
+        raise ValueError(f"Invalid camera: {camera}")
+    task_manager.add_log(task_id, f"{first} ~ {last} 이미지 목록 가져오기")
+    archive_catalog.sync_date(camera, date)
+    in_range = [name for name, _ in archive_catalog.files_since(camera, date) if first <= name <= last]
+
+    db = get_db_connection()
+    try:
+        done = analyzed_image_names(db, camera, date)
+        files = [name for name in in_range if name not in done]
+        task_manager.update_task(task_id, total=len(files), skipped=len(in_range) - len(files))
+        task_manager.add_log(task_id, f"구간 {len(in_range)}개 중 {len(files)}개 분석 예정")
+        if not files:
+            task_manager.finish_task(task_id, "completed")
+            return
+
+        service = get_inference_service()
+        analyzed, failed, finished_files = 0, [], []
+
+        def on_done(filename, detections, error):
+            nonlocal analyzed
+            analyzed += 1
+            task_manager.update_task(task_id, progress=analyzed, current_item=filename)
+            if error is not None:
+                failed.append(filename)
+                task_manager.add_log(task_id, f"이미지 처리 오류: {filename} - {str(error)}")
+            else:
+                finished_files.append(filename)
+
+        writer = DetectionWriter(db, flush_images=ANALYSIS_BATCH_SIZE, flush_interval=DETECTION_FLUSH_SEC,
+                                 camera=camera, on_commit=detections_committed(camera))
+        stats = build_image_pipeline(camera, date, service, writer, on_done=on_done).run(files)
+    finally:
+        db.close()
+    archive_catalog.mark_analyzed(camera, date, finished_files)
+    task_manager.update_task(task_id, pipeline=stats, writer=writer.get_stats())
+    task_manager.add_log(task_id, f"파이프라인: {format_pipeline_stats(stats)}")
+    if failed:
+        raise RuntimeError(f"{len(failed)}개 이미지 실패 (첫 파일: {failed[0]})")
+    task_manager.finish_task(task_id, "completed")
+
+
 def extract_timestamp_from_frame(frame, frame_num, fps):
     """프레임에서 타임스탬프 OCR 추출 (오른쪽 상단)"""
     import pytesseract
@@ -1717,12 +1977,11 @@ def analyze_video_task(camera: str, date: str, task_id: str):
 
         # FTP에서 동영상 다운로드
         video_path = get_video_path(camera)
-        ftp = get_ftp_connection()
         local_video = work_dir / f"{date}.mp4"
 
-        with open(local_video, 'wb') as f:
-            ftp.retrbinary(f"RETR {video_path}/{date}.mp4", f.write)
-        ftp.quit()
+        with ftp_session() as ftp:
+            with open(local_video, 'wb') as f:
+                ftp.retrbinary(f"RETR {video_path}/{date}.mp4", f.write)
 
         task_manager.add_log(task_id, "동영상 다운로드 완료, 프레임 추출 시작")
 
@@ -1738,86 +1997,65 @@ def analyze_video_task(camera: str, date: str, task_id: str):
         task_manager.update_task(task_id, total=frames_to_analyze)
         task_manager.add_log(task_id, f"총 {frames_to_analyze}개 프레임 분석 예정")
 
-        # YOLO 모델 로드
-        from ultralytics import YOLO
-        model = YOLO(str(BASE_DIR / 'yolov8n.pt'))
+        # YOLO 모델 (프로세스당 한 번 로드 + 워밍업된 공유 모델)
+        service = get_inference_service()
+        inference_start = service.snapshot()
 
         # DB 연결
-        import mysql.connector
-        db = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            port=int(os.getenv('DB_PORT', 3306)),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME', 'ssirn')
-        )
+        db = get_db_connection()
+        writer = DetectionWriter(db, flush_images=DETECTION_FLUSH_IMAGES, flush_interval=DETECTION_FLUSH_SEC,
+                                 camera=camera, on_commit=detections_committed(camera))
 
         analyzed = 0
         detections_count = {'cat': 0, 'dog': 0, 'person': 0, 'car': 0}
         frame_num = 0
+        date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
 
+        def process_batch(batch):
+            """모은 프레임을 한 번에 추론하고 탐지 결과 저장"""
+            nonlocal analyzed
+            results = service.predict_many([frame for _, frame in batch])
+            for (num, frame), detections in zip(batch, results):
+                analyzed += 1
+                time_str, hours = "00:00:00", 0
+                if detections:
+                    # 타임스탬프 OCR 추출 (오른쪽 상단에서, 탐지가 있는 프레임만)
+                    time_str, hours = extract_timestamp_from_frame(frame, num, fps)
+                    for cls_name, _, _ in detections:
+                        detections_count[cls_name] += 1
+                # detections + daily_stats(대시보드용)는 모아서 저장
+                writer.add(f"{date}.mp4", date_formatted, time_str, hours, detections, frame_index=num)
+
+                # 10프레임마다 로그 (탐지 결과 포함)
+                if analyzed % 10 == 0:
+                    task_manager.add_log(task_id, f"{analyzed}/{frames_to_analyze} 분석 | 고양이:{detections_count['cat']} 개:{detections_count['dog']} 사람:{detections_count['person']} 차:{detections_count['car']}")
+                    # 탐지 카운트도 task에 저장
+                    task_manager.update_task(task_id, detections=detections_count.copy())
+            task_manager.update_task(task_id, progress=analyzed, current_item=f"프레임 {batch[-1][0]}")
+
+        batch = []
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            # 분석할 프레임만 디코딩 (나머지는 grab으로 건너뜀)
+            if not cap.grab():
                 break
-
             frame_num += 1
 
             # frame_interval 마다 분석
             if frame_num % frame_interval != 0:
                 continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
 
-            analyzed += 1
-            task_manager.update_task(task_id, progress=analyzed, current_item=f"프레임 {frame_num}")
-
-            # YOLO 탐지 (신뢰도 임계값 낮춤)
-            results = model(frame, verbose=False, conf=0.15)
-
-            for r in results:
-                for box in r.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = model.names[cls_id]
-                    conf = float(box.conf[0])
-
-                    if cls_name in detections_count:
-                        detections_count[cls_name] += 1
-
-                        # DB에 저장
-                        cursor = db.cursor()
-                        # 타임스탬프 OCR 추출 (오른쪽 상단에서)
-                        time_str, hours = extract_timestamp_from_frame(frame, frame_num, fps)
-                        date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
-
-                        # detections 테이블에 저장
-                        cursor.execute("""
-                            INSERT INTO detections (image_name, image_date, image_time, object_class, confidence, is_cat)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (f"frame_{frame_num}.jpg", date_formatted, time_str, cls_name, conf, cls_name=='cat'))
-
-                        # daily_stats 테이블 업데이트 (대시보드용)
-                        # 기존 테이블 구조: cat_count, other_count만 있음
-                        hour_col = f"hour_{hours}"
-                        is_cat = 1 if cls_name == 'cat' else 0
-                        is_other = 0 if cls_name == 'cat' else 1
-
-                        cursor.execute(f"""
-                            INSERT INTO daily_stats (stat_date, total_detections, cat_count, other_count, {hour_col})
-                            VALUES (%s, 1, %s, %s, 1)
-                            ON DUPLICATE KEY UPDATE
-                                total_detections = total_detections + 1,
-                                cat_count = cat_count + %s,
-                                other_count = other_count + %s,
-                                {hour_col} = {hour_col} + 1
-                        """, (date_formatted, is_cat, is_other, is_cat, is_other))
-
-                        db.commit()
-                        cursor.close()
-
-            # 10프레임마다 로그 (탐지 결과 포함)
-            if analyzed % 10 == 0:
-                task_manager.add_log(task_id, f"{analyzed}/{frames_to_analyze} 분석 | 고양이:{detections_count['cat']} 개:{detections_count['dog']} 사람:{detections_count['person']} 차:{detections_count['car']}")
-                # 탐지 카운트도 task에 저장
-                task_manager.update_task(task_id, detections=detections_count.copy())
+            batch.append((frame_num, frame))
+            if len(batch) >= service.batch_size:
+                process_batch(batch)
+                batch = []
+        if batch:
+            process_batch(batch)
+        writer.close()
+        task_manager.update_task(task_id, inference=service.get_stats(since=inference_start),
+                                 writer=writer.get_stats())
 
         cap.release()
         db.close()
@@ -1973,26 +2211,32 @@ async def get_pending_dates(camera: str):
         if camera not in CAMERAS:
             return {"success": False, "error": "Invalid camera", "pending": [], "completed": []}
 
+        # 카탈로그가 준비되어 있으면 인덱스 조회로 처리
+        if await asyncio.to_thread(archive_catalog.is_synced, camera):
+            rows = await asyncio.to_thread(archive_catalog.dates, camera)
+            folders = [r for r in reversed(rows) if r["has_folder"]]
+            return {
+                "success": True,
+                "pending": [r["date"] for r in folders if not r["has_video"]],
+                "completed": [r["date"] for r in folders if r["has_video"]],
+                "camera": camera
+            }
+
         cam_path = CAMERAS[camera]["path"]
         video_path = get_video_path(camera)
 
-        ftp = get_ftp_connection()
-
         # 1. 모든 날짜 폴더 (이미지 있는 날짜)
-        ftp.cwd(cam_path)
-        all_dates = sorted([f for f in ftp.nlst() if f.isdigit() and len(f) == 8], reverse=True)
+        names = await list_names_cached(cam_path, LISTING_TTL_ROOT)
+        all_dates = sorted([f for f in names if f.isdigit() and len(f) == 8], reverse=True)
 
         # 2. 동영상 있는 날짜
         video_dates = []
         try:
-            ftp.cwd(video_path)
-            files = ftp.nlst()
+            files = await list_names_cached(video_path, LISTING_TTL_VIDEOS)
             video_dates = [f.replace('.mp4', '') for f in files if f.endswith('.mp4')]
-        except:
+        except aioftp.StatusCodeError:
             pass
 
-        ftp.quit()
-
         # 3. 분류
         pending = [d for d in all_dates if d not in video_dates]
         completed = [d for d in all_dates if d in video_dates]
@@ -2008,7 +2252,7 @@ async def get_pending_dates(camera: str):
 
 
 @app.post("/api/feed/convert-range/{camera}")
-async def convert_date_range(camera: str, request: Request, background_tasks: BackgroundTasks):
+async def convert_date_range(camera: str, request: Request):
     """날짜 범위 동영상 변환 및 원본 삭제 (관리자 전용)"""
     token = request.cookies.get("auth_token")
     if not token or not verify_token(token):
@@ -2025,32 +2269,37 @@ async def convert_date_range(camera: str, request: Request, background_tasks: Ba
     if not from_date or not to_date:
         raise HTTPException(status_code=400, detail="from_date and to_date required")
 
-    # 작업 생성
-    task_id = task_manager.create_task("convert", f"{camera} 동영상 변환 ({from_date}~{to_date})")
-
-    # 백그라운드에서 변환 작업 실행
-    background_tasks.add_task(convert_date_range_task, camera, from_date, to_date, delete_images, task_id)
-    return {"success": True, "message": f"Converting {camera} from {from_date} to {to_date}", "task_id": task_id}
+    # 작업 큐에 추가
+    job = await asyncio.to_thread(enqueue_job, "convert_range",
+                                  {"camera": camera, "from_date": from_date, "to_date": to_date,
+                                   "delete_images": delete_images},
+                                  f"{camera} 동영상 변환 ({from_date}~{to_date})")
+    return {"success": True, "message": f"Converting {camera} from {from_date} to {to_date}",
+            "task_id": job["task_id"], "job_id": job["id"]}
 
 
 def convert_date_range_task(camera: str, from_date: str, to_date: str, delete_images: bool, task_id: str = None):
-    """날짜 범위 변환 태스크"""
+    """날짜 범위 변환 태스크 (실패한 날짜가 있으면 나머지를 마친 뒤 예외, 재시도 때는 남은 날짜만 이미지가 있음)"""
     from datetime import datetime as dt, timedelta
 
-    start = dt.strptime(from_date, "%Y%m%d")
-    end = dt.strptime(to_date, "%Y%m%d")
+    # 카탈로그에서 이미지가 있는 날짜만 (빈 날짜는 FTP 탐색 생략)
+    try:
+        archive_catalog.sync(camera)
+        dates = [d["date"] for d in archive_catalog.dates(camera, from_date, to_date) if d["image_count"] > 0]
+    except Exception as e:
+        print(f"Catalog sync failed for {camera}, probing every day: {e}")
+        start = dt.strptime(from_date, "%Y%m%d")
+        end = dt.strptime(to_date, "%Y%m%d")
+        dates = [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range((end - start).days + 1)]
 
     # 총 날짜 수 계산
-    total_days = (end - start).days + 1
+    total_days = len(dates)
     if task_id:
         task_manager.update_task(task_id, total=total_days)
         task_manager.add_log(task_id, f"총 {total_days}일 변환 시작")
 
-    current = start
-    progress = 0
-    while current <= end:
-        date_str = current.strftime("%Y%m%d")
-        progress += 1
+    failed = []
+    for progress, date_str in enumerate(dates, 1):
         try:
             if task_id:
                 task_manager.update_task(task_id, progress=progress, current_item=date_str)
@@ -2063,48 +2312,280 @@ def convert_date_range_task(camera: str, from_date: str, to_date: str, delete_im
             if task_id:
                 task_manager.add_log(task_id, f"완료: {date_str}")
         except Exception as e:
+            failed.append(date_str)
             if task_id:
                 task_manager.add_log(task_id, f"오류 ({date_str}): {e}")
             print(f"Error converting {camera}/{date_str}: {e}")
-        current += timedelta(days=1)
+
+    if failed:
+        if task_id:
+            task_manager.finish_task(task_id, "failed")
+        raise RuntimeError(f"{len(failed)}일 변환 실패 (첫 날짜: {failed[0]})")
 
     if task_id:
         task_manager.add_log(task_id, f"모든 변환 완료")
         task_manager.finish_task(task_id, "completed")
 
 
+def convert_video_job(camera: str, date: str, delete_originals: bool = True, task_id: str = None):
+    """convert 작업: 변환 + 작업 히스토리 기록 (실패는 기록 후 다시 올려 작업 큐가 재시도)
+
+    원본 삭제는 그 날짜 분석이 끝났을 때만 한다. 분석 안 된 이미지가 남아 있으면 (늦게 올라온 파일,
+    대기 중인 분석/백필 작업) 영상만 만들고 원본은 남긴다.
+    """
+    date_formatted = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+    info = next(iter(archive_catalog.dates(camera, date, date)), None)
+    image_count = info["image_count"] if info else 0
+    note = ""
+    if delete_originals:
+        remaining = unanalyzed_image_files(camera, date)
+        if remaining:
+            delete_originals = False
+            note = f", 분석 안 된 이미지 {len(remaining)}개 - 원본 유지"
+            if task_id:
+                task_manager.add_log(task_id, f"분석 안 된 이미지 {len(remaining)}개 (첫 파일: {remaining[0]}) - "
+                                              f"원본은 삭제하지 않음")
+    log_job_history("conversion", date_formatted, "started", image_count, 0, f"{camera} 영상 변환 시작{note}")
+    try:
+        convert_images_to_video(date, camera, delete_originals)
+    except Exception as e:
+        log_job_history("conversion", date_formatted, "failed", image_count, 0, f"{camera}: {e}")
+        raise
+    log_job_history("conversion", date_formatted, "completed", image_count, 0, f"{camera} 영상 변환 완료{note}")
+
+
 def delete_original_images(camera: str, date: str):
     """원본 이미지 삭제"""
     try:
         cam_path = CAMERAS.get(camera, CAMERAS["feed"])["path"]
         video_path = get_video_path(camera)
 
-        # 동영상이 존재하는지 확인
-        ftp = get_ftp_connection()
-        try:
-            ftp.cwd(video_path)
-            files = ftp.nlst()
-            if f"{date}.mp4" not in files:
-                ftp.quit()
-                return  # 동영상 없으면 삭제 안함
-        except:
-            ftp.quit()
-            return
-
-        # 이미지 삭제
-        ftp.cwd(f"{cam_path}/{date}/images")
-        images = [f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        for img in images:
+        with ftp_session() as ftp:
+            # 동영상이 존재하는지 확인
             try:
-                ftp.delete(img)
-            except:
-                pass
-        ftp.quit()
+                ftp.cwd(video_path)
+                files = ftp.nlst()
+                if f"{date}.mp4" not in files:
+                    return  # 동영상 없으면 삭제 안함
+            except ftplib.error_perm:
+                return
+
+            # 이미지 삭제
+            ftp.cwd(f"{cam_path}/{date}/images")
+            images = [f for f in ftp.nlst() if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+            for img in images:
+                try:
+                    ftp.delete(img)
+                except ftplib.error_perm:
+                    pass
+        listing_cache.invalidate(f"{cam_path}/{date}")
+        archive_catalog.invalidate(camera, date)
         print(f"Deleted {len(images)} images from {camera}/{date}")
     except Exception as e:
         print(f"Error deleting images from {camera}/{date}: {e}")
 
 
+# ==================== 작업 큐 ====================
+# 변환/리사이즈/분석은 jobs 테이블에 넣고 worker.py 프로세스가 실행한다 (웹 프로세스는 상태만 반영)
+# 같은 DB/FTP를 보는 다른 머신에서도 worker.py를 띄우면 함께 처리한다 (백필은 파일명 구간 단위)
+JOB_LIMITS = parse_limits(os.getenv("JOB_LIMITS", "analyze_images=1,analyze_video=1,convert=2,convert_range=1,resize_all=1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 30))
+JOB_SPAWN_WORKERS = int(os.getenv("JOB_SPAWN_WORKERS", 1))  # 웹 서버가 직접 띄울 워커 수 (워커를 따로 서비스로 돌리면 0)
+WORKER_STALE_SEC = int(os.getenv("WORKER_STALE_SEC", 300))  # last_seen이 이보다 오래된 워커는 꺼진 것으로 표시
+BACKFILL_CHUNK = int(os.getenv("BACKFILL_CHUNK", 500))  # 백필 작업 하나에 들어갈 이미지 수
+
+# job_type -> (TaskManager 작업 유형, 우선순위, 실행 함수(payload, task_id))
+JOB_TYPES = {
+    "analyze_images": ("이미지분석", 10,
+                       lambda p, task_id: analyze_images_task(p["camera"], p["date"], task_id, p.get("full", False))),
+    "auto_analyze": ("자동분석", 8,
+                     lambda p, task_id: analyze_images_task(p["camera"], p["date"], task_id, scheduled=True)),
+    "analyze_video": ("분석", 5, lambda p, task_id: analyze_video_task(p["camera"], p["date"], task_id)),
+    "analyze_range": ("백필", 1,
+                      lambda p, task_id: analyze_image_range_task(p["camera"], p["date"], p["first"], p["last"],
+                                                                  task_id)),
+    "convert": ("convert", 0,
+                lambda p, task_id: convert_video_job(p["camera"], p["date"], p.get("delete_originals", True),
+                                                     task_id)),
+    "convert_range": ("convert", 0,
+                      lambda p, task_id: convert_date_range_task(p["camera"], p["from_date"], p["to_date"],
+                                                                 p.get("delete_images", False), task_id)),
+    "resize_all": ("resize", -5, lambda p, task_id: resize_all_videos_task(p["camera"], task_id)),
+}
+ANALYSIS_JOB_TYPES = ("analyze_images", "auto_analyze", "analyze_video", "analyze_range")  # YOLO를 쓰는 유형
+# FTP 파일을 만들거나 지우고 카탈로그(catalog.db, 호스트 로컬)에 반영하는 유형 - 웹 서버 호스트의 워커만 실행
+FILE_JOB_TYPES = ("convert", "convert_range", "resize_all")
+JOB_HANDLERS = {job_type: handler for job_type, (_, _, handler) in JOB_TYPES.items()}
+JOB_LABELS = {job_type: label for job_type, (label, _, _) in JOB_TYPES.items()}
+
+job_queue = JobQueue(get_db_connection)
+_worker_processes: List[subprocess.Popen] = []
+
+
+def enqueue_job(job_type: str, payload: dict, description: str, register: bool = True) -> dict:
+    """작업 큐에 추가하고 대기 상태로 TaskManager에 등록
+
+    같은 유형/인자의 작업이 이미 대기 또는 실행 중이면 새로 넣지 않고 그 작업을 돌려준다.
+    워커 안에서 후속 작업을 넣을 때는 register=False (웹 프로세스의 JobMirror가 등록).
+    """
+    label, priority, _ = JOB_TYPES[job_type]
+    dedupe_key = ":".join([job_type] + [str(payload[k]) for k in sorted(payload)])[:191]
+    job = job_queue.enqueue(job_type, payload, description, priority,
+                            max_attempts=JOB_MAX_ATTEMPTS, dedupe_key=dedupe_key)
+    if register and not job["duplicate"]:
+        task_manager.create_task(label, description, task_id=job["task_id"], status="queued")
+    return job
+
+
+def job_changed(job: dict):
+    """워커가 저장한 탐지는 이 프로세스의 DetectionWriter를 거치지 않으므로 분석 작업 진행 시 해당 날짜 무효화"""
+    if job["job_type"] in ANALYSIS_JOB_TYPES:
+        camera, date = job["payload"].get("camera"), job["payload"].get("date")
+        if camera and date:
+            detections_committed(camera)({date})
+    if job["job_type"] in ("auto_analyze", "convert") and job["status"] != "running":
+        response_cache.invalidate_endpoint("job-history")
+    if job["job_type"] in ("convert", "convert_range", "resize_all") and job["status"] != "running" \
+            and job["attempts"] > 0:
+        ftp_files_changed(job["payload"], job["job_type"])
+
+
+def ftp_files_changed(payload: dict, job_type: str):
+    """변환/리사이즈는 워커가 FTP를 바꾸고 자기 프로세스의 캐시만 지우므로,
+    시도가 끝나면 이 프로세스의 폴더 목록 캐시와 카탈로그도 갱신 (동영상 생성, 원본 삭제)"""
+    camera = payload.get("camera")
+    if camera not in CAMERAS:
+        return
+    cam_path = CAMERAS[camera]["path"]
+    listing_cache.invalidate(get_video_path(camera))
+    if job_type == "convert":
+        listing_cache.invalidate(f"{cam_path}/{payload['date']}")
+        archive_catalog.invalidate(camera, payload["date"])
+    elif job_type == "convert_range":
+        listing_cache.invalidate(cam_path)
+        for info in archive_catalog.dates(camera, payload.get("from_date"), payload.get("to_date")):
+            archive_catalog.invalidate(camera, info["date"])
+
+    def resync():
+        # has_video/video_size와 dirty 표시한 날짜 폴더를 FTP 기준으로 다시 맞춤
+        try:
+            archive_catalog.sync(camera)
+        except Exception as e:
+            print(f"Catalog resync failed for {camera}: {e}")
+
+    threading.Thread(target=resync, daemon=True).start()
+
+
+def plan_backfill(camera: str, from_date: str, to_date: str, chunk: int) -> List[dict]:
+    """기간의 이미지를 (카메라, 날짜, 파일명 구간) 작업 단위로 나눔 (카탈로그 기준)"""
+    archive_catalog.sync(camera)
+    units = []
+    for info in archive_catalog.dates(camera, from_date, to_date):
+        if info["image_count"] <= 0:
+            continue
+        names = [name for name, _ in archive_catalog.files_since(camera, info["date"])]
+        for first, last in split_ranges(names, chunk):
+            units.append({"camera": camera, "date": info["date"], "first": first, "last": last})
+    return units
+
+
+def enqueue_backfill(cameras: List[str], from_date: str, to_date: str, chunk: int) -> dict:
+    """백필 작업 단위를 모두 큐에 추가 -> {units, queued, duplicates}"""
+    queued = duplicates = units = 0
+    for camera in cameras:
+        for unit in plan_backfill(camera, from_date, to_date, chunk):
+            units += 1
+            job = enqueue_job("analyze_range", unit,
+                              f"{camera}/{unit['date']} 백필 {unit['first']}~{unit['last']}")
+            if job["duplicate"]:
+                duplicates += 1
+            else:
+                queued += 1
+    return {"units": units, "queued": queued, "duplicates": duplicates}
+
+
+job_mirror = JobMirror(job_queue, task_manager, JOB_LABELS, on_change=job_changed)
+
+
+@app.on_event("startup")
+def start_job_queue():
+    """작업 큐 상태 반영 스레드 + 워커 프로세스 시작"""
+    job_mirror.start()
+    for _ in range(JOB_SPAWN_WORKERS):
+        _worker_processes.append(subprocess.Popen([sys.executable, str(BASE_DIR / "worker.py"), "--catalog-host"],
+                                                  cwd=str(BASE_DIR)))
+
+
+@app.on_event("shutdown")
+def stop_job_queue():
+    """워커는 SIGTERM을 받으면 실행 중인 작업만 마치고 종료 (못 마친 작업은 리스 만료 후 다시 실행)"""
+    job_mirror.stop()
+    for proc in _worker_processes:
+        proc.terminate()
+    _worker_processes.clear()
+
+
+@app.get("/api/jobs")
+async def get_jobs(request: Request, status: Optional[str] = None, limit: int = 50):
+    """작업 큐 현황 (유형/상태별 수 + 최근 작업)"""
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        counts, jobs, workers = await asyncio.gather(
+            asyncio.to_thread(job_queue.counts),
+            asyncio.to_thread(job_queue.list_jobs, status, min(limit, 500)),
+            asyncio.to_thread(job_queue.list_workers, WORKER_STALE_SEC))
+        return {"success": True, "counts": counts, "jobs": jobs, "limits": JOB_LIMITS, "workers": workers,
+                "spawned": [{"pid": p.pid, "alive": p.poll() is None} for p in _worker_processes]}
+    except Exception as e:
+        return {"success": False, "error": str(e), "counts": {}, "jobs": [], "workers": []}
+
+
+@app.post("/api/jobs/backfill")
+async def backfill_jobs(request: Request):
+    """지난 기간 이미지 분석을 파일명 구간 작업으로 나눠 큐에 추가 (관리자 전용)
+
+    body: {"camera": "feed" | "all", "from_date": "YYYYMMDD", "to_date": "YYYYMMDD", "chunk": 500}
+    """
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    data = await request.json()
+    camera = data.get("camera", "all")
+    from_date, to_date = data.get("from_date"), data.get("to_date")
+    chunk = int(data.get("chunk") or BACKFILL_CHUNK)
+    if not from_date or not to_date:
+        raise HTTPException(status_code=400, detail="from_date and to_date required")
+    if camera != "all" and camera not in CAMERA_PATHS:
+        raise HTTPException(status_code=400, detail=f"Invalid camera: {camera}")
+
+    cameras = list(CAMERA_PATHS) if camera == "all" else [camera]
+    try:
+        result = await asyncio.to_thread(enqueue_backfill, cameras, from_date, to_date, chunk)
+        return {"success": True, "cameras": cameras, **result}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int, request: Request):
+    """대기 중인 작업 취소"""
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        if not await asyncio.to_thread(job_queue.cancel, job_id):
+            return {"success": False, "error": "대기 중인 작업이 아닙니다"}
+        return {"success": True}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 # ==================== 작업 상태 API ====================
 @app.get("/api/tasks")
 async def get_tasks():
@@ -2117,6 +2598,66 @@ async def get_tasks():
     }
 
 
+SSE_HEARTBEAT_SEC = 15  # 프록시가 유휴 연결을 끊지 않도록 주석 줄 전송 간격
+
+
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """관리자 화면 푸시 채널 (Server-Sent Events)
+
+    처음(또는 놓친 이벤트가 history에 없을 때)에는 snapshot 이벤트로 전체 작업 목록과
+    스케줄러 상태를 보내고, 이후에는 task / task_update / task_log / task_removed / auto /
+    detections 변경분만 보낸다. 재연결 시 브라우저가 보내는 Last-Event-ID 이후 것만 다시 보낸다.
+    """
+    token = request.cookies.get("auth_token")
+    if not token or not verify_token(token):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    last_event_id = request.headers.get("last-event-id")
+    sub = event_bus.subscribe()
+
+    def snapshot() -> tuple:
+        task_manager.cleanup_old_tasks()
+        seen = event_bus.last_id
+        return seen, format_sse(seen, "snapshot", {
+            "running": task_manager.get_running_tasks(),
+            "recent": task_manager.get_all_tasks(),
+            "auto": auto_scheduler.get_status(),
+        })
+
+    async def generate():
+        try:
+            missed = event_bus.replay(int(last_event_id)) if last_event_id and last_event_id.isdigit() else None
+            if missed is None:
+                seen, message = snapshot()
+                yield message
+            else:
+                seen = int(last_event_id)
+                for event_id, event, data in missed:
+                    yield format_sse(event_id, event, data)
+                    seen = event_id
+            while not await request.is_disconnected():
+                events = await sub.next_batch(timeout=SSE_HEARTBEAT_SEC)
+                if not events:
+                    yield ": ping\n\n"
+                    continue
+                for event_id, event, data in events:
+                    if event == "resync":
+                        seen, message = snapshot()
+                        yield message
+                    elif event_id > seen:
+                        # 구독 후 snapshot/replay 전에 큐에 들어온 이벤트는 이미 반영됨
+                        yield format_sse(event_id, event, data)
+                        seen = event_id
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # nginx 버퍼링 끔
+    })
+
+
 @app.get("/api/tasks/{task_id}")
 async def get_task_detail(task_id: str):
     """특정 작업 상세 정보"""
@@ -2126,184 +2667,91 @@ async def get_task_detail(task_id: str):
     return {"success": False, "error": "Task not found"}
 
 
-@app.get("/api/system/status")
-async def get_system_status():
-    """시스템 상태 (CPU, RAM, 디스크, 서비스)"""
-    try:
-        # CPU 사용량
-        cpu_result = subprocess.run(
-            ["top", "-bn1"],
-            capture_output=True, text=True, timeout=5
-        )
-        cpu_line = [l for l in cpu_result.stdout.split('\n') if 'Cpu' in l or '%Cpu' in l]
-        cpu_usage = 0
-        if cpu_line:
-            # "%Cpu(s):  1.2 us,  0.3 sy, ..." 형태 파싱
-            parts = cpu_line[0].split(',')
-            for p in parts:
-                if 'id' in p:  # idle
-                    idle = float(p.split()[0])
-                    cpu_usage = round(100 - idle, 1)
-                    break
+# 시스템 상태는 백그라운드 샘플러가 /proc에서 주기적으로 읽어 둔 값을 반환 (호출마다 fork 없음)
+SYSTEM_SAMPLE_SEC = float(os.getenv("SYSTEM_SAMPLE_SEC", 5))
+SYSTEM_HISTORY = int(os.getenv("SYSTEM_HISTORY", 120))  # 링 버퍼 샘플 수 (기본 5초 × 120 = 10분)
 
-        # 메모리 사용량
-        mem_result = subprocess.run(
-            ["free", "-m"],
-            capture_output=True, text=True, timeout=5
-        )
-        mem_lines = mem_result.stdout.strip().split('\n')
-        mem_total, mem_used, mem_free = 0, 0, 0
-        for line in mem_lines:
-            if line.startswith('Mem:'):
-                parts = line.split()
-                mem_total = int(parts[1])
-                mem_used = int(parts[2])
-                mem_free = int(parts[3])
-                break
-        mem_percent = round((mem_used / mem_total) * 100, 1) if mem_total > 0 else 0
+# 웹앱 서비스 (8000~8099 LISTEN 포트 자동 표시, 아래 포트는 down이어도 항상 표시)
+KNOWN_SERVICES = {
+    8000: "miniLMS",
+    8001: "원주산삼",
+    8002: "SSIRN",
+    8003: "SSIRN-DEV"
+}
+system_sampler = SystemSampler(KNOWN_SERVICES, port_range=(8000, 8099),
+                               interval=SYSTEM_SAMPLE_SEC, history=SYSTEM_HISTORY)
 
-        # 디스크 사용량
-        disk_result = subprocess.run(
-            ["df", "-h", "/"],
-            capture_output=True, text=True, timeout=5
-        )
-        disk_lines = disk_result.stdout.strip().split('\n')
-        disk_total, disk_used, disk_free, disk_percent = "0", "0", "0", 0
-        if len(disk_lines) > 1:
-            parts = disk_lines[1].split()
-            disk_total = parts[1]
-            disk_used = parts[2]
-            disk_free = parts[3]
-            disk_percent = int(parts[4].replace('%', ''))
-
-        # 웹앱 서비스 상태 (8000~8099 포트 자동 스캔)
-        known_names = {
-            8000: "miniLMS",
-            8001: "원주산삼",
-            8002: "SSIRN",
-            8003: "SSIRN-DEV"
-        }
-        services = []
 
-        # ss로 8000번대 LISTEN 포트 일괄 조회
-        try:
-            ss_result = subprocess.run(
-                ["ss", "-tlnp"],
-                capture_output=True, text=True, timeout=5
-            )
-            active_ports = set()
-            for line in ss_result.stdout.split('\n'):
-                if 'LISTEN' not in line:
-                    continue
-                # *:80XX 또는 0.0.0.0:80XX 또는 127.0.0.1:80XX 패턴
-                port_match = re.search(r'(?:\*|0\.0\.0\.0|127\.0\.0\.1|\[::\]):(\d+)', line)
-                if port_match:
-                    p = int(port_match.group(1))
-                    if 8000 <= p <= 8099:
-                        active_ports.add(p)
-        except:
-            active_ports = set()
-
-        # known_names에 있는 포트는 항상 표시 (down 상태도)
-        all_ports = sorted(set(known_names.keys()) | active_ports)
-
-        for port in all_ports:
-            # 이름: known_names에 있으면 사용, 없으면 자동 감지
-            name = known_names.get(port)
-            if not name:
-                # systemd 서비스명에서 이름 추출 시도
-                svc_name = _find_systemd_service(port)
-                name = svc_name if svc_name else f"서비스-{port}"
-
-            service = {
-                "port": port,
-                "name": name,
-                "status": "running" if port in active_ports else "down",
-                "pid": None,
-                "cpu": "0",
-                "mem": "0",
-                "connections": 0
-            }
+@app.on_event("startup")
+def start_system_sampler():
+    """시스템 상태 샘플러 스레드 시작"""
+    system_sampler.start()
 
-            if port in active_ports:
-                try:
-                    lsof_result = subprocess.run(
-                        ["lsof", "-i", f":{port}", "-t"],
-                        capture_output=True, text=True, timeout=3
-                    )
-                    pids = lsof_result.stdout.strip().split('\n')
-                    if pids and pids[0]:
-                        service["pid"] = pids[0]
-
-                        # CPU/메모리 사용량
-                        ps_result = subprocess.run(
-                            ["ps", "-p", pids[0], "-o", "%cpu,%mem", "--no-headers"],
-                            capture_output=True, text=True, timeout=3
-                        )
-                        if ps_result.stdout.strip():
-                            parts = ps_result.stdout.strip().split()
-                            if len(parts) >= 2:
-                                service["cpu"] = parts[0]
-                                service["mem"] = parts[1]
-
-                        # 연결 수 (트래픽 지표)
-                        netstat_result = subprocess.run(
-                            ["ss", "-tn", f"sport = :{port}"],
-                            capture_output=True, text=True, timeout=3
-                        )
-                        connections = len([l for l in netstat_result.stdout.split('\n') if 'ESTAB' in l])
-                        service["connections"] = connections
-                except:
-                    pass
 
-            services.append(service)
+@app.on_event("shutdown")
+def stop_system_sampler():
+    system_sampler.stop()
 
-        return {
-            "success": True,
-            "cpu": {"usage": cpu_usage},
-            "memory": {
-                "total_mb": mem_total,
-                "used_mb": mem_used,
-                "free_mb": mem_free,
-                "percent": mem_percent
-            },
-            "disk": {
-                "total": disk_total,
-                "used": disk_used,
-                "free": disk_free,
-                "percent": disk_percent
-            },
-            "services": services[:10]  # 최대 10개
-        }
+
+@app.get("/api/system/status")
+async def get_system_status(history: int = 60):
+    """시스템 상태 (CPU, RAM, 디스크, 서비스) + 최근 history개 샘플"""
+    try:
+        snapshot = system_sampler.latest() or await asyncio.to_thread(system_sampler.sample)
+        return {"success": True, **snapshot, "history": system_sampler.get_history(max(history, 1)),
+                "sampler": system_sampler.get_stats()}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 def _find_systemd_service(port: int) -> str | None:
-    """포트 번호로 systemd 서비스명 자동 감지"""
+    """포트 번호로 systemd 서비스명 자동 감지 (/proc에서 LISTEN 소켓 주인 -> cgroup)"""
     try:
-        # lsof로 해당 포트의 PID 조회
-        lsof_result = subprocess.run(
-            ["lsof", "-i", f":{port}", "-t"],
-            capture_output=True, text=True, timeout=5
-        )
-        pid = lsof_result.stdout.strip().split('\n')[0]
-        if not pid:
-            return None
-
-        # PID로 systemd 서비스 유닛 조회
-        cgroup_result = subprocess.run(
-            ["cat", f"/proc/{pid}/cgroup"],
-            capture_output=True, text=True, timeout=3
-        )
-        match = re.search(r'/([^/]+)\.service', cgroup_result.stdout)
-        if match:
-            return match.group(1)
-    except:
+        pids = port_pids(port)
+        if pids:
+            return service_unit(pids[0])
+    except OSError:
         pass
     return None
 
 
+@app.get("/api/system/pools")
+async def get_pool_status():
+    """연결 풀 상태 (FTP, DB)"""
+    return {"success": True, "ftp": get_all_pool_stats(), "async_ftp": async_ftp_pool.get_stats(),
+            "db": get_all_db_pool_stats(), "async_db": async_db.get_stats(),
+            "response_cache": response_cache.get_stats(), "events": event_bus.get_stats()}
+
+
+@app.get("/api/system/models")
+async def get_model_status():
+    """로드된 모델 (로드/워밍업 시간, 메모리) + 배치 추론 통계"""
+    return {"success": True, **model_registry.get_stats()}
+
+
+@app.get("/api/system/pipelines")
+async def get_pipeline_status():
+    """실행 중인 분석 파이프라인 상태 (단계별 처리량, 큐 깊이, backpressure)"""
+    return {"success": True, "pipelines": get_active_pipeline_stats()}
+
+
+@app.get("/api/system/migrations")
+async def get_migration_status():
+    """스키마 버전 + 대시보드 쿼리 실행 계획 (EXPLAIN)"""
+    def check():
+        db = get_db_connection()
+        try:
+            return migration_status(db), verify_plans(db)
+        finally:
+            db.close()
+
+    try:
+        status, plans = await asyncio.to_thread(check)
+        return {"success": True, **status, "plans": plans}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 # ==================== 서비스 제어 API ====================
 @app.post("/api/system/service/{port}/stop")
 async def stop_service(port: int):
@@ -2329,19 +2777,14 @@ async def stop_service(port: int):
                 return {"success": True, "message": f"{service_name} 서비스를 정지했습니다"}
 
         # systemd가 아니면 직접 kill
-        lsof_result = subprocess.run(
-            ["lsof", "-i", f":{port}", "-t"],
-            capture_output=True, text=True, timeout=5
-        )
-        pids = lsof_result.stdout.strip().split('\n')
+        pids = port_pids(port)
 
-        if not pids or not pids[0]:
+        if not pids:
             return {"success": False, "error": f"포트 {port}에서 실행 중인 서비스가 없습니다"}
 
         # 모든 관련 프로세스 강제 종료
         for pid in pids:
-            if pid:
-                subprocess.run(["kill", "-9", pid], timeout=5)
+            subprocess.run(["kill", "-9", str(pid)], timeout=5)
 
         return {"success": True, "message": f"포트 {port} 서비스를 정지했습니다"}
     except Exception as e:
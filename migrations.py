@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+SSIRN MySQL 스키마 마이그레이션
+
+schema_migrations 테이블에 적용된 버전을 기록하고, 앱 시작 시 아직 적용되지 않은
+버전만 순서대로 실행한다. 각 단계는 information_schema를 확인해 이미 있는 컬럼/인덱스는
+건너뛰므로 중간에 실패해도 다시 실행하면 이어서 적용된다. (MySQL DDL은 자동 커밋)
+여러 프로세스가 동시에 시작해도 GET_LOCK으로 한 곳에서만 실행한다.
+
+대시보드 쿼리가 인덱스를 타는지는 EXPLAIN으로 확인한다 (verify_plans).
+
+사용법:
+    python migrations.py            # 미적용 마이그레이션 실행 + 실행 계획 확인
+    python migrations.py --status   # 적용 현황만 출력
+    python migrations.py --explain  # 실행 계획만 확인
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple, Union
+
+from retention import partition_detections
+from rollups import ROLLUP_TABLE_SQL
+
+LOCK_NAME = "ssirn_schema_migrations"
+LOCK_TIMEOUT = 60  # 초
+
+# 단계: SQL 문자열 또는 cursor를 받는 함수
+Step = Union[str, Callable]
+
+
+def _has_column(cursor, table: str, column: str) -> bool:
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _has_index(cursor, table: str, index: str) -> bool:
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def add_column(table: str, column: str, definition: str) -> Callable:
+    """컬럼 추가 단계 (이미 있으면 건너뜀)"""
+    def step(cursor):
+        if not _has_column(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    step.__doc__ = f"ADD COLUMN {table}.{column}"
+    return step
+
+
+def add_index(table: str, index: str, columns: str) -> Callable:
+    """인덱스 추가 단계 (이미 있으면 건너뜀)"""
+    def step(cursor):
+        if not _has_index(cursor, table, index):
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+    step.__doc__ = f"ADD INDEX {table}.{index}"
+    return step
+
+
+# 기존 탐지 행 -> images 키 (동영상 분석은 frame_{n}.jpg 이름으로 저장돼 있었다)
+# mysql.connector는 파라미터가 있어도 '%%'를 '%'로 바꾸지 않으므로 SQL에 %를 쓰지 않는다
+_LEGACY_IS_FRAME = "LEFT(d.image_name, 6) = 'frame_'"
+_LEGACY_SOURCE = f"IF({_LEGACY_IS_FRAME}, 'video', 'image')"
+_LEGACY_FRAME = f"IF({_LEGACY_IS_FRAME}, CAST(SUBSTRING_INDEX(SUBSTRING(d.image_name, 7), '.', 1) AS UNSIGNED), 0)"
+_LEGACY_NAME = f"IF({_LEGACY_IS_FRAME}, CONCAT(REPLACE(d.image_date, '-', ''), '.mp4'), d.image_name)"
+
+
+def backfill_images(cursor):
+    """기존 detections의 image_name으로 images 행을 만들고 image_id 채우기 (월 단위 커밋)
+
+    카메라 컬럼이 없던 시절의 데이터이므로 모두 feed로 등록한다.
+    """
+    cursor.execute("SELECT MIN(image_date), MAX(image_date) FROM detections WHERE image_id IS NULL")
+    first, last = cursor.fetchone()
+    if first is None:
+        return
+    current = first.replace(day=1)
+    while current <= last:
+        following = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        cursor.execute(f"""
+            INSERT IGNORE INTO images (camera, image_date, image_time, source_type, frame_index, image_name)
+            SELECT 'feed', d.image_date, MIN(d.image_time), {_LEGACY_SOURCE}, {_LEGACY_FRAME}, {_LEGACY_NAME}
+            FROM detections d
+            WHERE d.image_date >= %s AND d.image_date < %s AND d.image_id IS NULL
+            GROUP BY d.image_date, d.image_name
+        """, (current, following))
+        cursor.execute(f"""
+            UPDATE detections d
+            JOIN images i ON i.camera = 'feed' AND i.image_date = d.image_date
+                AND i.source_type = {_LEGACY_SOURCE} AND i.image_name = {_LEGACY_NAME}
+                AND i.frame_index = {_LEGACY_FRAME}
+            SET d.image_id = i.id
+            WHERE d.image_date >= %s AND d.image_date < %s AND d.image_id IS NULL
+        """, (current, following))
+        cursor.execute("COMMIT")
+        current = following
+
+
+def drop_detection_image_name(cursor):
+    """image_id 백필이 끝났으면 detections.image_name 제거 + image_id NOT NULL"""
+    if not _has_column(cursor, "detections", "image_name"):
+        return
+    cursor.execute("SELECT COUNT(*) FROM detections WHERE image_id IS NULL")
+    missing = cursor.fetchone()[0]
+    if missing:
+        raise RuntimeError(f"image_id가 없는 탐지 {missing}행 (백필 확인 필요)")
+    cursor.execute("ALTER TABLE detections DROP COLUMN image_name, MODIFY image_id INT NOT NULL")
+
+
+# ==================== 마이그레이션 목록 (버전 순, 적용 후 수정 금지) ====================
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "baseline tables", [
+        """
+        CREATE TABLE IF NOT EXISTS job_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            job_type ENUM('analysis', 'conversion') NOT NULL,
+            target_date VARCHAR(10) NOT NULL,
+            status ENUM('started', 'completed', 'failed') NOT NULL,
+            images_processed INT DEFAULT 0,
+            detections_found INT DEFAULT 0,
+            message TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS detections (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            image_name VARCHAR(64) NOT NULL,
+            image_date DATE NOT NULL,
+            image_time TIME,
+            object_class VARCHAR(20) NOT NULL,
+            confidence FLOAT,
+            bbox_x INT, bbox_y INT, bbox_w INT, bbox_h INT,
+            is_cat BOOLEAN DEFAULT FALSE,
+            cat_id VARCHAR(20),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            stat_date DATE PRIMARY KEY,
+            total_detections INT DEFAULT 0,
+            cat_count INT DEFAULT 0,
+            dog_count INT DEFAULT 0,
+            person_count INT DEFAULT 0,
+            car_count INT DEFAULT 0,
+            other_count INT DEFAULT 0,
+            {", ".join(f"hour_{h} INT DEFAULT 0" for h in range(24))}
+        )
+        """,
+        ROLLUP_TABLE_SQL,
+    ]),
+    # HOUR(image_time)로 묶거나 거르면 인덱스를 못 쓰므로 시(hour)를 저장 컬럼으로 둔다
+    (2, "detections.image_hour stored generated column", [
+        add_column("detections", "image_hour", "TINYINT AS (HOUR(image_time)) STORED"),
+    ]),
+    (3, "detections composite indexes", [
+        # 기간 조회 + 최신순 정렬 (/api/dashboard/detections)
+        add_index("detections", "idx_det_date_time", "image_date, image_time"),
+        # 날짜 × 시 집계 (롤업 재계산, 히트맵)
+        add_index("detections", "idx_det_date_hour", "image_date, image_hour, object_class"),
+        # 고양이 프로필 (is_cat + cat_id 그룹), 고유 고양이 수
+        add_index("detections", "idx_det_cat", "is_cat, cat_id, image_date"),
+        add_index("detections", "idx_det_date_cat", "image_date, cat_id"),
+    ]),
+    (4, "job_history created_at index", [
+        add_index("job_history", "idx_job_created", "created_at"),
+        add_index("job_history", "idx_job_type_created", "job_type, created_at"),
+    ]),
+    # 월별 RANGE 파티션 (PK -> (id, image_date), 기존 데이터 월 ~ 2개월 뒤 + pmax)
+    (5, "detections monthly partitions", [
+        partition_detections,
+    ]),
+    # 이미지/프레임 차원 테이블 (탐지 행은 image_id로 참조)
+    (6, "images table + detections.image_id backfill", [
+        """
+        CREATE TABLE IF NOT EXISTS images (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            camera VARCHAR(32) NOT NULL,
+            image_date DATE NOT NULL,
+            image_time TIME,
+            source_type ENUM('image', 'video') NOT NULL DEFAULT 'image',
+            frame_index INT NOT NULL DEFAULT 0,
+            image_name VARCHAR(64) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_images (camera, image_date, source_type, image_name, frame_index)
+        )
+        """,
+        add_column("detections", "image_id", "INT NULL"),
+        add_index("detections", "idx_det_image", "image_id"),
+        backfill_images,
+    ]),
+    (7, "drop detections.image_name", [
+        drop_detection_image_name,
+    ]),
+    # 증분 분석 워터마크 (watermarks.py)
+    (8, "analysis_watermarks", [
+        """
+        CREATE TABLE IF NOT EXISTS analysis_watermarks (
+            camera VARCHAR(32) NOT NULL,
+            image_date DATE NOT NULL,
+            last_image VARCHAR(64) NOT NULL,
+            last_mtime VARCHAR(20),
+            images_done INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (camera, image_date)
+        )
+        """,
+    ]),
+    (9, "jobs queue", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            task_id VARCHAR(16) NOT NULL,
+            job_type VARCHAR(32) NOT NULL,
+            description VARCHAR(255) NOT NULL DEFAULT '',
+            payload TEXT,
+            priority SMALLINT NOT NULL DEFAULT 0,
+            status ENUM('queued', 'running', 'completed', 'failed', 'cancelled') NOT NULL DEFAULT 'queued',
+            attempts INT NOT NULL DEFAULT 0,
+            max_attempts INT NOT NULL DEFAULT 3,
+            run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            lease_owner VARCHAR(64),
+            lease_until DATETIME,
+            dedupe_key VARCHAR(191),
+            progress INT NOT NULL DEFAULT 0,
+            total INT NOT NULL DEFAULT 0,
+            current_item VARCHAR(255) NOT NULL DEFAULT '',
+            state TEXT,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME,
+            updated_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3),
+            UNIQUE KEY uq_jobs_task (task_id),
+            UNIQUE KEY uq_jobs_dedupe (dedupe_key),
+            INDEX idx_jobs_claim (status, priority, run_after),
+            INDEX idx_jobs_updated (updated_at)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_logs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            job_id BIGINT NOT NULL,
+            task_id VARCHAR(16) NOT NULL,
+            logged_at VARCHAR(8) NOT NULL,
+            message VARCHAR(1000) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_job_logs_job (job_id)
+        )
+        """,
+    ]),
+    (10, "workers", [
+        """
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id VARCHAR(64) PRIMARY KEY,
+            hostname VARCHAR(64) NOT NULL,
+            pid INT NOT NULL,
+            types VARCHAR(255) NOT NULL DEFAULT '',
+            slots INT NOT NULL DEFAULT 1,
+            status ENUM('running', 'stopping', 'stopped') NOT NULL DEFAULT 'running',
+            active INT NOT NULL DEFAULT 0,
+            stats TEXT,
+            started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_workers_seen (last_seen)
+        )
+        """,
+    ]),
+]
+
+# EXPLAIN으로 확인할 대시보드 쿼리 (이름, SQL, 파라미터)
+PLANNED_QUERIES: List[Tuple[str, str, tuple]] = [
+    ("detections: latest in range", """
+        SELECT d.image_date, d.image_time, d.object_class, i.image_name FROM detections d
+        JOIN images i ON i.id = d.image_id
+        WHERE d.image_date BETWEEN %s AND %s
+        ORDER BY d.image_date DESC, d.image_time DESC LIMIT 50
+    """, ("2026-01-01", "2026-01-07")),
+    ("detections: keyset page", """
+        SELECT d.id, d.image_date, d.image_time FROM detections d
+        JOIN images i ON i.id = d.image_id
+        WHERE d.image_date BETWEEN %s AND %s
+          AND (d.image_date < %s OR (d.image_date = %s AND (d.image_time < %s
+               OR (d.image_time = %s AND d.id < %s))))
+        ORDER BY d.image_date DESC, d.image_time DESC, d.id DESC LIMIT 51
+    """, ("2026-01-01", "2026-01-07", "2026-01-05", "2026-01-05", "12:00:00", "12:00:00", 1000)),
+    ("images: analyzed names", """
+        SELECT image_name FROM images
+        WHERE camera = %s AND image_date = %s AND source_type = 'image'
+    """, ("feed", "2026-01-01")),
+    ("detections: date x hour", """
+        SELECT image_date, image_hour, COUNT(*) FROM detections
+        WHERE image_date BETWEEN %s AND %s
+        GROUP BY image_date, image_hour
+    """, ("2026-01-01", "2026-01-07")),
+    ("stats: unique cats", """
+        SELECT COUNT(DISTINCT cat_id) FROM detections
+        WHERE cat_id IS NOT NULL AND image_date BETWEEN %s AND %s
+    """, ("2026-01-01", "2026-01-07")),
+    ("cats: profiles", """
+        SELECT cat_id, COUNT(*), MIN(image_date), MIN(image_id) FROM detections
+        WHERE is_cat = TRUE AND cat_id IS NOT NULL
+        GROUP BY cat_id
+    """, ()),
+    ("rollups: hourly", """
+        SELECT stat_hour, SUM(detections) FROM detection_rollups
+        WHERE stat_date BETWEEN %s AND %s
+        GROUP BY stat_hour
+    """, ("2026-01-01", "2026-01-07")),
+    ("job_history: recent", """
+        SELECT id, job_type, status FROM job_history
+        WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        ORDER BY created_at DESC LIMIT 100
+    """, (7,)),
+]
+
+
+def ensure_migrations_table(db):
+    """schema_migrations 테이블 생성 (없으면)"""
+    cursor = db.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db.commit()
+    cursor.close()
+
+
+def applied_versions(db) -> List[int]:
+    """적용된 버전 목록"""
+    cursor = db.cursor()
+    cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+    versions = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return versions
+
+
+def pending_migrations(db) -> List[Tuple[int, str, List[Step]]]:
+    """아직 적용되지 않은 마이그레이션"""
+    done = set(applied_versions(db))
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def apply_migrations(db, log: Optional[Callable[[str], None]] = print) -> List[int]:
+    """미적용 마이그레이션 실행 (적용한 버전 목록 반환)
+
+    한 버전의 단계가 모두 성공해야 schema_migrations에 기록한다.
+    """
+    ensure_migrations_table(db)
+    cursor = db.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError("마이그레이션 잠금 획득 실패 (다른 프로세스가 실행 중)")
+
+    applied = []
+    try:
+        for version, name, steps in pending_migrations(db):
+            if log:
+                log(f"마이그레이션 {version}: {name}")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            db.commit()
+            applied.append(version)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+    return applied
+
+
+def verify_plans(db) -> List[dict]:
+    """PLANNED_QUERIES 실행 계획 확인
+
+    모든 테이블 접근이 인덱스를 쓰면(type이 ALL이 아니고 key가 있으면) ok.
+    """
+    cursor = db.cursor(dictionary=True)
+    results = []
+    for name, sql, params in PLANNED_QUERIES:
+        try:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+        except Exception as e:
+            results.append({"name": name, "ok": False, "error": str(e)})
+            continue
+        keys = [row.get("key") for row in plan]
+        full_scan = [row["table"] for row in plan
+                     if row.get("table") and (row.get("type") == "ALL" or not row.get("key"))]
+        results.append({
+            "name": name,
+            "ok": not full_scan,
+            "keys": keys,
+            "rows": sum(int(row.get("rows") or 0) for row in plan),
+            "partitions": [row.get("partitions") for row in plan if row.get("partitions")],
+            "full_scan": full_scan,
+        })
+    cursor.close()
+    return results
+
+
+def migration_status(db) -> dict:
+    """적용 현황 (최신 버전, 미적용 목록)"""
+    ensure_migrations_table(db)
+    done = applied_versions(db)
+    return {
+        "current": max(done) if done else 0,
+        "latest": MIGRATIONS[-1][0],
+        "applied": done,
+        "pending": [{"version": v, "name": n} for v, n, _ in MIGRATIONS if v not in done],
+    }
+
+
+def main():
+    """마이그레이션 CLI"""
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="SSIRN 스키마 마이그레이션")
+    parser.add_argument("--status", action="store_true", help="적용 현황만 출력")
+    parser.add_argument("--explain", action="store_true", help="실행 계획만 확인")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'ssirn')
+    )
+    try:
+        if args.status:
+            status = migration_status(db)
+            print(f"schema version {status['current']} / {status['latest']}")
+            for m in status["pending"]:
+                print(f"  pending {m['version']}: {m['name']}")
+            return
+
+        if not args.explain:
+            applied = apply_migrations(db)
+            print(f"{len(applied)}개 마이그레이션 적용" if applied else "적용할 마이그레이션 없음")
+
+        ok = True
+        for plan in verify_plans(db):
+            ok = ok and plan["ok"]
+            detail = plan.get("error") or f"keys={plan['keys']} rows~{plan['rows']}"
+            print(f"  {'OK  ' if plan['ok'] else 'SCAN'} {plan['name']}: {detail}")
+        if not ok:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+SSIRN 대시보드 응답 캐시 (TTL + single-flight + 날짜별 무효화)
+
+admin.html은 탭마다 10초 간격으로 stats/detections/heatmap을 다시 요청하고, 공개 gallery.html은
+페이지를 열 때마다 같은 통계를 요청한다. 같은 집계를 매번 MySQL에서 다시 계산하지 않도록
+(엔드포인트, 정규화된 쿼리 파라미터) 단위로 결과를 잠시 보관한다.
+
+- 같은 키를 동시에 여러 요청이 찾으면 한 요청만 계산하고 나머지는 그 결과를 기다린다 (single-flight)
+- 항목은 조회 기간(from, to)을 기억하고, DetectionWriter가 커밋한 날짜가 기간에 들어가는
+  항목만 지운다 (기간 없는 조회는 모든 날짜에 해당)
+- 계산 중에 무효화가 일어나면 그 결과는 반환만 하고 저장하지 않는다 (오래된 값 고정 방지)
+
+사용법:
+    cache = ResponseCache()
+    result = await cache.get_or_compute("stats", {"from": f, "to": t}, ttl, compute, (f, t))
+    cache.invalidate_dates({"2026-02-04"})   # 커밋된 날짜 (다른 스레드에서 호출 가능)
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+DateRange = Tuple[Optional[str], Optional[str]]
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """YYYYMMDD / YYYY-MM-DD -> YYYY-MM-DD (없으면 None)"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+    return value[:10]
+
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> CacheKey:
+    """(엔드포인트, 정렬된 파라미터) - 값이 없는 파라미터는 빼서 ?camera= 와 생략을 같게 본다"""
+    return endpoint, tuple(sorted((k, str(v)) for k, v in params.items() if v not in (None, "")))
+
+
+class ResponseCache:
+    """엔드포인트 결과 TTL 캐시 (항목 접근은 스레드 안전, 계산은 이벤트 루프에서)"""
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        # 키 -> (만료 시각, 기간(from, to), 값)
+        self._entries: Dict[CacheKey, Tuple[float, DateRange, Any]] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._generation = 0  # 무효화마다 증가 (계산 중 무효화 감지)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0, "evicted": 0}
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """캐시된 값 (없거나 만료면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            return entry[2]
+
+    def set(self, key: CacheKey, value: Any, ttl: float, date_range: DateRange = (None, None)):
+        """값 저장"""
+        date_range = (normalize_date(date_range[0]), normalize_date(date_range[1]))
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._purge_expired()
+                if len(self._entries) >= self.max_entries:
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    del self._entries[oldest]
+                    self._stats["evicted"] += 1
+            self._entries[key] = (time.monotonic() + ttl, date_range, value)
+
+    async def get_or_compute(self, endpoint: str, params: Dict[str, Any], ttl: float,
+                             compute: Callable[[], Awaitable[Any]],
+                             date_range: DateRange = (None, None),
+                             cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """캐시 조회, 없으면 compute() 한 번만 실행해 저장 후 반환
+
+        cacheable(value)가 False인 결과(예: 실패 응답)는 저장하지 않는다.
+        """
+        key = cache_key(endpoint, params)
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            with self._lock:
+                self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        with self._lock:
+            self._stats["misses"] += 1
+            generation = self._generation
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 기다리는 요청이 없을 때 "never retrieved" 경고 방지
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                stale = generation != self._generation
+            if not stale and cacheable(value):
+                self.set(key, value, ttl, date_range)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate_dates(self, dates: Iterable[str]):
+        """해당 날짜를 포함하는 기간의 항목 삭제 (기간 없는 항목 포함)"""
+        dates = {normalize_date(d) for d in dates if d}
+        if not dates:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                start, end = self._entries[key][1]
+                if any((start is None or start <= d) and (end is None or d <= end) for d in dates):
+                    del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def invalidate_endpoint(self, endpoint: str):
+        """엔드포인트의 모든 항목 삭제"""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[0] == endpoint]:
+                del self._entries[key]
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        """전체 삭제 (롤업 재계산, 보존 정책 삭제 후)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def _purge_expired(self):
+        """만료 항목 정리 (lock 안에서 호출)"""
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if entry[0] < now]:
+            del self._entries[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                **self._stats,
+                "hit_rate": round((self._stats["hits"] + self._stats["coalesced"]) / lookups, 3) if lookups else 0,
+            }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+SSIRN detections 월별 파티션 + 보존 정책
+
+detections는 image_date 기준 월별 RANGE COLUMNS 파티션으로 나뉜다 (migrations 5).
+대시보드의 기간 조회는 해당 월 파티션만 읽고(파티션 프루닝), 오래된 원본은
+DELETE 대신 파티션 DROP으로 즉시 지운다.
+
+유지보수 (AutoScheduler가 매일 실행):
+  1. 앞으로 쓸 월 파티션 미리 생성 (pmax 분할, pmax가 비어 있으면 즉시 끝남)
+  2. 보존 기간(N일)이 지난 구간은 롤업이 원본과 맞는지 확인하고, 다르면 재계산
+  3. 보존 기간이 통째로 지난 파티션은 DROP, 경계 월은 배치 DELETE (images 행도 삭제)
+
+사용법:
+    python retention.py --days 365          # 유지보수 실행
+    python retention.py --days 365 --dry-run
+    python retention.py --list              # 파티션 목록
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from typing import Callable, List, Optional
+
+from rollups import rebuild_rollups
+
+DELETE_BATCH = 10000  # 경계 월 DELETE 한 번에 지울 행 수 (잠금 시간 제한)
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    """월 단위 이동 (항상 1일 기준)"""
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    """월 파티션 이름 (p202602 = 2026-02)"""
+    return f"p{start:%Y%m}"
+
+
+def partition_clause(start: date) -> str:
+    """start가 속한 월의 파티션 정의"""
+    return f"PARTITION {partition_name(start)} VALUES LESS THAN ('{add_months(start, 1).isoformat()}')"
+
+
+def initial_partitions_sql(first: date, last: date) -> str:
+    """first ~ last 월 파티션 + pmax로 detections를 파티셔닝하는 ALTER 문"""
+    months = []
+    current = month_start(first)
+    while current <= month_start(last):
+        months.append(partition_clause(current))
+        current = add_months(current, 1)
+    months.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ("ALTER TABLE detections PARTITION BY RANGE COLUMNS (image_date) (\n    "
+            + ",\n    ".join(months) + "\n)")
+
+
+def partition_detections(cursor):
+    """detections를 월별 파티션으로 전환 (migrations 5 단계, 이미 파티션이면 건너뜀)
+
+    파티션 키는 모든 유니크 키에 포함돼야 하므로 PK를 (id, image_date)로 바꾼다.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections' AND PARTITION_NAME IS NOT NULL
+    """)
+    if cursor.fetchone()[0] > 0:
+        return
+
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections'
+          AND CONSTRAINT_NAME = 'PRIMARY' AND COLUMN_NAME = 'image_date'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("ALTER TABLE detections DROP PRIMARY KEY, ADD PRIMARY KEY (id, image_date)")
+
+    cursor.execute("SELECT MIN(image_date) FROM detections")
+    first = cursor.fetchone()[0] or date.today()
+    cursor.execute(initial_partitions_sql(first, add_months(date.today(), 2)))
+
+
+def list_partitions(db) -> List[dict]:
+    """detections 파티션 목록 [{name, until, rows}] (until: 상한 날짜, pmax는 None)
+
+    rows는 information_schema 추정치.
+    """
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'detections' AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    partitions = []
+    for name, description, rows in cursor.fetchall():
+        until = None
+        if description and description != "MAXVALUE":
+            until = date.fromisoformat(description.strip("'"))
+        partitions.append({"name": name, "until": until, "rows": int(rows or 0)})
+    cursor.close()
+    return partitions
+
+
+def ensure_future_partitions(db, months_ahead: int = 2) -> List[str]:
+    """이번 달 + months_ahead개월 파티션이 없으면 pmax를 나눠 생성 (생성한 이름 목록)"""
+    partitions = list_partitions(db)
+    bounds = [p["until"] for p in partitions if p["until"]]
+    if not partitions or not bounds:
+        return []
+    target = add_months(month_start(date.today()), months_ahead + 1)
+    new = []
+    current = max(bounds)
+    while current < target:
+        new.append(current)
+        current = add_months(current, 1)
+    if not new:
+        return []
+
+    cursor = db.cursor()
+    clauses = [partition_clause(start) for start in new]
+    clauses.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    cursor.execute("ALTER TABLE detections REORGANIZE PARTITION pmax INTO (" + ", ".join(clauses) + ")")
+    cursor.close()
+    return [partition_name(start) for start in new]
+
+
+def verify_rollups(db, from_date: date, to_date: date) -> bool:
+    """기간의 롤업 합계가 원본 행 수와 같은지"""
+    cursor = db.cursor()
+    cursor.execute("""
+        SELECT COUNT(*) FROM detections
+        WHERE image_date BETWEEN %s AND %s AND image_hour IS NOT NULL
+    """, (from_date, to_date))
+    raw = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COALESCE(SUM(detections), 0) FROM detection_rollups
+        WHERE stat_date BETWEEN %s AND %s
+    """, (from_date, to_date))
+    rolled = int(cursor.fetchone()[0])
+    cursor.close()
+    return raw == rolled
+
+
+def apply_retention(db, keep_days: int, dry_run: bool = False,
+                    log: Optional[Callable[[str], None]] = None) -> dict:
+    """보존 기간이 지난 원본 삭제 (롤업 확인 후)
+
+    cutoff(오늘 - keep_days) 이전 행이 대상. 상한이 cutoff 이하인 파티션은 DROP,
+    cutoff가 걸친 월은 DELETE ... LIMIT 반복. 파티션이 없는 테이블도 DELETE로 동작한다.
+    롤업이 원본과 다르면 rebuild_rollups로 재계산한 뒤 지운다. 확인은 남아 있는 원본의 첫 날짜부터
+    (이전 실행에서 원본을 지운 날짜는 롤업만 남아 있으므로 비교/재계산하면 집계가 사라진다).
+    """
+    log = log or (lambda msg: None)
+    cutoff = date.today() - timedelta(days=keep_days)
+    result = {"cutoff": cutoff.isoformat(), "rolled_up": [], "dropped": [], "deleted_rows": 0}
+
+    cursor = db.cursor()
+    cursor.execute("SELECT MIN(image_date) FROM detections WHERE image_date < %s", (cutoff,))
+    first = cursor.fetchone()[0]
+    cursor.close()
+    if first is None:
+        return result
+
+    # 1. 롤업 확인 (월 단위, 원본이 남아 있는 구간만)
+    current = month_start(first)
+    while current < cutoff:
+        start = max(current, first)
+        last = min(add_months(current, 1), cutoff) - timedelta(days=1)
+        if not verify_rollups(db, start, last):
+            log(f"[보존] 롤업 재계산 {start} ~ {last}")
+            if not dry_run:
+                rebuild_rollups(db, start.isoformat(), last.isoformat())
+            result["rolled_up"].append(f"{start}~{last}")
+        current = add_months(current, 1)
+
+    # 2. 통째로 지난 파티션 DROP
+    expired = [p for p in list_partitions(db) if p["until"] and p["until"] <= cutoff]
+    if expired:
+        names = [p["name"] for p in expired]
+        log(f"[보존] 파티션 삭제 {', '.join(names)}")
+        if not dry_run:
+            cursor = db.cursor()
+            cursor.execute(f"ALTER TABLE detections DROP PARTITION {', '.join(names)}")
+            cursor.close()
+        result["dropped"] = names
+
+    # 3. 경계 월 (또는 파티션 없는 테이블) 배치 DELETE
+    if not dry_run:
+        cursor = db.cursor()
+        while True:
+            cursor.execute("DELETE FROM detections WHERE image_date < %s LIMIT %s", (cutoff, DELETE_BATCH))
+            deleted = cursor.rowcount
+            db.commit()
+            result["deleted_rows"] += deleted
+            if deleted < DELETE_BATCH:
+                break
+        # 4. 탐지가 모두 지워진 날짜의 images 행
+        result["deleted_images"] = 0
+        while True:
+            cursor.execute("DELETE FROM images WHERE image_date < %s LIMIT %s", (cutoff, DELETE_BATCH))
+            deleted = cursor.rowcount
+            db.commit()
+            result["deleted_images"] += deleted
+            if deleted < DELETE_BATCH:
+                break
+        cursor.close()
+        if result["deleted_rows"]:
+            log(f"[보존] {cutoff} 이전 {result['deleted_rows']}행 삭제 (images {result['deleted_images']}행)")
+    return result
+
+
+def run_maintenance(db, keep_days: int, dry_run: bool = False,
+                    log: Optional[Callable[[str], None]] = None) -> dict:
+    """파티션 생성 + 보존 정책 (keep_days가 0 이하면 삭제 안 함)"""
+    created = [] if dry_run else ensure_future_partitions(db)
+    if created and log:
+        log(f"[보존] 파티션 생성 {', '.join(created)}")
+    result = {"created": created}
+    if keep_days > 0:
+        result.update(apply_retention(db, keep_days, dry_run, log))
+    return result
+
+
+def main():
+    """보존 정책 CLI"""
+    import mysql.connector
+    from dotenv import load_dotenv
+    from migrations import apply_migrations
+
+    parser = argparse.ArgumentParser(description="detections 파티션/보존 정책 유지보수")
+    parser.add_argument("--days", type=int, default=int(os.getenv("DETECTION_RETENTION_DAYS", 365)),
+                        help="원본 보존 일수 (0이면 삭제 안 함)")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--list", action="store_true", help="파티션 목록만 출력")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'ssirn')
+    )
+    try:
+        if args.list:
+            for p in list_partitions(db):
+                print(f"  {p['name']:<10} < {p['until'] or 'MAXVALUE'}  ~{p['rows']:,} rows")
+            return
+        apply_migrations(db)
+        result = run_maintenance(db, args.days, args.dry_run, log=print)
+    except Exception as e:
+        print(f"유지보수 실패: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+SSIRN 탐지 롤업 테이블 (날짜 × 카메라 × 클래스 × 시)
+
+대시보드 통계/히트맵은 detections 원본을 매번 집계하는 대신 이 테이블을 읽는다.
+(비용이 탐지 수가 아니라 날짜 수 × 24에 비례)
+평소에는 DetectionWriter가 탐지 INSERT와 같은 트랜잭션에서 증가분을 upsert하고,
+롤업이 없던 과거 데이터나 어긋난 구간은 rebuild로 detections에서 다시 계산한다.
+
+사용법:
+    python rollups.py                                   # 전체 기간 재계산
+    python rollups.py --from 2026-02-01 --to 2026-02-29
+    python rollups.py --from 2026-02-01 --camera feed   # 한 카메라만
+"""
+import argparse
+import os
+import sys
+from typing import Optional
+
+# 테이블 생성은 migrations.py (baseline 마이그레이션)
+ROLLUP_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS detection_rollups (
+        stat_date DATE NOT NULL,
+        camera VARCHAR(32) NOT NULL,
+        object_class VARCHAR(20) NOT NULL,
+        stat_hour TINYINT NOT NULL,
+        detections INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (stat_date, camera, object_class, stat_hour)
+    )
+"""
+
+# DetectionWriter flush에서 executemany로 사용 (같은 트랜잭션)
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO detection_rollups (stat_date, camera, object_class, stat_hour, detections)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE detections = detections + VALUES(detections)
+"""
+
+
+def rebuild_rollups(db, from_date: Optional[str] = None, to_date: Optional[str] = None,
+                    camera: Optional[str] = None) -> int:
+    """detections에서 기간 롤업 재계산 (한 트랜잭션: 기존 행 삭제 후 다시 집계)
+
+    image_hour 생성 컬럼(migrations 2)과 idx_det_date_hour 인덱스를 사용하고,
+    카메라는 images(migrations 6)에서 가져온다. camera가 없으면 모든 카메라.
+    시작일은 남아 있는 원본의 첫 날짜 이후로 맞춘다 (보존 기간으로 원본을 지운 날짜는 롤업만 남음).
+    반환값은 새로 만든 롤업 행 수.
+    """
+    cursor = db.cursor()
+    try:
+        cursor.execute("SELECT MIN(image_date), MAX(image_date) FROM detections")
+        first, last = cursor.fetchone()
+        if first is None:
+            return 0
+        from_date = max(from_date or str(first), str(first))
+        to_date = to_date or str(last)
+        if from_date > to_date:
+            return 0
+
+        camera_filter, camera_params = (" AND camera = %s", [camera]) if camera else ("", [])
+        cursor.execute(f"""
+            DELETE FROM detection_rollups
+            WHERE stat_date BETWEEN %s AND %s{camera_filter}
+        """, [from_date, to_date, *camera_params])
+        cursor.execute(f"""
+            INSERT INTO detection_rollups (stat_date, camera, object_class, stat_hour, detections)
+            SELECT d.image_date, i.camera, d.object_class, d.image_hour, COUNT(*)
+            FROM detections d
+            JOIN images i ON i.id = d.image_id
+            WHERE d.image_date BETWEEN %s AND %s AND d.image_hour IS NOT NULL{camera_filter.replace("camera", "i.camera")}
+            GROUP BY d.image_date, i.camera, d.image_hour, d.object_class
+        """, [from_date, to_date, *camera_params])
+        rows = cursor.rowcount
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main():
+    """롤업 재계산 CLI"""
+    import mysql.connector
+    from dotenv import load_dotenv
+    from migrations import apply_migrations
+
+    parser = argparse.ArgumentParser(description="detection_rollups 재계산 (detections 기준)")
+    parser.add_argument("--from", dest="from_date", help="시작 날짜 YYYY-MM-DD (기본: 가장 오래된 탐지)")
+    parser.add_argument("--to", dest="to_date", help="끝 날짜 YYYY-MM-DD (기본: 가장 최근 탐지)")
+    parser.add_argument("--camera", help="카메라 (기본: 전체)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'ssirn')
+    )
+    try:
+        apply_migrations(db)
+        rows = rebuild_rollups(db, args.from_date, args.to_date, args.camera)
+    except Exception as e:
+        print(f"롤업 재계산 실패: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"detection_rollups: {rows}개 행 재계산 ({args.from_date or '처음'} ~ {args.to_date or '끝'}, {args.camera or '전체 카메라'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+SSIRN 시스템 상태 샘플러 (/proc 직접 읽기)
+
+/api/system/status는 호출마다 top, free, df, ss를 실행하고 포트마다 lsof, ps, ss를 다시 실행했다
+(systemd 서비스명 조회까지 합치면 15번 이상 fork, 수 초). 관리자 화면이 5초마다 부르므로
+백그라운드 스레드가 일정 주기로 /proc/stat, /proc/meminfo, statvfs, /proc/net/tcp(6),
+/proc/<pid>/를 읽어 최신 스냅샷과 최근 기록(링 버퍼)을 보관하고, 엔드포인트는 그것을 돌려준다.
+
+- CPU 사용률: 직전 샘플과의 /proc/stat 차이 (top과 같은 순간값)
+- 프로세스 CPU: /proc/<pid>/stat utime+stime 차이 / 경과 시간 (top 방식, 멀티코어면 100% 초과 가능)
+- 포트 -> PID: /proc/net/tcp의 소켓 inode를 /proc/*/fd 링크에서 찾는다 (새 inode가 보일 때만 검색)
+  다른 사용자 프로세스는 root가 아니면 fd를 읽을 수 없어 pid가 비는데, lsof도 같은 제한이 있다
+
+사용법:
+    sampler = SystemSampler({8002: "SSIRN"}, interval=5, history=120)
+    sampler.start()
+    sampler.latest()       # 마지막 스냅샷 (cpu, memory, disk, services)
+    sampler.get_history()  # [{time, cpu, mem, disk, connections}, ...]
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+PROC = "/proc"
+TCP_LISTEN = "0A"
+TCP_ESTABLISHED = "01"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+OWNER_RESCAN_SEC = 60  # 주인을 못 찾은 소켓(권한 없음 등)을 다시 검색하는 최소 간격
+
+
+def read_cpu_times() -> Tuple[int, int]:
+    """/proc/stat 전체 CPU (idle + iowait, 합계) jiffies"""
+    with open(f"{PROC}/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    return idle, sum(values[:8])
+
+
+def read_meminfo() -> Dict[str, int]:
+    """/proc/meminfo (kB)"""
+    info = {}
+    with open(f"{PROC}/meminfo") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            info[key] = int(rest.split()[0])
+    return info
+
+
+def human_size(size: float) -> str:
+    """df -h 형식 크기 (1024 단위, 10 미만은 소수점 한 자리)"""
+    for unit in ("B", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            break
+        size /= 1024
+    if unit == "B":
+        return f"{int(size)}B"
+    return f"{math.ceil(size * 10) / 10:.1f}{unit}" if size < 10 else f"{math.ceil(size)}{unit}"
+
+
+def disk_usage(path: str = "/") -> dict:
+    """statvfs 디스크 사용량 (df와 같은 used / (used + avail) 비율)"""
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    percent = math.ceil(used * 100 / (used + avail)) if used + avail else 0
+    return {"total": human_size(total), "used": human_size(used), "free": human_size(avail),
+            "percent": percent}
+
+
+def read_tcp_sockets() -> List[Tuple[int, str, int]]:
+    """/proc/net/tcp + tcp6 -> [(로컬 포트, 상태, inode)]"""
+    sockets = []
+    for name in ("tcp", "tcp6"):
+        try:
+            with open(f"{PROC}/net/{name}") as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    port = int(fields[1].rsplit(":", 1)[1], 16)
+                    sockets.append((port, fields[3], int(fields[9])))
+        except OSError:
+            continue
+    return sockets
+
+
+def socket_owners(inodes: Set[int]) -> Dict[int, int]:
+    """소켓 inode -> PID (/proc/*/fd 링크 검색, 읽을 수 없는 프로세스는 건너뜀)"""
+    owners = {}
+    if not inodes:
+        return owners
+    targets = {f"socket:[{inode}]": inode for inode in inodes}
+    for entry in os.listdir(PROC):
+        if not entry.isdigit():
+            continue
+        fd_dir = f"{PROC}/{entry}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                inode = targets.get(os.readlink(f"{fd_dir}/{fd}"))
+            except OSError:
+                continue
+            if inode is not None and inode not in owners:
+                owners[inode] = int(entry)
+        if len(owners) == len(targets):
+            break
+    return owners
+
+
+def port_pids(port: int) -> List[int]:
+    """포트에서 LISTEN 중인 프로세스 PID 목록 (lsof -i :port -t 대체)"""
+    inodes = {inode for p, state, inode in read_tcp_sockets() if p == port and state == TCP_LISTEN}
+    return sorted(set(socket_owners(inodes).values()))
+
+
+def service_unit(pid: int) -> Optional[str]:
+    """PID의 systemd 서비스 유닛 이름 (/proc/<pid>/cgroup)"""
+    try:
+        with open(f"{PROC}/{pid}/cgroup") as f:
+            match = re.search(r'/([^/]+)\.service', f.read())
+        return match.group(1) if match else None
+    except OSError:
+        return None
+
+
+def process_usage(pid: int) -> Optional[Tuple[int, int, int]]:
+    """(시작 시각 jiffies, utime+stime jiffies, RSS bytes), 프로세스가 없으면 None"""
+    try:
+        with open(f"{PROC}/{pid}/stat") as f:
+            # comm에 공백/괄호가 있을 수 있으므로 마지막 ')' 뒤부터 나눈다
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"{PROC}/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    # fields[0]은 원래 필드 3(state): utime=14, stime=15, starttime=22
+    return int(fields[19]), int(fields[11]) + int(fields[12]), rss_pages * PAGE_SIZE
+
+
+class SystemSampler:
+    """주기적 시스템 상태 샘플링 (스레드 1개, 결과는 스레드 안전하게 조회)
+
+    - ports: 항상 표시할 포트 -> 이름 (LISTEN이 아니면 down)
+    - port_range: 이 범위에서 LISTEN 중인 포트도 자동 표시
+    - history: 보관할 샘플 수 (interval × history 초 만큼의 기록)
+    """
+    def __init__(self, ports: Dict[int, str], port_range: Tuple[int, int] = (8000, 8099),
+                 interval: float = 5.0, history: int = 120, disk_path: str = "/",
+                 max_services: int = 10):
+        self.ports = dict(ports)
+        self.port_range = port_range
+        self.interval = interval
+        self.disk_path = disk_path
+        self.max_services = max_services
+
+        self._history: Deque[dict] = deque(maxlen=history)
+        self._latest: Optional[dict] = None
+        self._prev_cpu: Optional[Tuple[int, int]] = None
+        self._prev_proc: Dict[int, Tuple[int, int, float]] = {}  # pid -> (시작 시각, jiffies, monotonic)
+        self._owners: Dict[int, int] = {}  # 소켓 inode -> pid
+        self._unresolved: Set[int] = set()
+        self._owner_scan_at = 0.0
+        self._units: Dict[Tuple[int, int], Optional[str]] = {}  # (pid, 시작 시각) -> 서비스 유닛
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"samples": 0, "errors": 0, "owner_scans": 0, "sample_ms": 0.0}
+
+    # ---------- 수집 ----------
+    def _cpu_usage(self) -> float:
+        idle, total = read_cpu_times()
+        if self._prev_cpu is None:
+            # 첫 샘플은 비교 대상이 없으므로 잠깐 기다려 차이를 잰다
+            self._prev_cpu = (idle, total)
+            time.sleep(0.2)
+            idle, total = read_cpu_times()
+        prev_idle, prev_total = self._prev_cpu
+        self._prev_cpu = (idle, total)
+        delta = total - prev_total
+        return round(100 * (1 - (idle - prev_idle) / delta), 1) if delta > 0 else 0.0
+
+    def _resolve_owners(self, inodes: Set[int]):
+        """모르는 LISTEN 소켓이 생겼을 때만 /proc/*/fd 검색"""
+        self._owners = {inode: pid for inode, pid in self._owners.items() if inode in inodes}
+        unknown = inodes - set(self._owners)
+        if not unknown:
+            return
+        # 권한 등으로 이미 못 찾은 소켓만 남았으면 OWNER_RESCAN_SEC마다만 다시 검색
+        if unknown <= self._unresolved and time.monotonic() - self._owner_scan_at < OWNER_RESCAN_SEC:
+            return
+        self._owners.update(socket_owners(unknown))
+        self._unresolved = inodes - set(self._owners)
+        self._owner_scan_at = time.monotonic()
+        self._stats["owner_scans"] += 1
+
+    def _process_stats(self, pid: int, mem_total_kb: int, now: float) -> Tuple[str, str, Optional[str]]:
+        """(cpu%, mem%, 서비스 유닛) - ps 출력처럼 문자열"""
+        usage = process_usage(pid)
+        if usage is None:
+            return "0", "0", None
+        start, jiffies, rss = usage
+        cpu = 0.0
+        prev = self._prev_proc.get(pid)
+        if prev and prev[0] == start and now > prev[2]:
+            cpu = (jiffies - prev[1]) / CLK_TCK / (now - prev[2]) * 100
+        self._prev_proc[pid] = (start, jiffies, now)
+        key = (pid, start)
+        if key not in self._units:
+            self._units[key] = service_unit(pid)
+        mem = rss / (mem_total_kb * 1024) * 100 if mem_total_kb else 0
+        return f"{cpu:.1f}", f"{mem:.1f}", self._units[key]
+
+    def _services(self, mem_total_kb: int) -> Tuple[List[dict], int]:
+        low, high = self.port_range
+        listen: Dict[int, Set[int]] = {}
+        connections: Dict[int, int] = {}
+        for port, state, inode in read_tcp_sockets():
+            if state == TCP_LISTEN and (low <= port <= high or port in self.ports):
+                listen.setdefault(port, set()).add(inode)
+            elif state == TCP_ESTABLISHED:
+                connections[port] = connections.get(port, 0) + 1
+        self._resolve_owners(set().union(*listen.values()) if listen else set())
+
+        now = time.monotonic()
+        services = []
+        seen_pids = set()
+        for port in sorted(set(self.ports) | set(listen)):
+            service = {
+                "port": port,
+                "name": self.ports.get(port),
+                "status": "running" if port in listen else "down",
+                "pid": None,
+                "cpu": "0",
+                "mem": "0",
+                "connections": connections.get(port, 0) if port in listen else 0,
+            }
+            pids = sorted({self._owners[i] for i in listen.get(port, ()) if i in self._owners})
+            unit = None
+            if pids:
+                service["pid"] = str(pids[0])
+                service["cpu"], service["mem"], unit = self._process_stats(pids[0], mem_total_kb, now)
+                seen_pids.add(pids[0])
+            service["name"] = service["name"] or unit or f"서비스-{port}"
+            services.append(service)
+
+        # 사라진 프로세스 정리
+        self._prev_proc = {pid: v for pid, v in self._prev_proc.items() if pid in seen_pids}
+        self._units = {key: unit for key, unit in self._units.items() if key[0] in seen_pids}
+        return services[:self.max_services], sum(s["connections"] for s in services)
+
+    def sample(self) -> dict:
+        """한 번 샘플링해 latest/history 갱신 후 스냅샷 반환"""
+        start = time.monotonic()
+        with self._lock:
+            cpu = self._cpu_usage()
+            mem = read_meminfo()
+            mem_total = mem.get("MemTotal", 0)
+            mem_used = mem_total - mem.get("MemAvailable", mem.get("MemFree", 0))
+            disk = disk_usage(self.disk_path)
+            services, connections = self._services(mem_total)
+
+            snapshot = {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "cpu": {"usage": cpu, "cores": os.cpu_count()},
+                "memory": {
+                    "total_mb": mem_total // 1024,
+                    "used_mb": mem_used // 1024,
+                    "free_mb": mem.get("MemFree", 0) // 1024,
+                    "percent": round(mem_used / mem_total * 100, 1) if mem_total else 0,
+                },
+                "disk": disk,
+                "services": services,
+            }
+            self._latest = snapshot
+            self._history.append({
+                "time": snapshot["time"][11:],
+                "cpu": cpu,
+                "mem": snapshot["memory"]["percent"],
+                "disk": disk["percent"],
+                "connections": connections,
+            })
+            self._stats["samples"] += 1
+            self._stats["sample_ms"] = round((time.monotonic() - start) * 1000, 1)
+        return snapshot
+
+    # ---------- 백그라운드 ----------
+    def start(self):
+        """interval(초)마다 샘플링하는 스레드 시작"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"System sampler error: {e}")
+            self._stop.wait(self.interval)
+
+    # ---------- 조회 ----------
+    def latest(self) -> Optional[dict]:
+        """마지막 스냅샷 (아직 없으면 None)"""
+        with self._lock:
+            return self._latest
+
+    def get_history(self, points: Optional[int] = None) -> List[dict]:
+        """최근 기록 (오래된 것부터, points개)"""
+        with self._lock:
+            history = list(self._history)
+        return history[-points:] if points else history
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"interval": self.interval, "history": len(self._history), **self._stats}
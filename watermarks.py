@@ -0,0 +1,73 @@
+"""
+SSIRN 분석 워터마크 (카메라 × 날짜)
+
+정기 분석은 매번 날짜의 모든 파일을 확인하는 대신, 마지막으로 "그 앞까지 전부 처리된"
+파일(이름, 수정 시각)을 analysis_watermarks에 기록하고 다음 회차에는 그 이후 파일만 본다.
+중간에 실패한 파일이 있으면 워터마크는 그 앞에서 멈추므로 다음 회차에 다시 시도된다.
+(이미 저장된 이미지는 images 유니크 키 때문에 DetectionWriter가 건너뛰어 다시 저장되지 않음)
+
+사용법:
+    mark = get_watermark(db, "feed", "2026-02-04")
+    files = archive_catalog.files_since("feed", "20260204", *watermark_args(mark))
+    ...
+    advance_watermark(db, "feed", "2026-02-04", files, finished_names)
+"""
+from typing import Iterable, List, Optional, Tuple
+
+
+def get_watermark(db, camera: str, image_date: str) -> Optional[dict]:
+    """워터마크 조회 (없으면 None)"""
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT last_image, last_mtime, images_done, updated_at
+        FROM analysis_watermarks WHERE camera = %s AND image_date = %s
+    """, (camera, image_date))
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def watermark_args(mark: Optional[dict]) -> Tuple[Optional[str], Optional[str]]:
+    """ArchiveCatalog.files_since 인자 (after_name, after_mtime)"""
+    if not mark:
+        return None, None
+    return mark["last_image"], mark["last_mtime"]
+
+
+def completed_prefix(files: List[tuple], finished: Iterable[str]) -> List[tuple]:
+    """시간순 파일 중 앞에서부터 연속으로 끝난 부분 (첫 미완료 파일 전까지)"""
+    finished = set(finished)
+    prefix = []
+    for item in sorted(files):
+        if item[0] not in finished:
+            break
+        prefix.append(item)
+    return prefix
+
+
+def advance_watermark(db, camera: str, image_date: str, files: List[tuple],
+                      finished: Iterable[str]) -> Optional[dict]:
+    """이번 회차 결과로 워터마크 전진 (files: [(name, mtime)], 뒤로 가지는 않음)
+
+    반환값은 새 워터마크 (전진하지 않았으면 None).
+    """
+    prefix = completed_prefix(files, finished)
+    if not prefix:
+        return None
+    last_image = prefix[-1][0]
+    mtimes = [mtime for _, mtime in prefix if mtime]
+    last_mtime = max(mtimes) if mtimes else None
+
+    cursor = db.cursor()
+    cursor.execute("""
+        INSERT INTO analysis_watermarks (camera, image_date, last_image, last_mtime, images_done)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            last_image = GREATEST(last_image, VALUES(last_image)),
+            last_mtime = GREATEST(COALESCE(last_mtime, ''), COALESCE(VALUES(last_mtime), '')),
+            images_done = images_done + VALUES(images_done)
+    """, (camera, image_date, last_image, last_mtime, len(prefix)))
+    db.commit()
+    cursor.close()
+    return {"last_image": last_image, "last_mtime": last_mtime, "images_done": len(prefix)}
+
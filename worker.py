@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+SSIRN 작업 큐 워커 - jobs 테이블의 변환/리사이즈/분석 작업을 가져와 실행
+
+웹 서버(main.py)는 작업을 넣고 상태만 보여 준다. 이 프로세스는 main.py의 작업 함수를 그대로 쓰되
+TaskManager의 이벤트를 JobReporter로 받아 진행률/로그를 jobs/job_logs에 기록한다.
+
+웹 서버가 JOB_SPAWN_WORKERS개(기본 1)를 직접 띄운다. 워커를 systemd 서비스로 따로 돌릴 때는
+웹 서버에 JOB_SPAWN_WORKERS=0을 주고 같은 호스트에서 이 스크립트를 --catalog-host로 실행한다.
+SIGTERM/SIGINT를 받으면 새 작업을 가져오지 않고 실행 중인 작업을 마친 뒤 종료한다.
+
+LAN의 다른 머신: 같은 코드와 .env(DB_*, FTP_*)를 두고 이 스크립트만 실행하면 workers 테이블에
+등록되고 분석 작업을 나눠 가져간다. 언제든 꺼도 되며 (kill -9 포함) 못 마친 작업은 리스가 끝나면
+다른 워커가 다시 실행한다. 유형별 한도(JOB_LIMITS)는 모든 머신에서 같은 값을 쓴다.
+변환/리사이즈(FILE_JOB_TYPES)는 동영상 존재/원본 삭제를 웹 서버 호스트의 catalog.db에 기록해야 하므로
+--catalog-host로 띄운 워커만 실행한다 (분석 결과는 MySQL에 있어 어느 머신에서 해도 같다).
+
+사용법:
+    python worker.py --catalog-host                    # 웹 서버 호스트: 모든 유형, slot 1개
+    python worker.py --slots 2                         # 다른 머신: 분석 유형만
+    python worker.py --types analyze_range --slots 2   # 백필 전용 (여분 머신)
+"""
+import argparse
+import signal
+import sys
+import threading
+
+
+def preload_model(app):
+    try:
+        app.get_inference_service()
+    except Exception as e:
+        print(f"모델 사전 로드 실패: {e}")
+
+
+def main():
+    """작업 큐 워커 CLI"""
+    parser = argparse.ArgumentParser(description="SSIRN 작업 큐 워커")
+    parser.add_argument("--slots", type=int, default=1, help="동시에 실행할 작업 수 (기본: 1)")
+    parser.add_argument("--types", help="실행할 작업 유형, 쉼표 구분 (기본: 전체, --catalog-host가 아니면 분석 유형만)")
+    parser.add_argument("--catalog-host", action="store_true",
+                        help="웹 서버와 같은 catalog.db를 쓰는 호스트 (변환/리사이즈 작업도 실행)")
+    parser.add_argument("--lease", type=int, default=120, help="작업 리스 시간(초), 하트비트는 1/3마다 (기본: 120)")
+    parser.add_argument("--no-preload", action="store_true", help="시작할 때 YOLO 모델을 미리 로드하지 않음")
+    args = parser.parse_args()
+
+    import main as app
+    from job_queue import JobReporter, JobWorker
+    from migrations import apply_migrations
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()] if args.types else None
+    unknown = [t for t in types or [] if t not in app.JOB_HANDLERS]
+    if unknown:
+        print(f"알 수 없는 작업 유형: {', '.join(unknown)} (가능: {', '.join(app.JOB_HANDLERS)})")
+        sys.exit(1)
+    if not args.catalog_host:
+        file_types = [t for t in types or [] if t in app.FILE_JOB_TYPES]
+        if file_types:
+            print(f"{', '.join(file_types)}는 --catalog-host 워커만 실행할 수 있습니다")
+            sys.exit(1)
+        types = types or [t for t in app.JOB_HANDLERS if t not in app.FILE_JOB_TYPES]
+
+    try:
+        db = app.get_db_connection()
+        try:
+            apply_migrations(db)
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"DB 준비 실패: {e}")
+        sys.exit(1)
+
+    # 분석 유형을 맡으면 모델 로드 + 워밍업을 미리 (첫 작업이 바로 시작되도록)
+    if not args.no_preload and any(t in app.ANALYSIS_JOB_TYPES for t in types or app.JOB_HANDLERS):
+        threading.Thread(target=preload_model, args=(app,), daemon=True).start()
+
+    # 작업 함수들이 부르는 전역 task_manager를 jobs 기록용으로 교체
+    reporter = JobReporter(app.job_queue)
+    app.task_manager = app.TaskManager(reporter)
+
+    worker = JobWorker(app.job_queue, app.JOB_HANDLERS, app.task_manager, reporter=reporter,
+                       labels=app.JOB_LABELS, concurrency=args.slots, types=types,
+                       limits=app.JOB_LIMITS, lease_sec=args.lease)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    worker.run()
+    app.model_registry.stop_all()
+
+
+if __name__ == "__main__":
+    main()